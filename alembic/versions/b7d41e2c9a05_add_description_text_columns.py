@@ -0,0 +1,117 @@
+"""Add description_text and description_excerpt to meals
+
+Revision ID: b7d41e2c9a05
+Revises: 94f98c32baa9
+Create Date: 2026-10-19 05:20:11.402117
+
+"""
+import html
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41e2c9a05'
+down_revision: Union[str, None] = '94f98c32baa9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The derivation below is a frozen copy of app.descriptions as of this revision, so
+# the migration keeps producing the same columns when the app code changes
+DESCRIPTION_EXCERPT_LENGTH = 100
+BLOCK_TAGS = {'p', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre'}
+_TAG_RE = re.compile(r'</?([a-zA-Z][a-zA-Z0-9]*)[^>]*>')
+_INLINE_SPACE_RE = re.compile(r'[^\S\n]+')
+
+_meals = sa.table(
+    "meals",
+    sa.column("id", sa.Integer),
+    sa.column("description", sa.Text),
+    sa.column("description_text", sa.Text),
+    sa.column("description_excerpt", sa.String),
+)
+
+
+def _description_text(description):
+    if not description:
+        return None
+    text = _TAG_RE.sub(lambda m: '\n' if m.group(1).lower() in BLOCK_TAGS else '', description)
+    text = html.unescape(text)
+    lines = (_INLINE_SPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line) or None
+
+
+def _description_excerpt(text):
+    if not text:
+        return None
+    text = ' '.join(text.split())
+    if len(text) <= DESCRIPTION_EXCERPT_LENGTH:
+        return text
+    return text[:DESCRIPTION_EXCERPT_LENGTH].rstrip() + '...'
+
+
+def _backfill_description_fields(connection, batch_size: int = 500) -> int:
+    """Store the derived columns of meals that have a description but no description_text"""
+    query = (
+        sa.select(_meals.c.id, _meals.c.description)
+        .where(_meals.c.description.isnot(None))
+        .where(_meals.c.description_text.is_(None))
+    )
+    update = (
+        _meals.update()
+        .where(_meals.c.id == sa.bindparam("meal_id"))
+        .values(
+            description_text=sa.bindparam("text"),
+            description_excerpt=sa.bindparam("excerpt"),
+        )
+    )
+    updated = 0
+    last_id = None
+    while True:
+        batch = query if last_id is None else query.where(_meals.c.id > last_id)
+        rows = connection.execute(batch.order_by(_meals.c.id).limit(batch_size)).all()
+        if not rows:
+            return updated
+        params = []
+        for meal_id, description in rows:
+            text = _description_text(description)
+            params.append({"meal_id": meal_id, "text": text, "excerpt": _description_excerpt(text)})
+        connection.execute(update, params)
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+def _meal_columns():
+    """Column names of the meals table, or None when it does not exist yet"""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("meals"):
+        return None
+    return {column["name"] for column in inspector.get_columns("meals")}
+
+
+def upgrade() -> None:
+    columns = _meal_columns()
+    if columns is None:
+        # Fresh database: init_db creates the table with every column
+        return
+    if "description_text" not in columns:
+        op.add_column("meals", sa.Column("description_text", sa.Text(), nullable=True))
+    if "description_excerpt" not in columns:
+        op.add_column("meals", sa.Column("description_excerpt", sa.String(), nullable=True))
+
+    updated = _backfill_description_fields(op.get_bind())
+    print(f"Backfilled description text for {updated} meals")
+
+
+def downgrade() -> None:
+    columns = _meal_columns()
+    if not columns:
+        return
+    with op.batch_alter_table("meals") as batch_op:
+        for name in ("description_excerpt", "description_text"):
+            if name in columns:
+                batch_op.drop_column(name)
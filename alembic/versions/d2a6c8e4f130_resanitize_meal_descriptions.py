@@ -0,0 +1,204 @@
+"""Re-sanitize meal descriptions
+
+Revision ID: d2a6c8e4f130
+Revises: b7d41e2c9a05
+Create Date: 2026-10-19 06:02:37.518204
+
+"""
+import html
+import re
+from typing import Optional, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6c8e4f130'
+down_revision: Union[str, None] = 'b7d41e2c9a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The sanitizer and description derivation below are frozen copies of
+# app.validators.sanitize_rich_html and app.descriptions as of this revision, so the
+# migration keeps producing the same rows when the app code changes
+ALLOWED_HTML_TAGS = {'p', 'br', 'strong', 'b', 'em', 'i', 'u', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+                     'ul', 'ol', 'li', 'a', 'blockquote', 'pre', 'code'}
+DROPPED_CONTENT_TAGS = {'script', 'style'}
+ALLOWED_TAG_ATTRIBUTES = {'a': {'href', 'target', 'rel'}}
+ALLOWED_HREF_SCHEMES = {'http', 'https', 'mailto'}
+
+_MARKUP_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(?P<close>/)?(?P<name>[a-zA-Z][^\s/>]*)(?P<attrs>[^>]*)>'
+    r'|<[!?/][^>]*>',
+    re.DOTALL
+)
+_ATTRIBUTE_RE = re.compile(
+    r'(?P<name>[^\s"\'<>/=]+)(?:\s*=\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'|(?P<bare>[^\s"\'>]+)))?'
+)
+_DROPPED_CONTENT_END_RES = {
+    tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in DROPPED_CONTENT_TAGS
+}
+_TEXT_SPECIAL_RE = re.compile(r'[<>]|&(?![a-zA-Z][a-zA-Z0-9]*;|#[0-9]+;|#[xX][0-9a-fA-F]+;)')
+_TEXT_ESCAPES = {'<': '&lt;', '>': '&gt;', '&': '&amp;'}
+_URL_IGNORED_CHARS_RE = re.compile(r'[\x00-\x20\x7f]+')
+_URL_SCHEME_RE = re.compile(r'([a-zA-Z][a-zA-Z0-9+.\-]*):')
+
+DESCRIPTION_EXCERPT_LENGTH = 100
+BLOCK_TAGS = {'p', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre'}
+_TAG_RE = re.compile(r'</?([a-zA-Z][a-zA-Z0-9]*)[^>]*>')
+_INLINE_SPACE_RE = re.compile(r'[^\S\n]+')
+
+_meals = sa.table(
+    "meals",
+    sa.column("id", sa.Integer),
+    sa.column("description", sa.Text),
+    sa.column("description_text", sa.Text),
+    sa.column("description_excerpt", sa.String),
+)
+
+
+def _escape_text(text: str) -> str:
+    return _TEXT_SPECIAL_RE.sub(lambda m: _TEXT_ESCAPES[m.group()], text)
+
+
+def _is_safe_href(url: str) -> bool:
+    scheme = _URL_SCHEME_RE.match(_URL_IGNORED_CHARS_RE.sub('', url))
+    return scheme is None or scheme.group(1).lower() in ALLOWED_HREF_SCHEMES
+
+
+def _clean_attributes(tag: str, attrs: str) -> str:
+    allowed = ALLOWED_TAG_ATTRIBUTES.get(tag)
+    if not allowed or not attrs:
+        return ''
+    cleaned = []
+    seen = set()
+    for match in _ATTRIBUTE_RE.finditer(attrs):
+        name = match.group('name').lower()
+        if name not in allowed or name in seen:
+            continue
+        seen.add(name)
+        value = match.group('dq')
+        if value is None:
+            value = match.group('sq')
+        if value is None:
+            value = match.group('bare') or ''
+        value = html.unescape(value)
+        if name == 'href' and not _is_safe_href(value):
+            continue
+        cleaned.append(f' {name}="{html.escape(value)}"')
+    return ''.join(cleaned)
+
+
+def _clean_tag(match: re.Match) -> Optional[str]:
+    name = match.group('name')
+    if name is None:
+        return ''
+    name = name.lower()
+    if name in DROPPED_CONTENT_TAGS:
+        return '' if match.group('close') else None
+    if name not in ALLOWED_HTML_TAGS:
+        return ''
+    if match.group('close'):
+        return f'</{name}>'
+    return f'<{name}{_clean_attributes(name, match.group("attrs"))}>'
+
+
+def _sanitize_rich_html(html_content: str) -> str:
+    if not html_content:
+        return html_content
+    output = []
+    position = 0
+    for match in _MARKUP_RE.finditer(html_content):
+        start = match.start()
+        if start < position:
+            continue
+        if start > position:
+            output.append(_escape_text(html_content[position:start]))
+        position = match.end()
+        cleaned = _clean_tag(match)
+        if cleaned is None:
+            end = _DROPPED_CONTENT_END_RES[match.group('name').lower()].search(html_content, position)
+            position = end.end() if end else len(html_content)
+            continue
+        if cleaned:
+            output.append(cleaned)
+    if position < len(html_content):
+        output.append(_escape_text(html_content[position:]))
+    return ''.join(output)
+
+
+def _description_text(description):
+    if not description:
+        return None
+    text = _TAG_RE.sub(lambda m: '\n' if m.group(1).lower() in BLOCK_TAGS else '', description)
+    text = html.unescape(text)
+    lines = (_INLINE_SPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line) or None
+
+
+def _description_excerpt(text):
+    if not text:
+        return None
+    text = ' '.join(text.split())
+    if len(text) <= DESCRIPTION_EXCERPT_LENGTH:
+        return text
+    return text[:DESCRIPTION_EXCERPT_LENGTH].rstrip() + '...'
+
+
+def _resanitize_descriptions(connection, batch_size: int = 500) -> int:
+    """Sanitize every stored description, and re-derive the plain text of those that change"""
+    query = (
+        sa.select(_meals.c.id, _meals.c.description)
+        .where(_meals.c.description.isnot(None))
+        .order_by(_meals.c.id)
+        .limit(batch_size)
+    )
+    update = (
+        _meals.update()
+        .where(_meals.c.id == sa.bindparam("meal_id"))
+        .values(
+            description=sa.bindparam("sanitized"),
+            description_text=sa.bindparam("text"),
+            description_excerpt=sa.bindparam("excerpt"),
+        )
+    )
+    updated = 0
+    last_id = None
+    while True:
+        batch = query if last_id is None else query.where(_meals.c.id > last_id)
+        rows = connection.execute(batch).all()
+        if not rows:
+            return updated
+        params = []
+        for meal_id, description in rows:
+            sanitized = _sanitize_rich_html(description.strip()) or None
+            if sanitized == description:
+                continue
+            text = _description_text(sanitized)
+            params.append({
+                "meal_id": meal_id,
+                "sanitized": sanitized,
+                "text": text,
+                "excerpt": _description_excerpt(text),
+            })
+        if params:
+            connection.execute(update, params)
+            updated += len(params)
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    # Descriptions are returned as stored; rows saved under the previous sanitizer
+    # (which let e.g. <img onerror> through) are cleaned with the current one
+    if not sa.inspect(op.get_bind()).has_table("meals"):
+        return
+    updated = _resanitize_descriptions(op.get_bind())
+    print(f"Re-sanitized the description of {updated} meals")
+
+
+def downgrade() -> None:
+    # The previous descriptions are not kept
+    pass
@@ -1,63 +1,199 @@
 """
 Access logging middleware to log all HTTP requests.
+Each request is logged as one JSON object. The event loop only enqueues the
+record; a QueueListener thread formats it and writes it to stdout, so no request
+waits on a stdout write or flush.
 """
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import threading
 import time
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import ACCESS_LOG_SAMPLE_RATE
 from app.security_logging import get_client_info
 
 # Create a dedicated logger for access logs
 access_logger = logging.getLogger("access")
 access_logger.setLevel(logging.INFO)
-# Ensure logs propagate and are displayed
+# Access logs go only to their own (queued) handler
 access_logger.propagate = False
 
-# Create a handler if one doesn't exist
+# Successful requests under these prefixes are sampled (ACCESS_LOG_SAMPLE_RATE)
+SAMPLED_PATH_PREFIXES = ("/static/",)
+
+
+class JsonAccessFormatter(logging.Formatter):
+    """Formats access records as one JSON object per line"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}"}
+        entry.update(getattr(record, "access", None) or {"message": record.getMessage()})
+        return json.dumps(entry, separators=(",", ":"))
+
+
+# Records waiting for the writer thread. When stdout cannot keep up the queue is
+# bounded: new records are dropped (and counted) rather than stalling requests.
+ACCESS_LOG_QUEUE_SIZE = 10000
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records as-is (formatting happens on the listener
+    thread) and drops them when the queue is full.
+    """
+    
+    dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+
+def get_dropped_access_logs() -> int:
+    """Number of access log records dropped because the queue was full"""
+    return _DroppingQueueHandler.dropped
+
+
+_log_queue: "queue.Queue" = queue.Queue(maxsize=ACCESS_LOG_QUEUE_SIZE)
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+
+
+def _ensure_listener():
+    """
+    Start the writer thread for this process. Checked per request because a
+    thread started before a fork (e.g. gunicorn --preload) does not exist in workers.
+    """
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        stream_handler = logging.StreamHandler()
+        stream_handler.setLevel(logging.INFO)
+        stream_handler.setFormatter(JsonAccessFormatter())
+        _listener = QueueListener(_log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+        # Flush what is still queued when the process exits without a shutdown event
+        atexit.register(stop_access_log_listener)
+
+
+def stop_access_log_listener():
+    """Flush queued access logs and stop the writer thread (on shutdown)."""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+        _listener_pid = None
+
+
 if not access_logger.handlers:
-    handler = logging.StreamHandler()
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter(
-        '%(asctime)s - %(message)s'
+    access_logger.addHandler(_DroppingQueueHandler(_log_queue))
+
+
+def _log_access(entry: dict) -> None:
+    """Hand an access entry to the queue (skips logging's caller lookup, which walks the stack)"""
+    if access_logger.disabled or not access_logger.isEnabledFor(logging.INFO):
+        return
+    record = access_logger.makeRecord(
+        access_logger.name, logging.INFO, "", 0, "access", (), None, extra={"access": entry}
     )
-    handler.setFormatter(formatter)
-    access_logger.addHandler(handler)
+    access_logger.handle(record)
+
+
+# Route templates by endpoint ("/api/meals/{meal_id}" rather than "/api/meals/42")
+_route_templates: dict = {}
+
+
+def get_route_template(scope: Scope) -> Optional[str]:
+    """Path template of the route that handled the request, or None if none matched"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return None
+    template = _route_templates.get(endpoint)
+    if template is None:
+        router = scope.get("router")
+        for route in getattr(router, "routes", []):
+            if getattr(route, "endpoint", None) is endpoint:
+                template = getattr(route, "path", None)
+                break
+        _route_templates[endpoint] = template
+    return template
 
 
-class AccessLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log all HTTP requests with client info and response status."""
+class AccessLoggingMiddleware:
+    """
+    Middleware to log all HTTP requests with client info, route, status,
+    duration and response size.
+    Pure ASGI: the status and body size are read from the messages passed to send,
+    and the request is logged once the response has been sent (or the app failed).
+    """
     
-    async def dispatch(self, request: Request, call_next):
-        # Record start time for response time calculation
-        start_time = time.time()
-        
-        # Get client information
-        client_info = get_client_info(request)
-        client_ip = client_info["ip"]
-        method = client_info["method"]
-        path = client_info["path"]
-        user_agent = client_info.get("user_agent", "unknown")
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate response time
-        process_time = time.time() - start_time
-        
-        # Get status code
-        status_code = response.status_code
-        
-        # Log the access (similar to Apache/Nginx combined log format)
-        # Format: IP - - [timestamp] "METHOD PATH HTTP/1.1" STATUS_CODE SIZE "REFERER" "USER_AGENT" PROCESS_TIME
-        referer = client_info.get("referer", "-")
+    def __init__(self, app: ASGIApp, sample_rate: float = ACCESS_LOG_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+    
+    def _should_log(self, path: str, status_code: int) -> bool:
+        if status_code >= 400 or self.sample_rate >= 1.0:
+            return True
+        if not path.startswith(SAMPLED_PATH_PREFIXES):
+            return True
+        return random.random() < self.sample_rate
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        log_message = (
-            f'{client_ip} - - "{method} {path} HTTP/1.1" {status_code} - '
-            f'"{referer}" "{user_agent}" {process_time:.4f}s'
-        )
+        # Record start time for response time calculation
+        start_time = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
         
-        # Use both logger and print to ensure logs appear
-        access_logger.info(log_message)
-        print(log_message, flush=True)  # flush=True ensures immediate output
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            elif message["type"] == "http.response.zerocopysend":
+                response_bytes += message.get("count") or 0
+            await send(message)
         
-        return response
+        try:
+            # Process request
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            if self._should_log(scope["path"], status_code):
+                _ensure_listener()
+                # Client information (headers and path only; the body is never touched)
+                client_info = get_client_info(Request(scope))
+                _log_access({
+                    "client_ip": client_info["ip"],
+                    "method": client_info["method"],
+                    "path": client_info["path"],
+                    "route": get_route_template(scope),
+                    "status": status_code,
+                    "duration_ms": round(duration_ms, 2),
+                    "bytes": response_bytes,
+                    "referer": client_info.get("referer"),
+                    "user_agent": client_info.get("user_agent", "unknown"),
+                })
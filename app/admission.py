@@ -0,0 +1,100 @@
+"""
+Admission control for expensive endpoints (OCR, photo uploads).
+Each AdmissionLimiter lets a fixed number of requests run at once and a bounded
+number wait for a slot; beyond that, or after waiting too long, requests are
+turned away with 503 and Retry-After before their body is read. Other endpoints
+(meal lists) never wait behind them.
+"""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from app import metrics
+from app.config import (
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    OCR_CONCURRENCY,
+    OCR_QUEUE_SIZE,
+    UPLOAD_CONCURRENCY,
+    UPLOAD_QUEUE_SIZE,
+)
+
+# Retry-After bounds, in seconds; the estimate is the recent time a request holds a
+# slot, times the queue ahead of the client
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 120
+DEFAULT_HOLD_SECONDS = 5.0
+
+# Weight of the latest request in the average hold time
+HOLD_TIME_SMOOTHING = 0.2
+
+
+class AdmissionLimiter:
+    """At most `limit` requests at once, and at most `queue_size` waiting for a slot"""
+
+    def __init__(self, name: str, limit: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+        self._waiting = 0
+        self._average_hold = DEFAULT_HOLD_SECONDS
+
+    def retry_after(self) -> int:
+        seconds = self._average_hold * (self._waiting + self.limit) / self.limit
+        return max(MIN_RETRY_AFTER_SECONDS, min(MAX_RETRY_AFTER_SECONDS, math.ceil(seconds)))
+
+    def _reject(self, reason: str) -> HTTPException:
+        metrics.ADMISSION_REJECTED.inc(endpoint=self.name, reason=reason)
+        return HTTPException(
+            status_code=503,
+            detail="Server is busy. Please try again shortly.",
+            headers={"Retry-After": str(self.retry_after())},
+        )
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold a slot for the duration of the block (raises 503 when none is available)"""
+        start = time.perf_counter()
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        else:
+            if self._waiting >= self.queue_size:
+                raise self._reject("queue_full")
+            self._waiting += 1
+            metrics.ADMISSION_QUEUED.inc(endpoint=self.name)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("timeout")
+            finally:
+                self._waiting -= 1
+                metrics.ADMISSION_QUEUED.dec(endpoint=self.name)
+        admitted = time.perf_counter()
+        metrics.ADMISSION_WAIT_DURATION.observe(admitted - start, endpoint=self.name)
+        metrics.ADMISSION_IN_PROGRESS.inc(endpoint=self.name)
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+            metrics.ADMISSION_IN_PROGRESS.dec(endpoint=self.name)
+            held = time.perf_counter() - admitted
+            self._average_hold += HOLD_TIME_SMOOTHING * (held - self._average_hold)
+
+
+def admission_control(limiter: AdmissionLimiter):
+    """
+    Dependency holding a slot of the limiter while the endpoint runs. Endpoints that
+    read the body themselves (Request) get it before any of the body is received.
+    """
+    async def dependency():
+        async with limiter.admit():
+            yield
+    return dependency
+
+
+ocr_admission = AdmissionLimiter("ocr", OCR_CONCURRENCY, OCR_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_SECONDS)
+upload_admission = AdmissionLimiter("upload", UPLOAD_CONCURRENCY, UPLOAD_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT_SECONDS)
@@ -1,13 +1,30 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
+
+import jwt
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from app.config import DISABLE_AUTH
+from app.config import DISABLE_AUTH, JWT_CACHE_SIZE, SUPABASE_JWT_SECRET
 
 security = HTTPBearer(auto_error=False)
 
+# Claims of verified access tokens until they expire, by SHA-256 of the token (LRU):
+# the CSRF middleware and get_current_user share it, so a token's signature is
+# checked once per worker rather than on every request
+_verified_tokens: "OrderedDict[bytes, tuple]" = OrderedDict()
+_verified_tokens_lock = threading.Lock()
+
 
-def _get_token_from_request(request: Request) -> Optional[str]:
+def get_access_token_from_request(request: Request) -> Optional[str]:
+    """
+    Access token of the request: Authorization bearer header, else the sb-access-token
+    cookie. The CSRF middleware uses it too, so cookie-authenticated requests need a
+    CSRF token like header-authenticated ones.
+    """
     auth_header = request.headers.get("Authorization")
     if auth_header and auth_header.lower().startswith("bearer "):
         return auth_header.split(" ", 1)[1]
@@ -17,25 +34,66 @@ def _get_token_from_request(request: Request) -> Optional[str]:
     return None
 
 
+def verify_access_token(token: Optional[str]) -> Optional[dict]:
+    """
+    Claims of a valid Supabase access token (HS256, audience "authenticated"), or None.
+    Verified tokens are cached until their exp; tokens without exp are verified every time.
+    """
+    if not token or not SUPABASE_JWT_SECRET:
+        return None
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    with _verified_tokens_lock:
+        cached = _verified_tokens.get(key)
+        if cached is not None:
+            if cached[0] > time.time():
+                _verified_tokens.move_to_end(key)
+                return cached[1]
+            del _verified_tokens[key]
+    
+    try:
+        claims = jwt.decode(
+            token,
+            SUPABASE_JWT_SECRET,
+            algorithms=["HS256"],
+            audience="authenticated",
+            options={"verify_signature": True}
+        )
+    except jwt.InvalidTokenError:
+        return None
+    
+    expires = claims.get("exp")
+    if JWT_CACHE_SIZE and isinstance(expires, (int, float)):
+        with _verified_tokens_lock:
+            _verified_tokens[key] = (expires, claims)
+            _verified_tokens.move_to_end(key)
+            while len(_verified_tokens) > JWT_CACHE_SIZE:
+                _verified_tokens.popitem(last=False)
+    return claims
+
+
 async def get_current_user(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
 ):
     """
     When DISABLE_AUTH is True, no login required; return a constant placeholder.
-    When DISABLE_AUTH is False, authentication would require JWT (auth router not mounted in local setup).
+    When DISABLE_AUTH is False, a valid Supabase access token is required (Authorization
+    header or sb-access-token cookie); the user is taken from its claims.
     """
     if DISABLE_AUTH:
         return {"id": 1}
-    token = _get_token_from_request(request)
+    token = get_access_token_from_request(request)
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Auth not configured (DISABLE_AUTH mode only)",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    claims = verify_access_token(token)
+    if claims is None or not claims.get("sub"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return {"id": claims["sub"], "email": claims.get("email")}
@@ -0,0 +1,254 @@
+"""
+Response compression.
+CompressionMiddleware gzip- or brotli-encodes compressible responses (JSON, JS,
+CSS, HTML, SVG) above a size threshold; images, and so photos, are never
+recompressed. Static assets can also be precompressed once to .br/.gz files
+next to the originals, which the static asset manifest (app.static_assets) serves as-is.
+"""
+import gzip
+import os
+import zlib
+from typing import Iterable, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional: gzip only
+    brotli = None
+
+
+# Content types worth compressing; everything else (photos, fonts, archives) is left alone
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+)
+
+# Precompressed static variants, in order of preference: (encoding, file suffix)
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Static files that get .br/.gz variants
+PRECOMPRESS_EXTENSIONS = (".js", ".css", ".html", ".json", ".svg", ".txt", ".xml")
+
+# Smaller responses are sent as-is (COMPRESSION_MIN_SIZE in app.config)
+DEFAULT_MIN_SIZE = 1024
+
+# Dynamic responses trade a little ratio for speed; precompression uses the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Content codings the client accepts (q > 0), lowercased"""
+    accepted = []
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            accepted.append(coding)
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str] = None) -> Optional[str]:
+    """Preferred encoding (br, then gzip) among those the client accepts, or None"""
+    accepted = accepted_encodings(accept_encoding)
+    if available is None:
+        available = ("br", "gzip") if brotli is not None else ("gzip",)
+    for encoding in available:
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    return bool(content_type) and content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+
+class _Encoder:
+    """Streaming gzip or brotli encoder"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._gzip = None
+        else:
+            self._brotli = None
+            # wbits 16 + MAX_WBITS: zlib writes the gzip header and trailer
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._gzip.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit buffered output so the chunk can be sent (streamed responses)"""
+        if self._brotli is not None:
+            return self._brotli.flush()
+        return self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._gzip.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compresses compressible responses with brotli (when installed) or gzip.
+    Pure ASGI. Responses are left untouched when they are smaller than
+    minimum_size, already encoded, partial (206), or not of a compressible type.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = DEFAULT_MIN_SIZE,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message, encoder, passthrough
+            message_type = message["type"]
+            if passthrough:
+                await send(message)
+                return
+
+            if message_type == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start_message = message
+                return
+
+            if message_type != "http.response.body":
+                # e.g. a zero-copy file send: cannot be compressed, send it as is
+                passthrough = True
+                if start_message is not None:
+                    await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding, self.gzip_level, self.brotli_quality)
+                headers = MutableHeaders(raw=list(start_message["headers"]))
+                start_message["headers"] = headers.raw
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # The encoded bytes are a different representation of the same resource
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start_message)
+                    await send({
+                        "type": "http.response.body",
+                        "body": encoder.compress(body) + encoder.flush(),
+                        "more_body": True,
+                    })
+                else:
+                    compressed = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                return
+
+            if more_body:
+                chunk = encoder.compress(body) + encoder.flush()
+            else:
+                chunk = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _write_variant(path: str, data: bytes, source_stat: os.stat_result) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.utime(tmp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    os.replace(tmp_path, path)
+
+
+def precompress_static_files(static_dir: str = "static", minimum_size: int = DEFAULT_MIN_SIZE) -> dict:
+    """
+    Write maximum-compression .br (if brotli is installed) and .gz copies of static assets.
+    Files whose variants are already current are skipped, so this is cheap to run at startup.
+
+    Returns:
+        Counts: {"files", "written", "skipped"}
+    """
+    report = {"files": 0, "written": 0, "skipped": 0}
+    encoders = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.insert(0, ("br", ".br", lambda data: brotli.compress(data, quality=11)))
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            source_stat = os.stat(path)
+            if source_stat.st_size < minimum_size:
+                continue
+            report["files"] += 1
+            data = None
+            for _, suffix, compress in encoders:
+                variant = path + suffix
+                try:
+                    if os.stat(variant).st_mtime_ns == source_stat.st_mtime_ns:
+                        report["skipped"] += 1
+                        continue
+                except OSError:
+                    pass
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    continue
+                _write_variant(variant, compressed, source_stat)
+                report["written"] += 1
+    return report
@@ -47,6 +47,61 @@ def get_optional_env(key: str, default: str = None, description: str = None) ->
     return value if value else None
 
 
+def get_int_env(key: str, default: int, minimum: int = 0) -> int:
+    """
+    Get an integer environment variable with a default value.
+    
+    Args:
+        key: Environment variable name
+        default: Default value if not set
+        minimum: Smallest accepted value
+    
+    Returns:
+        Parsed integer value or default
+    
+    Raises:
+        ValueError: If the value is not an integer or is below minimum
+    """
+    value = os.getenv(key)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        parsed = int(value.strip())
+    except ValueError:
+        raise ValueError(f"Environment variable '{key}' must be an integer, got '{value}'.")
+    if parsed < minimum:
+        raise ValueError(f"Environment variable '{key}' must be >= {minimum}, got {parsed}.")
+    return parsed
+
+
+def get_float_env(key: str, default: float, minimum: float = 0.0, maximum: float = None) -> float:
+    """
+    Get a float environment variable with a default value.
+    
+    Args:
+        key: Environment variable name
+        default: Default value if not set
+        minimum: Smallest accepted value
+        maximum: Largest accepted value (no limit if None)
+    
+    Returns:
+        Parsed float value or default
+    
+    Raises:
+        ValueError: If the value is not a number or is out of range
+    """
+    value = os.getenv(key)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        parsed = float(value.strip())
+    except ValueError:
+        raise ValueError(f"Environment variable '{key}' must be a number, got '{value}'.")
+    if parsed < minimum or (maximum is not None and parsed > maximum):
+        raise ValueError(f"Environment variable '{key}' must be between {minimum} and {maximum}, got {parsed}.")
+    return parsed
+
+
 # Database configuration
 DATABASE_URL = get_required_env(
     "DATABASE_URL",
@@ -85,6 +140,9 @@ if not DISABLE_AUTH and not SUPABASE_JWT_SECRET:
             "Alternatively, SUPABASE_SERVICE_ROLE_KEY can be used as fallback."
         )
 
+# Verified access tokens kept per worker (each token is verified once until it expires)
+JWT_CACHE_SIZE = get_int_env("JWT_CACHE_SIZE", default=1024)
+
 # Storage configuration
 SUPABASE_BUCKET = get_optional_env(
     "SUPABASE_BUCKET",
@@ -95,6 +153,102 @@ SUPABASE_BUCKET = get_optional_env(
 # Local photos directory when DISABLE_AUTH (no Supabase). Default: ./data/photos
 LOCAL_PHOTOS_PATH = get_optional_env("LOCAL_PHOTOS_PATH", default="data/photos", description="Local photos directory when not using Supabase")
 
+# Read-through cache for photos fetched from Supabase Storage (not used for local photos).
+# Memory tier is an LRU bounded in bytes; the disk tier is a directory bounded in bytes.
+# Set a size to 0 to disable that tier.
+PHOTO_CACHE_MEMORY_BYTES = get_int_env("PHOTO_CACHE_MEMORY_BYTES", default=64 * 1024 * 1024)
+PHOTO_CACHE_DISK_BYTES = get_int_env("PHOTO_CACHE_DISK_BYTES", default=1024 * 1024 * 1024)
+PHOTO_CACHE_DIR = get_optional_env("PHOTO_CACHE_DIR", default="data/photo_cache", description="Directory for the on-disk photo cache")
+
+# How GET /static/photos/{filename} delivers bytes once the request is authorized:
+# - "proxy": the app streams the photo itself (default)
+# - "redirect": 302 to a short-lived signed Supabase Storage URL (local storage falls back to proxy)
+# - "accel": empty response with X-Accel-Redirect so nginx serves the bytes
+#   (see docs/deployment/nginx.conf.example)
+PHOTO_DELIVERY_MODES = ("proxy", "redirect", "accel")
+PHOTO_DELIVERY_MODE = (get_optional_env("PHOTO_DELIVERY_MODE", default="proxy") or "proxy").strip().lower()
+if PHOTO_DELIVERY_MODE not in PHOTO_DELIVERY_MODES:
+    raise ValueError(
+        f"PHOTO_DELIVERY_MODE must be one of: {', '.join(PHOTO_DELIVERY_MODES)} "
+        f"(got '{PHOTO_DELIVERY_MODE}')."
+    )
+PHOTO_SIGNED_URL_TTL_SECONDS = get_int_env("PHOTO_SIGNED_URL_TTL_SECONDS", default=300, minimum=10)
+PHOTO_ACCEL_PREFIX = get_optional_env(
+    "PHOTO_ACCEL_PREFIX",
+    default="/_protected_photos/",
+    description="Internal nginx location that serves photos in accel delivery mode"
+).rstrip("/") + "/"
+
+# Signed photo URLs: meal responses carry /static/photos URLs with an expiry and an
+# HMAC signature, so serving them needs neither auth nor a DB lookup.
+# Without it, the key is derived from the JWT secret (never the JWT key itself); without
+# either, a per-process key is generated, so signatures only verify on the process that
+# issued them (gunicorn.conf.py refuses to start several workers then).
+PHOTO_URL_SECRET = os.getenv("PHOTO_URL_SECRET") or None
+# Signed URLs stay valid for between one and two TTLs (expiries are aligned to TTL
+# boundaries so the URL, and therefore the browser cache entry, is stable in between)
+PHOTO_URL_TTL_SECONDS = get_int_env("PHOTO_URL_TTL_SECONDS", default=24 * 3600, minimum=60)
+
+# Orphaned photo garbage collection (photos stored but not referenced by any meal).
+# Photos younger than the grace period are kept: they may belong to a form still being filled.
+# Set the interval to run it periodically in the app (0 = only via scripts/gc_photos.py).
+PHOTO_GC_GRACE_SECONDS = get_int_env("PHOTO_GC_GRACE_SECONDS", default=24 * 3600)
+PHOTO_GC_INTERVAL_SECONDS = get_int_env("PHOTO_GC_INTERVAL_SECONDS", default=0)
+
+# Image processing: number of uploads optimized concurrently (off the event loop).
+# Defaults to the CPU count, capped at 4 to bound peak memory of decoded images.
+IMAGE_PROCESSING_WORKERS = get_int_env(
+    "IMAGE_PROCESSING_WORKERS",
+    default=min(4, os.cpu_count() or 1),
+    minimum=1,
+)
+
+# Uploads are spooled to a temporary file once they exceed this many bytes in memory
+UPLOAD_SPOOL_MEMORY_BYTES = get_int_env("UPLOAD_SPOOL_MEMORY_BYTES", default=1024 * 1024)
+
+# Admission control: requests to OCR (extract-text-from-photo) and upload-photo running
+# at once, and how many more may wait for a slot (up to the timeout). Beyond that they
+# get 503 with Retry-After, before their body is received.
+OCR_CONCURRENCY = get_int_env("OCR_CONCURRENCY", default=IMAGE_PROCESSING_WORKERS, minimum=1)
+OCR_QUEUE_SIZE = get_int_env("OCR_QUEUE_SIZE", default=IMAGE_PROCESSING_WORKERS * 2)
+UPLOAD_CONCURRENCY = get_int_env("UPLOAD_CONCURRENCY", default=IMAGE_PROCESSING_WORKERS * 2, minimum=1)
+UPLOAD_QUEUE_SIZE = get_int_env("UPLOAD_QUEUE_SIZE", default=IMAGE_PROCESSING_WORKERS * 4)
+ADMISSION_QUEUE_TIMEOUT_SECONDS = get_float_env("ADMISSION_QUEUE_TIMEOUT_SECONDS", default=30.0, minimum=0.1)
+
+# Access logging: fraction of successful (< 400) requests for static files and photos
+# that are logged. Errors and API requests are always logged.
+ACCESS_LOG_SAMPLE_RATE = get_float_env("ACCESS_LOG_SAMPLE_RATE", default=1.0, minimum=0.0, maximum=1.0)
+
+# Response compression: compressible responses (JSON, JS, CSS, HTML) at least this
+# large are gzip/brotli encoded. Static assets are precompressed to .br/.gz at startup
+# (or at build time with scripts/precompress_static.py) unless disabled.
+COMPRESSION_MIN_SIZE = get_int_env("COMPRESSION_MIN_SIZE", default=1024)
+STATIC_PRECOMPRESS = (os.getenv("STATIC_PRECOMPRESS", "true").lower() in ("1", "true", "yes"))
+
+# Metrics: GET /metrics (Prometheus text format), off (404) unless a token is set.
+# Scrapers must send "Authorization: Bearer <token>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") or None
+
+# On-demand profiling, off unless a token is set. Requests sent with
+# "X-Profiling-Token: <token>" and "X-Profile: 1" (or ?profile=1) run under cProfile;
+# /api/debug/* (same header) lists the reports and takes/diffs tracemalloc snapshots.
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN") or None
+PROFILING_REPORTS_KEPT = get_int_env("PROFILING_REPORTS_KEPT", default=20, minimum=1)
+
+# Database migrations at worker startup: "upgrade" applies them (fine for a single
+# process), "check" only verifies the database is at the latest revision and refuses to
+# start otherwise (run `python -m app.migrate` once per deploy), "skip" does neither.
+STARTUP_MIGRATIONS = os.getenv("STARTUP_MIGRATIONS", "upgrade").strip().lower()
+if STARTUP_MIGRATIONS not in ("upgrade", "check", "skip"):
+    raise ValueError(f"STARTUP_MIGRATIONS must be upgrade, check or skip, got '{STARTUP_MIGRATIONS}'.")
+
+# Multi-process serving (gunicorn.conf.py): worker processes, whether the master imports
+# the app before forking them (shared copy-on-write), and whether the EasyOCR models are
+# loaded at startup (in the master when the app is preloaded) instead of on first use.
+WEB_CONCURRENCY = get_int_env("WEB_CONCURRENCY", default=os.cpu_count() or 1, minimum=1)
+PRELOAD_APP = (os.getenv("PRELOAD_APP", "true").lower() in ("1", "true", "yes"))
+PRELOAD_OCR_MODELS = (os.getenv("PRELOAD_OCR_MODELS", "").lower() in ("1", "true", "yes"))
+
 # Application configuration
 ENVIRONMENT = get_optional_env(
     "ENVIRONMENT",
@@ -5,14 +5,62 @@ Ensures all cookies set by the application have secure settings:
 - Secure: Only sent over HTTPS (in production)
 - SameSite: Prevents CSRF attacks
 """
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from typing import Callable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.config import ENVIRONMENT
 
 
-class SecureCookieMiddleware(BaseHTTPMiddleware):
+def secure_cookie(cookie: str, is_production: bool) -> str:
+    """
+    Return a Set-Cookie value with HttpOnly, SameSite=Lax and (in production) Secure
+    added when missing. The cookie's own attributes are kept.
+    """
+    # Parse cookie string (format: name=value; attr1=val1; attr2=val2)
+    cookie_parts = cookie.split(";")
+    
+    # First part is name=value
+    name_value = cookie_parts[0].strip()
+    if not name_value:
+        return cookie
+    
+    # Parse attributes
+    attrs = {}
+    for part in cookie_parts[1:]:
+        part = part.strip()
+        if "=" in part:
+            key, value = part.split("=", 1)
+            attrs[key.strip().lower()] = value.strip()
+        elif part:
+            attrs[part.lower()] = True
+    
+    # Build secure cookie string
+    secure_value = name_value
+    
+    # Add HttpOnly if not present (prevents JavaScript access)
+    if "httponly" not in attrs:
+        secure_value += "; HttpOnly"
+    
+    # Add Secure flag in production (only send over HTTPS)
+    if is_production and "secure" not in attrs:
+        secure_value += "; Secure"
+    
+    # Add SameSite if not present (prevents CSRF)
+    if "samesite" not in attrs:
+        # Use Lax for most cookies (allows GET requests from other sites)
+        # Use Strict for sensitive cookies (no cross-site requests)
+        secure_value += "; SameSite=Lax"
+    
+    # Preserve the cookie's own attributes (Path, Domain, Max-Age, Expires, and any
+    # HttpOnly/Secure/SameSite it already set)
+    for key, value in attrs.items():
+        if value is True:
+            secure_value += f"; {key.capitalize()}"
+        else:
+            secure_value += f"; {key.capitalize()}={value}"
+    
+    return secure_value
+
+
+class SecureCookieMiddleware:
     """
     Middleware to enforce secure cookie settings on all Set-Cookie headers.
     
@@ -21,66 +69,28 @@ class SecureCookieMiddleware(BaseHTTPMiddleware):
     - HttpOnly: Prevents JavaScript access
     - Secure: Only sent over HTTPS (in production)
     - SameSite=Lax: Prevents CSRF while allowing normal navigation
+    
+    Pure ASGI: Set-Cookie headers are rewritten in the http.response.start message.
     """
     
-    def __init__(self, app, environment: str = "development"):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, environment: str = "development"):
+        self.app = app
         self.is_production = environment == "production"
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Process Set-Cookie headers to ensure secure settings
-        if "Set-Cookie" in response.headers:
-            cookies = response.headers.get_list("Set-Cookie")
-            response.headers.pop("Set-Cookie", None)
-            
-            for cookie in cookies:
-                # Parse cookie string (format: name=value; attr1=val1; attr2=val2)
-                cookie_parts = cookie.split(";")
-                if not cookie_parts:
-                    continue
-                
-                # First part is name=value
-                name_value = cookie_parts[0].strip()
-                if not name_value:
-                    continue
-                
-                # Parse attributes
-                attrs = {}
-                for part in cookie_parts[1:]:
-                    part = part.strip()
-                    if "=" in part:
-                        key, value = part.split("=", 1)
-                        attrs[key.strip().lower()] = value.strip()
-                    else:
-                        attrs[part.lower()] = True
-                
-                # Build secure cookie string
-                secure_cookie = name_value
-                
-                # Add HttpOnly if not present (prevents JavaScript access)
-                if "httponly" not in attrs:
-                    secure_cookie += "; HttpOnly"
-                
-                # Add Secure flag in production (only send over HTTPS)
-                if self.is_production and "secure" not in attrs:
-                    secure_cookie += "; Secure"
-                
-                # Add SameSite if not present (prevents CSRF)
-                if "samesite" not in attrs:
-                    # Use Lax for most cookies (allows GET requests from other sites)
-                    # Use Strict for sensitive cookies (no cross-site requests)
-                    secure_cookie += "; SameSite=Lax"
-                
-                # Preserve other attributes (Path, Domain, Max-Age, Expires, etc.)
-                for key, value in attrs.items():
-                    if key not in ("httponly", "secure", "samesite"):
-                        if value is True:
-                            secure_cookie += f"; {key.capitalize()}"
-                        else:
-                            secure_cookie += f"; {key.capitalize()}={value}"
-                
-                response.headers.append("Set-Cookie", secure_cookie)
+        async def send_with_secure_cookies(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                if any(name.lower() == b"set-cookie" for name, _ in headers):
+                    message["headers"] = [
+                        (name, secure_cookie(value.decode("latin-1"), self.is_production).encode("latin-1"))
+                        if name.lower() == b"set-cookie" else (name, value)
+                        for name, value in headers
+                    ]
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_secure_cookies)
@@ -4,11 +4,10 @@ Implements CSRF token validation for state-changing operations.
 """
 import secrets
 from typing import Optional
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
-import jwt
-from app.config import SUPABASE_JWT_SECRET
+from fastapi import Request, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.auth import get_access_token_from_request, verify_access_token
 
 
 # State-changing HTTP methods that require CSRF protection
@@ -47,33 +46,18 @@ def validate_csrf_token(request: Request, token: Optional[str]) -> bool:
     if not token:
         return False
     
-    # Extract JWT token to verify user is authenticated
-    auth_header = request.headers.get("Authorization")
-    if not auth_header or not auth_header.lower().startswith("bearer "):
+    # Extract JWT token to verify user is authenticated (header or cookie, as get_current_user)
+    jwt_token = get_access_token_from_request(request)
+    if not jwt_token:
         return False
     
-    jwt_token = auth_header.split(" ", 1)[1]
-    
-    try:
-        # Decode JWT to verify it's valid
-        decoded = jwt.decode(
-            jwt_token,
-            SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
-            audience="authenticated",
-            options={"verify_signature": True}
-        )
-        
-        # Token is valid and user is authenticated
-        # The presence of a custom header provides CSRF protection
-        # since browsers don't automatically send custom headers in cross-origin requests
-        return True
-        
-    except jwt.InvalidTokenError:
-        return False
+    # The token must be valid (verified once per token, then cached until it expires).
+    # The presence of a custom header provides CSRF protection
+    # since browsers don't automatically send custom headers in cross-origin requests
+    return verify_access_token(jwt_token) is not None
 
 
-class CSRFProtectionMiddleware(BaseHTTPMiddleware):
+class CSRFProtectionMiddleware:
     """
     Middleware to enforce CSRF protection on state-changing operations.
     
@@ -82,35 +66,47 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
     
     Public endpoints like /api/register and /api/login are exempt
     since they don't require authentication and CSRF is less relevant.
+    
+    Pure ASGI: the check only needs the request headers, so a rejected request
+    is answered with 403 before the app runs or any of the body is received.
     """
     
     # Public endpoints that don't require CSRF protection (none when auth disabled)
     PUBLIC_ENDPOINTS: set = set()
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip CSRF check for safe methods (GET, HEAD, OPTIONS)
-        if request.method not in CSRF_PROTECTED_METHODS:
-            return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip CSRF check for safe methods (GET, HEAD, OPTIONS) and non-HTTP traffic
+        if scope["type"] != "http" or scope["method"] not in CSRF_PROTECTED_METHODS:
+            await self.app(scope, receive, send)
+            return
         
         # Skip CSRF check for public endpoints
-        if request.url.path in self.PUBLIC_ENDPOINTS:
-            return await call_next(request)
+        if scope["path"] in self.PUBLIC_ENDPOINTS:
+            await self.app(scope, receive, send)
+            return
+        
+        # Request over the scope alone: only headers are read, never the body
+        request = Request(scope)
         
         # For authenticated endpoints, require CSRF token
-        # Check if request has Authorization header (authenticated)
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.lower().startswith("bearer "):
+        # Authenticated = carries an access token, in the Authorization header or in the
+        # sb-access-token cookie (which browsers send on cross-site requests too)
+        if get_access_token_from_request(request):
             # This is an authenticated request - require CSRF token
             csrf_token = get_csrf_token_from_request(request)
             
             if not validate_csrf_token(request, csrf_token):
-                raise HTTPException(
+                response = JSONResponse(
                     status_code=status.HTTP_403_FORBIDDEN,
-                    detail="CSRF token missing or invalid"
+                    content={"detail": "CSRF token missing or invalid"}
                 )
+                await response(scope, receive, send)
+                return
         
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
 
 
 def get_csrf_token_dependency(request: Request):
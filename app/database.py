@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from app.config import DATABASE_URL
+from app.metrics import instrument_engine
 
 # SQLite: ensure DB directory exists and check_same_thread=False
 _is_sqlite = (DATABASE_URL or "").strip().lower().startswith("sqlite")
@@ -17,6 +18,8 @@ if _is_sqlite:
         Path(_path).parent.mkdir(parents=True, exist_ok=True)
 connect_args = {"check_same_thread": False} if _is_sqlite else {}
 engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# Per-statement timing and per-request statement counts for /metrics
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -28,6 +31,9 @@ class Meal(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
+    # Derived from description when it is written (app.descriptions)
+    description_text = Column(Text, nullable=True)
+    description_excerpt = Column(String, nullable=True)
     url = Column(String, nullable=True)
     photo_filename = Column(String, nullable=True)
     photos = Column(JSON, nullable=True)  # [{"filename": "...", "is_primary": true}, ...]
@@ -0,0 +1,45 @@
+"""
+Plain-text forms of meal descriptions.
+Descriptions are stored as sanitized Quill HTML. Their plain text and a short
+excerpt are derived whenever a description is written (create_meal/update_meal)
+and stored next to it, so list views and search never parse HTML on read.
+"""
+import html
+import re
+from typing import Optional
+
+# Excerpts shown on meal cards, in characters (before the trailing "...")
+DESCRIPTION_EXCERPT_LENGTH = 100
+
+# Tags that start a new line of text
+BLOCK_TAGS = {'p', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre'}
+
+_TAG_RE = re.compile(r'</?([a-zA-Z][a-zA-Z0-9]*)[^>]*>')
+# Whitespace other than newlines (including the &nbsp; Quill writes)
+_INLINE_SPACE_RE = re.compile(r'[^\S\n]+')
+
+
+def description_text(description: Optional[str]) -> Optional[str]:
+    """Plain text of a sanitized HTML description: one line per block, entities decoded"""
+    if not description:
+        return None
+    text = _TAG_RE.sub(lambda m: '\n' if m.group(1).lower() in BLOCK_TAGS else '', description)
+    text = html.unescape(text)
+    lines = (_INLINE_SPACE_RE.sub(' ', line).strip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line) or None
+
+
+def description_excerpt(text: Optional[str], length: int = DESCRIPTION_EXCERPT_LENGTH) -> Optional[str]:
+    """The start of a description's plain text on one line, ending with "..." when cut"""
+    if not text:
+        return None
+    text = ' '.join(text.split())
+    if len(text) <= length:
+        return text
+    return text[:length].rstrip() + '...'
+
+
+def description_fields(description: Optional[str]) -> dict:
+    """Derived columns to store along with a (sanitized) description"""
+    text = description_text(description)
+    return {"description_text": text, "description_excerpt": description_excerpt(text)}
@@ -0,0 +1,168 @@
+"""
+File responses for photos stored on local disk.
+Streams directly from the file instead of reading it into memory, uses the
+server's zero-copy (sendfile) extension when available, and supports
+single byte-range requests (206 Partial Content / 416).
+"""
+import os
+import re
+from typing import Mapping, Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+# Only single ranges are supported; multi-range requests get the full file (RFC 9110 allows this)
+_RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$", re.IGNORECASE)
+
+# ASGI extension for zero-copy file sends (os.sendfile) offered by some servers
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header does not overlap the file."""
+
+
+def parse_range_header(range_header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte-range Range header.
+
+    Args:
+        range_header: Value of the Range header (may be None)
+        file_size: Size of the file in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to serve the full file
+
+    Raises:
+        RangeNotSatisfiable: If the range starts beyond the end of the file
+    """
+    if not range_header:
+        return None
+    match = _RANGE_RE.match(range_header)
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, file_size - length), file_size - 1
+    start = int(first)
+    end = int(last) if last else file_size - 1
+    if start >= file_size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, file_size - 1)
+
+
+class LocalFileResponse(FileResponse):
+    """
+    FileResponse that serves a whole file or one byte range of it.
+    Uses zero-copy sends when the server supports them, otherwise streams
+    fixed-size chunks from disk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        byte_range: Optional[Tuple[int, int]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+    ) -> None:
+        super().__init__(
+            path,
+            status_code=206 if byte_range else 200,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+        )
+        self.headers["accept-ranges"] = "bytes"
+        if byte_range:
+            start, end = byte_range
+            self.offset, self.count = start, end - start + 1
+            self.headers["content-length"] = str(self.count)
+            self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+        else:
+            self.offset, self.count = 0, stat_result.st_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"].upper() == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file.fileno(),
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                if self.offset:
+                    await file.seek(self.offset)
+                remaining = self.count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0,
+                    })
+                if remaining > 0:
+                    # File shrank while sending; close the body so the client sees a short response
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.background is not None:
+            await self.background()
+
+
+async def build_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Build a 200, 206 or 416 response for a file on local disk.
+    Content-Length and Last-Modified come from a single stat() of the file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    response_headers = dict(headers or {})
+    try:
+        byte_range = parse_range_header(request.headers.get("range"), stat_result.st_size)
+    except RangeNotSatisfiable:
+        response_headers["Content-Range"] = f"bytes */{stat_result.st_size}"
+        return Response(status_code=416, headers=response_headers)
+
+    if byte_range:
+        # If-Range: only honor the range if the client's copy is still current
+        if_range = request.headers.get("if-range")
+        if if_range:
+            current = LocalFileResponse(path, stat_result, headers=response_headers, media_type=media_type)
+            if if_range.strip() not in (current.headers.get("etag"), current.headers.get("last-modified")):
+                return current
+
+    return LocalFileResponse(
+        path,
+        stat_result,
+        byte_range=byte_range,
+        headers=response_headers,
+        media_type=media_type,
+    )
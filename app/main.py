@@ -3,25 +3,45 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from dotenv import load_dotenv
+import asyncio
 
 # Load environment variables from .env file
 load_dotenv()
 
-from app.database import init_db
+from app.database import engine, init_db
 from app.storage import ensure_bucket_exists
-from app.routes import meals, static
-from app.config import CORS_ORIGINS_LIST, ENVIRONMENT, DISABLE_AUTH
+from app.routes import meals, static, metrics as metrics_routes, profiling as profiling_routes
+from app.config import (
+    CORS_ORIGINS_LIST,
+    ENVIRONMENT,
+    PHOTO_GC_INTERVAL_SECONDS,
+    COMPRESSION_MIN_SIZE,
+    STATIC_PRECOMPRESS,
+    METRICS_TOKEN,
+    PROFILING_TOKEN,
+    STARTUP_MIGRATIONS,
+)
+from app.photo_gc import run_periodic_photo_gc
 from app.security_headers import SecurityHeadersMiddleware
 from app.csrf import CSRFProtectionMiddleware
 from app.cookie_security import SecureCookieMiddleware
-from app.access_logging import AccessLoggingMiddleware
-from alembic.config import Config
-from alembic import command
+from app.access_logging import AccessLoggingMiddleware, stop_access_log_listener
+from app.metrics import MetricsMiddleware
+from app.compression import CompressionMiddleware, precompress_static_files
+from app.profiling import ProfilingMiddleware
+from app.static_assets import asset_response, build_asset_manifest, get_asset_manifest
+from app.migrate import check_database_revision, upgrade_database
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
 app = FastAPI(title="EasyMeal Recipe App", version="1.0.0", root_path="/easymeal")
 
+# Compression of JSON/JS/CSS/HTML responses (innermost, so logs and metrics see the bytes sent)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+# Request metrics (latency per route, in-flight requests, SQL per request) for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Access logging middleware (should be early to capture all requests)
 app.add_middleware(AccessLoggingMiddleware)
 
@@ -50,74 +70,50 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand request profiling (outermost, so the whole stack is profiled); only
+# installed when PROFILING_TOKEN is set
+if PROFILING_TOKEN:
+    app.add_middleware(ProfilingMiddleware, token=PROFILING_TOKEN)
+
 # Include routers (no auth router; app runs without users)
 app.include_router(meals.router)
 app.include_router(static.router)  # Has /static/photos/{filename} route
+if METRICS_TOKEN:
+    app.include_router(metrics_routes.router)  # GET /metrics
+if PROFILING_TOKEN:
+    app.include_router(profiling_routes.router)  # /api/debug/profiles, /api/debug/memory
 
 # Serve static files using explicit route to ensure correct MIME types
 # This works around issues with StaticFiles mount and root_path
 # Note: This route comes AFTER routers, so /static/photos/{filename} is handled by the router first
-from fastapi.responses import FileResponse
-import os
-
 @app.get("/static/{file_path:path}")
-async def serve_static_file(file_path: str):
-    """Serve static files with correct MIME types (excludes /static/photos which is handled by router)"""
+async def serve_static_file(file_path: str, request: Request):
+    """
+    Serve static files from the asset manifest (excludes /static/photos which is handled by router).
+    Fingerprinted names (app.<hash>.js) are cached as immutable; plain names are revalidated.
+    """
     # Skip photos path - handled by static router
     if file_path.startswith("photos/"):
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Security: prevent path traversal
-    file_path = os.path.normpath(file_path)
-    if ".." in file_path or file_path.startswith("/"):
-        from fastapi import HTTPException
-        raise HTTPException(status_code=403, detail="Access denied")
-    
-    full_path = os.path.join("static", file_path)
-    if not os.path.exists(full_path):
+    # Only files indexed from static/ can be served, so no path can escape it
+    asset = get_asset_manifest(reload=ENVIRONMENT != "production").get(file_path)
+    if asset is None:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Determine MIME type from extension
-    media_type = "application/octet-stream"
-    if file_path.endswith(".css"):
-        media_type = "text/css"
-    elif file_path.endswith(".js"):
-        # Service workers must be served with application/javascript or text/javascript
-        media_type = "application/javascript"
-    elif file_path.endswith(".html"):
-        media_type = "text/html"
-    elif file_path.endswith(".json"):
-        media_type = "application/json"
-    elif file_path.endswith(".png"):
-        media_type = "image/png"
-    elif file_path.endswith(".jpg") or file_path.endswith(".jpeg"):
-        media_type = "image/jpeg"
-    elif file_path.endswith(".gif"):
-        media_type = "image/gif"
-    elif file_path.endswith(".webp"):
-        media_type = "image/webp"
-    elif file_path.endswith(".svg"):
-        media_type = "image/svg+xml"
-    elif file_path.endswith(".ico"):
-        media_type = "image/x-icon"
-    elif file_path.endswith(".woff") or file_path.endswith(".woff2"):
-        media_type = "font/woff" if file_path.endswith(".woff") else "font/woff2"
-    
-    # Allow the service worker at /easymeal/static/sw.js to control /easymeal/
-    headers = {}
-    if file_path == "sw.js":
-        headers["Service-Worker-Allowed"] = "/easymeal/"
-    
-    return FileResponse(full_path, media_type=media_type, headers=headers)
+    return asset_response(request, asset, fingerprinted=file_path == asset.hashed_name)
 
 
 @app.get("/")
-async def read_root():
-    """Serve the main index.html page"""
-    from fastapi.responses import FileResponse
-    return FileResponse("static/index.html")
+async def read_root(request: Request):
+    """Serve the main index.html page (references fingerprinted assets)"""
+    asset = get_asset_manifest(reload=ENVIRONMENT != "production").get("index.html")
+    if asset is None:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=404, detail="File not found")
+    return asset_response(request, asset, fingerprinted=False)
 
 
 # Global exception handler to ensure all errors return JSON
@@ -146,28 +142,52 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 @app.on_event("startup")
 async def startup_event():
-    """Run database migrations and initialize Supabase Storage bucket on startup"""
-    # Run Alembic migrations
-    try:
-        alembic_cfg = Config("alembic.ini")
-        command.upgrade(alembic_cfg, "head")
-        print("Database migrations completed successfully")
-    except Exception as e:
-        print(f"Warning: Could not run migrations: {e}")
+    """
+    Prepare the worker: database migrations (per STARTUP_MIGRATIONS), static assets.
+    With several workers, run `python -m app.migrate` once and start them with
+    STARTUP_MIGRATIONS=check so each one only verifies the revision.
+    """
+    if STARTUP_MIGRATIONS == "check":
+        # Fails startup when the database is behind the code
+        check_database_revision(engine)
+        print("Database is at the latest revision")
+    elif STARTUP_MIGRATIONS == "upgrade":
         try:
-            init_db()
-        except Exception as init_error:
-            print(f"Warning: Could not initialize database: {init_error}")
-    if DISABLE_AUTH:
-        # Ensure tables exist (initial migration may be empty)
+            upgrade_database()
+            print("Database migrations completed successfully")
+        except Exception as e:
+            print(f"Warning: Could not run migrations: {e}")
+            try:
+                init_db()
+            except Exception as init_error:
+                print(f"Warning: Could not initialize database: {init_error}")
+        # Supabase Storage bucket (also done by app.migrate): a network call, kept
+        # off the startup path
+        app.state.bucket_setup_task = asyncio.create_task(asyncio.to_thread(ensure_bucket_exists))
+    
+    # Precompress static assets (only files changed since the last run are rewritten)
+    if STATIC_PRECOMPRESS:
         try:
-            init_db()
+            report = await asyncio.to_thread(precompress_static_files, "static", COMPRESSION_MIN_SIZE)
+            print(f"Static assets precompressed: {report['written']} written, {report['skipped']} up to date")
         except Exception as e:
-            print(f"Warning: init_db (DISABLE_AUTH): {e}")
+            print(f"Warning: Could not precompress static assets: {e}")
     
-    # Initialize Supabase Storage bucket
+    # Index static assets (content hashes, MIME types, precompressed variants)
     try:
-        ensure_bucket_exists()
+        manifest = await asyncio.to_thread(build_asset_manifest)
+        print(f"Static asset manifest: {len(manifest.assets)} files, version {manifest.version}")
     except Exception as e:
-        print(f"Warning: Could not initialize Supabase Storage bucket: {e}")
+        print(f"Warning: Could not build static asset manifest: {e}")
+    
+    # Periodic cleanup of photos no meal references (disabled by default)
+    if PHOTO_GC_INTERVAL_SECONDS > 0:
+        app.state.photo_gc_task = asyncio.create_task(run_periodic_photo_gc(PHOTO_GC_INTERVAL_SECONDS))
+        print(f"Photo GC scheduled every {PHOTO_GC_INTERVAL_SECONDS}s")
     # Note: OCR reader will be initialized lazily on first use to avoid slow startup
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush queued access logs"""
+    stop_access_log_listener()
@@ -0,0 +1,400 @@
+"""
+In-process metrics exposed at /metrics in the Prometheus text format (0.0.4).
+Counters, gauges and histograms are kept in memory by each process; no client
+library or external service is needed. With several workers each process keeps
+its own values, so a scrape reflects the worker that answered it.
+"""
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.access_logging import get_dropped_access_logs, get_route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds (the Prometheus client defaults)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(suffix, formatted labels, value) for every sample of this metric"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: str) -> None:
+        """Mirror a total counted elsewhere (e.g. by a cache), from a collector"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (in-flight requests, queue depth)"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labelnames:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    @contextmanager
+    def track_inprogress(self, **labels: str):
+        """Increment for the duration of the block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets, plus their sum and count"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe the duration of the block, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        samples = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", _format_labels(names, key + (_format_value(bound),)), cumulative))
+            samples.append(("_sum", _format_labels(self.labelnames, key), total))
+            samples.append(("_count", _format_labels(self.labelnames, key), cumulative))
+        return samples
+
+
+# Registered metrics, rendered in registration order
+_registry: List[_Metric] = []
+# Callbacks refreshing gauges from other components' stats just before a scrape
+_collectors: List[Callable[[], None]] = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    """Register a callback that updates metrics right before they are rendered"""
+    _collectors.append(collector)
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# HTTP
+HTTP_REQUEST_DURATION = _register(Histogram(
+    "easymeal_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+HTTP_REQUESTS_IN_PROGRESS = _register(Gauge(
+    "easymeal_http_requests_in_progress",
+    "HTTP requests currently being handled",
+))
+
+# Database
+DB_QUERY_DURATION = _register(Histogram(
+    "easymeal_db_query_duration_seconds",
+    "Duration of individual SQL statements",
+))
+DB_QUERIES_PER_REQUEST = _register(Histogram(
+    "easymeal_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+))
+DB_TIME_PER_REQUEST = _register(Histogram(
+    "easymeal_db_time_per_request_seconds",
+    "Total SQL time per HTTP request",
+    ("route",),
+))
+
+# Image processing and OCR (the bounded image pool)
+IMAGE_POOL_TASKS = _register(Gauge(
+    "easymeal_image_pool_tasks",
+    "Image pool tasks waiting for a worker (queued) or being processed (running)",
+    ("task", "state"),
+))
+IMAGE_PROCESSING_DURATION = _register(Histogram(
+    "easymeal_image_processing_seconds",
+    "Image processing time by step (optimize, placeholder)",
+    ("step",),
+))
+OCR_INFERENCE_DURATION = _register(Histogram(
+    "easymeal_ocr_inference_seconds",
+    "EasyOCR text recognition time per image",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+))
+
+# Admission control (OCR and upload endpoints)
+ADMISSION_IN_PROGRESS = _register(Gauge(
+    "easymeal_admission_in_progress",
+    "Requests holding an admission slot, by endpoint",
+    ("endpoint",),
+))
+ADMISSION_QUEUED = _register(Gauge(
+    "easymeal_admission_queued",
+    "Requests waiting for an admission slot, by endpoint",
+    ("endpoint",),
+))
+ADMISSION_WAIT_DURATION = _register(Histogram(
+    "easymeal_admission_wait_seconds",
+    "Time requests waited for an admission slot, by endpoint",
+    ("endpoint",),
+))
+ADMISSION_REJECTED = _register(Counter(
+    "easymeal_admission_rejected_total",
+    "Requests turned away with 503, by endpoint and reason (queue_full, timeout)",
+    ("endpoint", "reason"),
+))
+
+# Storage
+STORAGE_DURATION = _register(Histogram(
+    "easymeal_storage_request_duration_seconds",
+    "Photo storage call latency by operation",
+    ("operation", "backend", "outcome"),
+))
+
+# Photos
+PHOTO_RESPONSES = _register(Counter(
+    "easymeal_photo_responses_total",
+    "Photo responses by delivery (file, storage, redirect, accel, not_modified)",
+    ("delivery",),
+))
+PHOTO_CACHE_LOOKUPS = _register(Counter(
+    "easymeal_photo_cache_lookups_total",
+    "Remote photo cache lookups since start, by result (memory_hit, disk_hit, miss)",
+    ("result",),
+))
+PHOTO_CACHE_HIT_RATIO = _register(Gauge(
+    "easymeal_photo_cache_hit_ratio",
+    "Fraction of remote photo cache lookups served from memory or disk",
+))
+PHOTO_CACHE_BYTES = _register(Gauge(
+    "easymeal_photo_cache_bytes",
+    "Bytes held by the remote photo cache, by tier",
+    ("tier",),
+))
+
+# Access log
+ACCESS_LOG_DROPPED = _register(Counter(
+    "easymeal_access_log_dropped_total",
+    "Access log records dropped because the log writer fell behind",
+))
+
+
+def _collect_access_log():
+    ACCESS_LOG_DROPPED.set_total(get_dropped_access_logs())
+
+
+register_collector(_collect_access_log)
+
+
+@contextmanager
+def time_storage(operation: str, backend: str):
+    """Observe a storage call; the outcome label is "error" if the block raises"""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        STORAGE_DURATION.observe(time.perf_counter() - start, operation=operation, backend=backend, outcome=outcome)
+
+
+# Per-request SQL statistics: [statement count, seconds]. The middleware sets a fresh
+# list for each request; the list is mutated in place, so statements executed in
+# threadpool workers (which run in a copy of the request's context) are counted too.
+_request_db_stats: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("request_db_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Time every SQL statement run on the engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        DB_QUERY_DURATION.observe(elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+class MetricsMiddleware:
+    """
+    Records latency by route template, in-flight requests and SQL statements per request.
+    Pure ASGI; the route label is the matched template ("/api/meals/{meal_id}") so
+    label cardinality stays bounded, and "unmatched" for requests no route handled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        db_stats = [0, 0.0]
+        token = _request_db_stats.set(db_stats)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            _request_db_stats.reset(token)
+            route = get_route_template(scope) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start_time,
+                method=scope["method"], route=route, status=str(status_code),
+            )
+            DB_QUERIES_PER_REQUEST.observe(db_stats[0], route=route)
+            DB_TIME_PER_REQUEST.observe(db_stats[1], route=route)
@@ -0,0 +1,85 @@
+"""
+Database migrations and one-time setup, run once per deploy before the workers start.
+Run with: python -m app.migrate [--check]
+Upgrades the database to the latest Alembic revision, creates missing tables, and
+makes sure the Supabase Storage bucket exists. With --check, only reports whether
+the database is at the latest revision (exit status 1 if not).
+Workers started with STARTUP_MIGRATIONS=check then only verify the revision.
+"""
+import argparse
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+ALEMBIC_CONFIG = "alembic.ini"
+
+
+def alembic_config() -> Config:
+    return Config(ALEMBIC_CONFIG)
+
+
+def head_revisions() -> set:
+    """Latest revisions of the migration scripts (read from disk, no database access)"""
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+
+def current_revisions(engine) -> set:
+    """Revisions the database is at (one query; empty before the first migration)"""
+    try:
+        with engine.connect() as connection:
+            return {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+    except SQLAlchemyError:
+        return set()
+
+
+def check_database_revision(engine) -> None:
+    """
+    Raises:
+        RuntimeError: if the database is not at the latest revision
+    """
+    current = current_revisions(engine)
+    heads = head_revisions()
+    if current != heads:
+        raise RuntimeError(
+            f"Database is at revision {', '.join(sorted(current)) or 'none'}, "
+            f"expected {', '.join(sorted(heads))}. Run `python -m app.migrate` first."
+        )
+
+
+def upgrade_database() -> None:
+    """Apply pending migrations, then create any missing table (the initial migration is empty)"""
+    from app.database import init_db
+    command.upgrade(alembic_config(), "head")
+    init_db()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--check", action="store_true", help="Only check that the database is at the latest revision")
+    args = parser.parse_args()
+
+    from app.database import engine
+
+    if args.check:
+        try:
+            check_database_revision(engine)
+        except RuntimeError as e:
+            print(e)
+            return 1
+        print("Database is at the latest revision")
+        return 0
+
+    upgrade_database()
+    print("Database migrations completed successfully")
+
+    from app.storage import ensure_bucket_exists
+    ensure_bucket_exists()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
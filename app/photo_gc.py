@@ -0,0 +1,107 @@
+"""
+Garbage collection of orphaned photos.
+Photos are stored when uploaded, before any meal references them, so abandoned
+forms, replaced photos and failed creates leave objects behind. The collector lists
+storage page by page, looks each object up in the set of filenames referenced by
+meals, and deletes unreferenced objects older than a grace period in batches.
+"""
+import asyncio
+import time
+from typing import Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.config import PHOTO_GC_GRACE_SECONDS, PHOTO_GC_INTERVAL_SECONDS
+from app.database import SessionLocal, Meal
+from app.storage import list_photos, delete_photos, DELETE_BATCH_SIZE
+
+
+def referenced_photo_filenames(db: Session) -> Set[str]:
+    """Filenames referenced by any meal (photo_filename or an entry of photos)."""
+    referenced = set()
+    for photo_filename, photos in db.query(Meal.photo_filename, Meal.photos):
+        if photo_filename:
+            referenced.add(photo_filename)
+        if photos and isinstance(photos, list):
+            for photo in photos:
+                if isinstance(photo, dict) and photo.get("filename"):
+                    referenced.add(photo["filename"])
+    return referenced
+
+
+def _load_referenced() -> Set[str]:
+    db = SessionLocal()
+    try:
+        return referenced_photo_filenames(db)
+    finally:
+        db.close()
+
+
+def collect_orphaned_photos(
+    grace_seconds: int = PHOTO_GC_GRACE_SECONDS,
+    dry_run: bool = False,
+    batch_size: int = DELETE_BATCH_SIZE,
+    page_size: int = 1000,
+    now: Optional[float] = None,
+) -> dict:
+    """
+    Find (and unless dry_run, delete) stored photos that no meal references.
+    
+    Args:
+        grace_seconds: Keep unreferenced photos younger than this
+        dry_run: Only report what would be deleted
+        batch_size: Photos per delete request
+        page_size: Objects per storage listing page
+        now: Reference time (defaults to the current time)
+    
+    Returns:
+        Report with counts and the orphan filenames
+    """
+    now = time.time() if now is None else now
+    cutoff = now - grace_seconds
+    referenced = _load_referenced()
+    
+    scanned = 0
+    recent = 0
+    orphans = []
+    for filename, created_at in list_photos(page_size=page_size):
+        scanned += 1
+        if filename in referenced:
+            continue
+        # Unknown age is treated as recent: never delete what we cannot date
+        if created_at is None or created_at > cutoff:
+            recent += 1
+            continue
+        orphans.append(filename)
+    
+    deleted = 0
+    if orphans and not dry_run:
+        # A meal saved during the scan may reference an old upload: re-check before deleting
+        referenced = _load_referenced()
+        orphans = [filename for filename in orphans if filename not in referenced]
+        for i in range(0, len(orphans), batch_size):
+            deleted += len(delete_photos(orphans[i:i + batch_size]))
+    
+    return {
+        "dry_run": dry_run,
+        "scanned": scanned,
+        "referenced": len(referenced),
+        "kept_recent": recent,
+        "orphans": len(orphans),
+        "deleted": deleted,
+        "orphan_filenames": orphans,
+    }
+
+
+async def run_periodic_photo_gc(interval_seconds: int = PHOTO_GC_INTERVAL_SECONDS):
+    """Run the collector every interval_seconds (started on app startup when enabled)."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            report = await asyncio.to_thread(collect_orphaned_photos)
+            print(
+                f"Photo GC: scanned {report['scanned']}, deleted {report['deleted']} orphans, "
+                f"kept {report['kept_recent']} recent"
+            )
+        except Exception as e:
+            print(f"Warning: photo GC failed: {e}")
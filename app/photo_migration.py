@@ -0,0 +1,180 @@
+"""
+Bulk migration of photos from a local directory to photo storage.
+Files keep their names (meals reference photos by filename) and are uploaded by
+a pool of workers, each reusing its own HTTP connection. Every finished file is
+appended to a JSON-lines manifest, so an interrupted run resumes where it stopped.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Union
+
+import requests
+
+from app.storage import (
+    PHOTO_CONTENT_TYPES,
+    ensure_bucket_exists,
+    optimize_image,
+    put_photo_object,
+)
+
+
+DEFAULT_MANIFEST_PATH = "data/photo_migration_manifest.jsonl"
+
+# Statuses that mean the photo is in storage and need not be sent again
+COMPLETED_STATUSES = ("uploaded", "exists")
+
+
+class MigrationManifest:
+    """
+    Append-only record of migrated files (one JSON object per line, last one wins).
+    A file counts as migrated only if its size and mtime still match the record.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.records = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.records[record["filename"]] = record
+                    except (ValueError, KeyError):
+                        # A torn last line from an interrupted run
+                        continue
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def is_completed(self, filename: str, size: int, mtime: float) -> bool:
+        record = self.records.get(filename)
+        return (
+            record is not None
+            and record.get("status") in COMPLETED_STATUSES
+            and record.get("size") == size
+            and record.get("mtime") == mtime
+        )
+
+    def record(self, filename: str, status: str, size: int, mtime: float, error: Optional[str] = None):
+        record = {"filename": filename, "status": status, "size": size, "mtime": mtime}
+        if error:
+            record["error"] = error
+        with self._lock:
+            self.records[filename] = record
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+_thread_local = threading.local()
+
+
+def _get_session() -> requests.Session:
+    """One HTTP session (connection pool) per worker thread"""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+
+def _migrate_file(path: Path, optimize: bool, upsert: bool):
+    """Upload one file under its own name; returns (status, bytes sent)"""
+    content = path.read_bytes()
+    if optimize and path.suffix.lower() in (".jpg", ".jpeg"):
+        # Only JPEGs: optimized output is always JPEG, and the filename must not change
+        content = optimize_image(content)
+    stored = put_photo_object(path.name, content, upsert=upsert, session=_get_session())
+    return ("uploaded" if stored else "exists"), len(content)
+
+
+def migrate_photos(
+    photos_dir: Union[str, Path],
+    workers: int = 8,
+    manifest_path: Union[str, Path] = DEFAULT_MANIFEST_PATH,
+    optimize: bool = False,
+    upsert: bool = False,
+    progress_every: int = 500,
+) -> dict:
+    """
+    Upload every photo in photos_dir to storage under its existing filename.
+    
+    Args:
+        photos_dir: Directory holding the photos
+        workers: Concurrent uploads
+        manifest_path: JSON-lines progress file; files recorded there are skipped
+        optimize: Re-optimize JPEGs before upload (photos uploaded through the app
+            already are, so this is off by default)
+        upsert: Overwrite objects that already exist in storage
+        progress_every: Print progress after this many files
+    
+    Returns:
+        Report with counts, bytes and throughput
+    """
+    photos_dir = Path(photos_dir)
+    report = {
+        "total": 0, "skipped": 0, "uploaded": 0, "exists": 0, "failed": 0,
+        "bytes": 0, "seconds": 0.0, "files_per_sec": 0.0, "mb_per_sec": 0.0,
+    }
+    if not photos_dir.exists():
+        print(f"Photos directory {photos_dir} does not exist")
+        return report
+    
+    ensure_bucket_exists()
+    manifest = MigrationManifest(manifest_path)
+    
+    pending = []
+    with os.scandir(photos_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or Path(entry.name).suffix.lower() not in PHOTO_CONTENT_TYPES:
+                continue
+            report["total"] += 1
+            stat = entry.stat()
+            if manifest.is_completed(entry.name, stat.st_size, stat.st_mtime):
+                report["skipped"] += 1
+                continue
+            pending.append((Path(entry.path), stat.st_size, stat.st_mtime))
+    print(f"{report['total']} photos found, {report['skipped']} already migrated, {len(pending)} to go")
+    
+    start = time.perf_counter()
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="photo-migrate") as pool:
+            futures = {
+                pool.submit(_migrate_file, path, optimize, upsert): (path, size, mtime)
+                for path, size, mtime in pending
+            }
+            for future in as_completed(futures):
+                path, size, mtime = futures[future]
+                try:
+                    status, sent = future.result()
+                    report[status] += 1
+                    report["bytes"] += sent
+                    manifest.record(path.name, status, size, mtime)
+                except Exception as e:
+                    report["failed"] += 1
+                    manifest.record(path.name, "failed", size, mtime, error=str(e))
+                    print(f"Error migrating photo {path.name}: {e}")
+                done += 1
+                if progress_every and done % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"  {done}/{len(pending)} ({done / elapsed:.1f} files/s)")
+    finally:
+        manifest.close()
+        elapsed = time.perf_counter() - start
+        report["seconds"] = round(elapsed, 2)
+        if elapsed > 0:
+            report["files_per_sec"] = round(done / elapsed, 1)
+            report["mb_per_sec"] = round(report["bytes"] / (1024 * 1024) / elapsed, 2)
+    
+    print(
+        f"Migrated {report['uploaded']} photos ({report['exists']} already in storage, "
+        f"{report['skipped']} skipped, {report['failed']} failed) in {report['seconds']}s: "
+        f"{report['files_per_sec']} files/s, {report['mb_per_sec']} MB/s"
+    )
+    return report
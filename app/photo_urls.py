@@ -0,0 +1,73 @@
+"""
+Stateless signed photo URLs.
+A signed URL carries an expiry timestamp and an HMAC-SHA256 over the filename and
+expiry, keyed by PHOTO_URL_SECRET (or a key derived from the JWT secret). serve_photo verifies it with a constant-time
+comparison instead of authenticating the request and querying the database.
+"""
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Optional
+from urllib.parse import quote
+
+from app.config import PHOTO_URL_SECRET, PHOTO_URL_TTL_SECONDS, SUPABASE_JWT_SECRET
+
+# Label of the key derived from the JWT secret, so the session signing key is not
+# also used for photo URLs
+PHOTO_URL_KEY_LABEL = b"photo-url"
+
+
+def _signing_key() -> bytes:
+    if PHOTO_URL_SECRET:
+        return PHOTO_URL_SECRET.encode("utf-8")
+    if SUPABASE_JWT_SECRET:
+        return hmac.new(SUPABASE_JWT_SECRET.encode("utf-8"), PHOTO_URL_KEY_LABEL, hashlib.sha256).digest()
+    return secrets.token_bytes(32)
+
+
+# True when every process signs with the same key (a configured or derived one)
+SHARED_SIGNING_KEY = bool(PHOTO_URL_SECRET or SUPABASE_JWT_SECRET)
+_secret = _signing_key()
+
+
+def photo_url_expiry(now: Optional[float] = None) -> int:
+    """Expiry for URLs issued now: the end of the next TTL window (valid for 1-2 TTLs)."""
+    now = int(time.time() if now is None else now)
+    return (now // PHOTO_URL_TTL_SECONDS + 2) * PHOTO_URL_TTL_SECONDS
+
+
+def sign_photo(filename: str, expires: int) -> str:
+    """HMAC signature of a filename and expiry (URL-safe base64, no padding)."""
+    digest = hmac.new(_secret, f"{filename}:{expires}".encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+# Expiries only move once per TTL window, so a photo's URL is reused (not re-signed)
+# across responses until then: filename -> (expires, url)
+_signed_url_cache: dict = {}
+_SIGNED_URL_CACHE_MAX_ENTRIES = 100000
+
+
+def signed_photo_url(filename: str, expires: Optional[int] = None) -> str:
+    """Relative URL of a photo (like the frontend builds it) with expiry and signature."""
+    if expires is None:
+        expires = photo_url_expiry()
+    cached = _signed_url_cache.get(filename)
+    if cached is not None and cached[0] == expires:
+        return cached[1]
+    url = f"static/photos/{quote(filename)}?exp={expires}&sig={sign_photo(filename, expires)}"
+    if len(_signed_url_cache) >= _SIGNED_URL_CACHE_MAX_ENTRIES:
+        _signed_url_cache.clear()
+    _signed_url_cache[filename] = (expires, url)
+    return url
+
+
+def verify_photo_signature(filename: str, expires: Optional[str], signature: Optional[str]) -> bool:
+    """True if the signature matches the filename and expiry and has not expired."""
+    if not expires or not signature or not expires.isdigit():
+        return False
+    if int(expires) < time.time():
+        return False
+    return hmac.compare_digest(sign_photo(filename, int(expires)), signature)
@@ -0,0 +1,267 @@
+"""
+On-demand profiling, off unless PROFILING_TOKEN is set (the middleware and the
+/api/debug routes are then not installed at all).
+ProfilingMiddleware runs a single request under cProfile when it carries the token
+(X-Profiling-Token) and asks for it (X-Profile: 1 or ?profile=1); reports are kept
+in memory and served by /api/debug/profiles. tracemalloc snapshots are taken and
+diffed through /api/debug/memory to track memory growth (OCR reader, image buffers).
+"""
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import PROFILING_REPORTS_KEPT
+
+PROFILING_TOKEN_HEADER = "x-profiling-token"
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+PROFILE_SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+# Frames recorded per allocation once tracemalloc is started (more = slower, more memory)
+TRACEMALLOC_FRAMES = 10
+MEMORY_SNAPSHOTS_KEPT = 10
+MEMORY_DIFF_GROUPINGS = ("lineno", "filename", "traceback")
+
+# Allocations made by tracemalloc and the import system are noise in snapshots
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def token_matches(token: Optional[str], expected: Optional[str]) -> bool:
+    """Constant-time comparison; False when either side is missing"""
+    if not token or not expected:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+class ProfileReport(NamedTuple):
+    id: int
+    method: str
+    path: str
+    status: Optional[int]
+    duration: float  # seconds
+    created: float  # Unix time
+    stats: pstats.Stats
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 1),
+            "created": self.created,
+            "total_calls": self.stats.total_calls,
+        }
+
+    def render(self, sort: str = "cumulative", limit: int = 50) -> str:
+        """pstats text report: the top functions by the sort key"""
+        stream = io.StringIO()
+        # A fresh Stats per render: sorting mutates it
+        stats = pstats.Stats(stream=stream)
+        stats.add(self.stats)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def dump(self) -> bytes:
+        """The report in the .prof format of pstats.Stats.dump_stats (snakeviz, pstats)"""
+        return marshal.dumps(self.stats.stats)
+
+
+class ProfileStore:
+    """The most recent profile reports (bounded)"""
+
+    def __init__(self, max_reports: int):
+        self.max_reports = max_reports
+        self._reports: "OrderedDict[int, ProfileReport]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def add(self, report: ProfileReport) -> None:
+        with self._lock:
+            self._reports[report.id] = report
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def get(self, report_id: int) -> Optional[ProfileReport]:
+        return self._reports.get(report_id)
+
+    def list(self) -> List[ProfileReport]:
+        with self._lock:
+            return list(reversed(self._reports.values()))
+
+
+profile_reports = ProfileStore(PROFILING_REPORTS_KEPT)
+
+
+class ProfilingMiddleware:
+    """
+    Runs requests that ask for it, with the profiling token, under cProfile.
+    Pure ASGI. The response carries X-Profile-Id with the report id.
+    One request is profiled at a time per worker (others run unprofiled). cProfile
+    sees everything on the event loop thread while it runs, so profile on a quiet
+    worker; work handed to threads (image processing, OCR) shows up as the await.
+    """
+
+    def __init__(self, app: ASGIApp, token: str, store: ProfileStore = profile_reports):
+        self.app = app
+        self.token = token
+        self.store = store
+        self._active = False
+
+    def _requested(self, scope: Scope) -> bool:
+        token = None
+        flag = None
+        for name, value in scope["headers"]:
+            if name == b"x-profiling-token":
+                token = value.decode("latin-1")
+            elif name == b"x-profile":
+                flag = value.decode("latin-1")
+        if token is None:
+            return False
+        if flag is None:
+            query = scope.get("query_string", b"").decode("latin-1")
+            flag = dict(parse_qsl(query)).get(PROFILE_QUERY_PARAM) if query else None
+        return flag in ("1", "true", "yes") and token_matches(token, self.token)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._active or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        report_id = self.store.next_id()
+        status_code = None
+
+        async def send_with_profile_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(raw=list(message["headers"]))
+                headers[PROFILE_ID_HEADER] = str(report_id)
+                message["headers"] = headers.raw
+            await send(message)
+
+        profiler = cProfile.Profile()
+        self._active = True
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            self._active = False
+            self.store.add(ProfileReport(
+                id=report_id,
+                method=scope["method"],
+                path=scope["path"],
+                status=status_code,
+                duration=duration,
+                created=time.time(),
+                stats=pstats.Stats(profiler),
+            ))
+
+
+class MemorySnapshots:
+    """tracemalloc snapshots by id; tracing starts with the first snapshot"""
+
+    def __init__(self, max_snapshots: int = MEMORY_SNAPSHOTS_KEPT):
+        self.max_snapshots = max_snapshots
+        self._snapshots: "OrderedDict[int, tuple]" = OrderedDict()  # id -> (created, snapshot)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def take(self) -> dict:
+        """
+        Take a snapshot (blocking: run it in a thread). The first call starts tracing,
+        so only allocations made after it are seen.
+        """
+        with self._lock:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            snapshot_id = next(self._ids)
+            self._snapshots[snapshot_id] = (time.time(), snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "id": snapshot_id,
+            "tracing_started": started,
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+            "top": [_stat_entry(stat) for stat in snapshot.statistics("lineno")[:10]],
+        }
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"id": snapshot_id, "created": created, "traced_bytes": sum(t.size for t in snapshot.traces)}
+                for snapshot_id, (created, snapshot) in self._snapshots.items()
+            ]
+
+    def diff(self, snapshot_id: int, base_id: Optional[int] = None,
+             group_by: str = "lineno", limit: int = 30) -> Optional[dict]:
+        """
+        Biggest changes from base_id (default: the snapshot before) to snapshot_id,
+        or None when a snapshot is unknown.
+        """
+        with self._lock:
+            if base_id is None:
+                earlier = [i for i in self._snapshots if i < snapshot_id]
+                base_id = earlier[-1] if earlier else None
+            if snapshot_id not in self._snapshots or base_id not in self._snapshots:
+                return None
+            snapshot = self._snapshots[snapshot_id][1]
+            base = self._snapshots[base_id][1]
+        differences = snapshot.compare_to(base, group_by)
+        return {
+            "id": snapshot_id,
+            "base": base_id,
+            "group_by": group_by,
+            "size_diff": sum(stat.size_diff for stat in differences),
+            "differences": [_stat_entry(stat) for stat in differences[:limit]],
+        }
+
+    def stop(self) -> None:
+        """Stop tracing and drop the snapshots (tracing slows allocations down)"""
+        with self._lock:
+            self._snapshots.clear()
+            tracemalloc.stop()
+
+
+def _stat_entry(stat) -> dict:
+    entry = {
+        "traceback": [str(frame) for frame in stat.traceback],
+        "size": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+memory_snapshots = MemorySnapshots()
@@ -1,18 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from typing import List
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
+from typing import BinaryIO, List
 from sqlalchemy.orm import Session
 from pathlib import Path
-from io import BytesIO
+import threading
 import easyocr
 from PIL import Image
 import numpy as np
 
 from app.database import get_db, Meal
+from app import metrics
 from app.auth import get_current_user
-from app.storage import upload_photo, delete_photo, get_photo_url
+from app.admission import admission_control, ocr_admission, upload_admission
+from app.storage import upload_photo_async, attach_photo_placeholders, delete_photos, get_photo_url, run_image_task
 from app import schemas
+from app.descriptions import description_fields
 from app.error_handler import create_safe_http_exception
-from app.file_validation import validate_image_file, get_safe_image_extension
+from app.uploads import receive_image_upload, IMAGE_UPLOAD_OPENAPI
 
 router = APIRouter(prefix="/api/meals", tags=["meals"])
 
@@ -22,27 +26,64 @@ MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
 
 # Initialize EasyOCR reader (load models once at startup)
 ocr_reader = None
+_ocr_reader_lock = threading.Lock()
 
 def get_ocr_reader():
-    """Get or initialize EasyOCR reader"""
+    """Get or initialize EasyOCR reader (thread-safe: called from image worker threads)"""
     global ocr_reader
     if ocr_reader is None:
-        print("Initializing EasyOCR reader (this may take a moment on first use)...")
-        # Initialize with English and French support (can add more languages)
-        ocr_reader = easyocr.Reader(['en', 'fr'], gpu=False)
-        print("EasyOCR reader initialized")
+        with _ocr_reader_lock:
+            if ocr_reader is None:
+                print("Initializing EasyOCR reader (this may take a moment on first use)...")
+                # Initialize with English and French support (can add more languages)
+                ocr_reader = easyocr.Reader(['en', 'fr'], gpu=False)
+                print("EasyOCR reader initialized")
     return ocr_reader
 
 
+def extract_text(image_file: BinaryIO) -> str:
+    """Run OCR on an image file (blocking; run it via run_image_task)"""
+    reader = get_ocr_reader()
+    
+    # EasyOCR works with numpy arrays, so we'll use PIL to convert
+    image_file.seek(0)
+    image = Image.open(image_file)
+    image_array = np.array(image)
+    
+    # Extract text using EasyOCR
+    with metrics.OCR_INFERENCE_DURATION.time():
+        results = reader.readtext(image_array)
+    
+    # Combine all detected text and clean up extra whitespace
+    return "\n".join([result[1] for result in results]).strip()
+
+
+# Columns of a meal response, loaded as plain row tuples (no ORM identity map or instances)
+MEAL_RESPONSE_COLUMNS = (
+    Meal.id,
+    Meal.name,
+    Meal.description,
+    Meal.url,
+    Meal.photo_filename,
+    Meal.photos,
+    Meal.created_at,
+    Meal.description_excerpt,
+)
+
+
 @router.get("/", response_model=List[schemas.MealResponse])
 @router.get("", response_model=List[schemas.MealResponse])  # Also handle without trailing slash
 async def get_meals(
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all meals"""
-    meals = db.query(Meal).order_by(Meal.created_at.desc()).all()
-    return meals
+    """
+    Get all meals.
+    Rows are serialized with orjson straight from column tuples; response_model only
+    documents the schema (a returned Response skips per-object Pydantic validation).
+    """
+    rows = db.query(*MEAL_RESPONSE_COLUMNS).order_by(Meal.created_at.desc()).all()
+    return ORJSONResponse([schemas.meal_response_data(row) for row in rows])
 
 
 @router.get("/{meal_id}", response_model=schemas.MealResponse)
@@ -72,7 +113,8 @@ async def create_meal(
             description=meal.description,
             url=meal.url,
             photo_filename=meal.photo_filename,
-            photos=meal.photos,
+            photos=await attach_photo_placeholders(meal.photos),
+            **description_fields(meal.description),
         )
         
         db.add(new_meal)
@@ -95,6 +137,7 @@ async def create_meal(
 async def update_meal(
     meal_id: int,
     meal: schemas.MealUpdate,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -107,9 +150,10 @@ async def update_meal(
         
         old_photo_filename = db_meal.photo_filename
         
-        # Handle photo removal (empty string means remove)
+        # Handle photo removal (empty string means remove); the file is deleted after commit
+        photos_to_delete = []
         if meal.photo_filename == "" and old_photo_filename:
-            delete_photo(old_photo_filename)
+            photos_to_delete.append(old_photo_filename)
             db_meal.photo_filename = None
         
         # Update fields
@@ -117,16 +161,27 @@ async def update_meal(
             db_meal.name = meal.name
         if meal.description is not None:
             db_meal.description = meal.description
+            for field, value in description_fields(meal.description).items():
+                setattr(db_meal, field, value)
         if meal.url is not None:
             db_meal.url = meal.url
         if meal.photo_filename is not None and meal.photo_filename != old_photo_filename:
             db_meal.photo_filename = meal.photo_filename
         if meal.photos is not None:
-            db_meal.photos = meal.photos
+            # Photos the meal already has keep their stored placeholders
+            stored_placeholders = {
+                p["filename"]: p.get("placeholder")
+                for p in db_meal.photos or []
+                if isinstance(p, dict) and p.get("filename")
+            }
+            db_meal.photos = await attach_photo_placeholders(meal.photos, stored_placeholders)
         
         db.commit()
         db.refresh(db_meal)
         
+        if photos_to_delete:
+            background_tasks.add_task(delete_photos, photos_to_delete)
+        
         return db_meal
     except HTTPException:
         # Re-raise HTTP exceptions as-is
@@ -142,51 +197,23 @@ async def update_meal(
         )
 
 
-@router.post("/upload-photo")
+@router.post("/upload-photo", openapi_extra=IMAGE_UPLOAD_OPENAPI)
 async def upload_photo_endpoint(
-    file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    _admission: None = Depends(admission_control(upload_admission)),
 ):
     """Upload a photo for a meal"""
     try:
-        # Check file size first (before reading full content)
-        # Note: FastAPI reads the file, so we validate after reading
-        
-        # Read file content
-        file_content = await file.read()
-        
-        # Validate file size
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=413, 
-                detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB"
-            )
-        
-        # Validate file is actually an image using magic bytes
-        try:
-            is_valid, detected_mime, detected_ext = validate_image_file(
-                file_content,
-                content_type=file.content_type,
-                filename=file.filename
-            )
-            if not is_valid:
-                raise ValueError("File is not a valid image")
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        except Exception as e:
-            raise create_safe_http_exception(
-                status_code=400,
-                generic_message="Invalid image file. Please upload a valid image.",
-                error=e
-            )
-        
-        # Use detected extension from magic bytes (most secure)
-        file_ext = detected_ext or get_safe_image_extension(file_content)
+        # Stream the body: size limit and magic bytes are checked as it arrives,
+        # and accepted content is spooled to a temp file rather than held in RAM
+        upload = await receive_image_upload(request, max_size=MAX_FILE_SIZE)
         
         # Upload to Supabase Storage
         try:
-            filename = upload_photo(file_content, file_ext)
-            return {"filename": filename}
+            # Use detected extension from magic bytes (most secure)
+            stored = await upload_photo_async(upload.file, upload.extension)
+            return {"filename": stored.filename, "placeholder": stored.placeholder}
         except Exception as e:
             print(f"Error uploading photo to Supabase: {e}")
             raise create_safe_http_exception(
@@ -194,6 +221,8 @@ async def upload_photo_endpoint(
                 generic_message="Failed to upload photo. Please try again.",
                 error=e
             )
+        finally:
+            upload.close()
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
@@ -207,66 +236,27 @@ async def upload_photo_endpoint(
         )
 
 
-@router.post("/extract-text-from-photo")
+@router.post("/extract-text-from-photo", openapi_extra=IMAGE_UPLOAD_OPENAPI)
 async def extract_text_from_photo(
-    file: UploadFile = File(...),
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    _admission: None = Depends(admission_control(ocr_admission)),
 ):
     """Extract text from a photo using OCR and upload the photo"""
-    # Read file content
-    file_content = await file.read()
-    
-    # Validate file size
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413, 
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB"
-        )
+    # Stream and validate the upload (size limit + magic bytes) as it arrives
+    upload = await receive_image_upload(request, max_size=MAX_FILE_SIZE)
     
-    # Validate file is actually an image using magic bytes
-    detected_ext = None
     try:
-        is_valid, detected_mime, detected_ext = validate_image_file(
-            file_content,
-            content_type=file.content_type,
-            filename=file.filename
-        )
-        if not is_valid:
-            raise ValueError("File is not a valid image")
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise create_safe_http_exception(
-            status_code=400,
-            generic_message="Invalid image file. Please upload a valid image.",
-            error=e
-        )
-    
-    try:
-        # Get OCR reader
-        reader = get_ocr_reader()
-        
-        # Read image with EasyOCR
-        # EasyOCR works with numpy arrays, so we'll use PIL to convert
-        image = Image.open(BytesIO(file_content))
-        image_array = np.array(image)
-        
-        # Extract text using EasyOCR
-        results = reader.readtext(image_array)
-        
-        # Combine all detected text
-        extracted_text = "\n".join([result[1] for result in results])
-        
-        # Clean up the text (remove extra whitespace)
-        extracted_text = extracted_text.strip()
+        # Run OCR in the bounded image pool so it does not block the event loop
+        extracted_text = await run_image_task(extract_text, upload.file)
         
         # Upload photo to Supabase Storage
         # Use detected extension from magic bytes validation (most secure)
-        file_ext = detected_ext or get_safe_image_extension(file_content)
-        filename = upload_photo(file_content, file_ext)
+        stored = await upload_photo_async(upload.file, upload.extension)
         
         return {
-            "filename": filename,
+            "filename": stored.filename,
+            "placeholder": stored.placeholder,
             "extracted_text": extracted_text
         }
     except Exception as e:
@@ -275,11 +265,14 @@ async def extract_text_from_photo(
             generic_message="Failed to process photo. Please try again.",
             error=e
         )
+    finally:
+        upload.close()
 
 
 @router.delete("/{meal_id}", status_code=204)
 async def delete_meal(
     meal_id: int,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -303,18 +296,15 @@ async def delete_meal(
                 if isinstance(photo, dict) and photo.get("filename"):
                     photos_to_delete.append(photo["filename"])
         
-        # Delete all photos (delete_photo doesn't raise on error)
-        for filename in photos_to_delete:
-            try:
-                delete_photo(filename)
-            except Exception as e:
-                # Log but continue - don't fail meal deletion if photo delete fails
-                print(f"Warning: Failed to delete photo {filename}: {e}")
-        
         # Delete meal from database
         db.delete(meal)
         db.commit()
         
+        # Remove the photos from storage after the response is sent, in one batch
+        # (delete_photos logs and continues on storage errors)
+        if photos_to_delete:
+            background_tasks.add_task(delete_photos, photos_to_delete)
+        
         return None
     except HTTPException:
         # Re-raise HTTP exceptions as-is
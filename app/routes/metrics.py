@@ -0,0 +1,19 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+import hmac
+
+from app import metrics
+from app.config import METRICS_TOKEN
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus scrape endpoint (text exposition format); only mounted when METRICS_TOKEN is set"""
+    auth_header = request.headers.get("Authorization") or ""
+    token = auth_header[7:] if auth_header.lower().startswith("bearer ") else ""
+    if not METRICS_TOKEN or not hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    # Content-Type set as a header: media_type would get a second charset appended
+    return Response(content=metrics.render_metrics(), headers={"Content-Type": metrics.CONTENT_TYPE})
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response
+from typing import Optional
+import asyncio
+
+from app.config import PROFILING_TOKEN
+from app.profiling import (
+    MEMORY_DIFF_GROUPINGS,
+    PROFILE_SORT_KEYS,
+    PROFILING_TOKEN_HEADER,
+    memory_snapshots,
+    profile_reports,
+    token_matches,
+)
+
+
+def require_profiling_token(request: Request):
+    """Every debug endpoint requires the X-Profiling-Token header"""
+    if not token_matches(request.headers.get(PROFILING_TOKEN_HEADER), PROFILING_TOKEN):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+
+# Only included when PROFILING_TOKEN is set (see app.main)
+router = APIRouter(
+    prefix="/api/debug",
+    tags=["debug"],
+    include_in_schema=False,
+    dependencies=[Depends(require_profiling_token)],
+)
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """Profiled requests, most recent first"""
+    return [report.summary() for report in profile_reports.list()]
+
+
+@router.get("/profiles/{report_id}")
+async def get_profile(
+    report_id: int,
+    sort: str = Query("cumulative"),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Text report of a profiled request (pstats)"""
+    if sort not in PROFILE_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(PROFILE_SORT_KEYS)}")
+    report = profile_reports.get(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(report.render(sort, limit))
+
+
+@router.get("/profiles/{report_id}/pstats")
+async def download_profile(report_id: int):
+    """Raw profile (.prof) for snakeviz or python -m pstats"""
+    report = profile_reports.get(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(
+        content=report.dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="profile-{report_id}.prof"'},
+    )
+
+
+@router.post("/memory/snapshots")
+async def take_memory_snapshot():
+    """Take a tracemalloc snapshot (the first one starts tracing)"""
+    return await asyncio.to_thread(memory_snapshots.take)
+
+
+@router.get("/memory/snapshots")
+async def list_memory_snapshots():
+    return memory_snapshots.list()
+
+
+@router.get("/memory/snapshots/{snapshot_id}/diff")
+async def diff_memory_snapshots(
+    snapshot_id: int,
+    base: Optional[int] = Query(None, description="Snapshot to compare with (default: the previous one)"),
+    group_by: str = Query("lineno"),
+    limit: int = Query(30, ge=1, le=500),
+):
+    """Biggest allocation changes between two snapshots"""
+    if group_by not in MEMORY_DIFF_GROUPINGS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of: {', '.join(MEMORY_DIFF_GROUPINGS)}")
+    diff = await asyncio.to_thread(memory_snapshots.diff, snapshot_id, base, group_by, limit)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return diff
+
+
+@router.delete("/memory")
+async def stop_memory_tracing():
+    """Stop tracemalloc and drop all snapshots"""
+    await asyncio.to_thread(memory_snapshots.stop)
+    return {"tracing": False}
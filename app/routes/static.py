@@ -1,34 +1,98 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, Query
-from fastapi.responses import FileResponse, Response, StreamingResponse
+from fastapi import APIRouter, HTTPException, Request, Query
+from fastapi.responses import RedirectResponse, Response
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
+import time
 
-from app.storage import get_photo_object
-from app.database import get_db, Meal
-from app.auth import get_current_user, _get_token_from_request
-from app.config import DISABLE_AUTH
+from app.storage import get_photo_bytes, get_local_photo_path, create_signed_photo_url, photo_content_type
+from app.file_responses import build_file_response
+from app.photo_urls import verify_photo_signature
+from app.database import SessionLocal, Meal
+from app import metrics
+from app.auth import get_current_user, get_access_token_from_request
+from app.config import (
+    DISABLE_AUTH,
+    PHOTO_DELIVERY_MODE,
+    PHOTO_SIGNED_URL_TTL_SECONDS,
+    PHOTO_ACCEL_PREFIX,
+)
 
 # Use a specific prefix to avoid conflicts with StaticFiles mount
 router = APIRouter(prefix="/static/photos", tags=["static"])
 
-# Note: Static files are served via app.mount("/static", ...) in main.py
-# This router only handles photos from Supabase Storage at /static/photos/{filename}
-# Regular static files are served by StaticFiles mount
+# Photo filenames are random uuids and their bytes never change, so responses can be
+# cached for a year without revalidation, and the filename itself is a strong validator
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Responses to token-authenticated (unsigned) requests must not be stored by shared caches
+PRIVATE_PHOTO_CACHE_CONTROL = "private, max-age=31536000, immutable"
+PHOTO_CACHE_MAX_AGE = 31536000
 
 
-@router.get("/{filename}")
+def signed_photo_cache_control(expires: str) -> str:
+    """
+    Cache-Control for a signed URL: shared caches may keep it only until the signature
+    expires (the URL then stops verifying), and not as immutable
+    """
+    max_age = min(PHOTO_CACHE_MAX_AGE, max(0, int(expires) - int(time.time())))
+    return f"public, max-age={max_age}"
+
+
+def photo_etag(filename: str) -> str:
+    """Strong ETag for a photo, derived from its immutable filename"""
+    return f'"{filename}"'
+
+
+def if_none_match_satisfied(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header matches the ETag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag == etag or tag == f"W/{etag}" for tag in candidates)
+
+
+def ensure_photo_belongs_to_meal(db: Session, filename: str):
+    """Raise 403 unless some meal references the photo (blocking: run it in a thread)"""
+    if db.query(Meal.id).filter(Meal.photo_filename == filename).first():
+        return
+    # photos is a JSON list: only that column of meals that have one is scanned
+    for (photos,) in db.query(Meal.photos).filter(Meal.photos.isnot(None)):
+        if isinstance(photos, list) and any(
+            isinstance(photo, dict) and photo.get("filename") == filename for photo in photos
+        ):
+            return
+    raise HTTPException(status_code=403, detail="Access denied: Photo not found")
+
+
+def _check_photo_belongs_to_meal(filename: str):
+    db = SessionLocal()
+    try:
+        ensure_photo_belongs_to_meal(db, filename)
+    finally:
+        db.close()
+
+
+@router.api_route("/{filename}", methods=["GET", "HEAD"])
 async def serve_photo(
     filename: str,
     request: Request,
     token: Optional[str] = Query(None, description="JWT token for authentication (for image requests)"),
-    db: Session = Depends(get_db)
+    exp: Optional[str] = Query(None, description="Signed URL expiry (unix time)"),
+    sig: Optional[str] = Query(None, description="Signed URL signature"),
 ):
     """
-    Serve photo from storage. Verifies photo belongs to a meal.
-    When DISABLE_AUTH, no token required. Otherwise requires auth.
+    Serve photo from storage.
+    Signed URLs (from meal responses) are verified by their HMAC alone, with no auth
+    or DB lookup. Unsigned legacy URLs require auth (unless DISABLE_AUTH) and are
+    checked against the meals that reference the photo.
     """
-    if not DISABLE_AUTH:
-        auth_token = _get_token_from_request(request) or token
+    signed = verify_photo_signature(filename, exp, sig)
+    
+    if not signed and not DISABLE_AUTH:
+        auth_token = get_access_token_from_request(request) or token
         if not auth_token:
             raise HTTPException(status_code=401, detail="Authentication required")
         class TokenRequest:
@@ -45,44 +109,69 @@ async def serve_photo(
             print(f"Error authenticating photo request: {e}")
             raise HTTPException(status_code=401, detail="Invalid authentication")
 
-    # Verify that the photo belongs to a meal
-    meal_by_filename = db.query(Meal).filter(Meal.photo_filename == filename).first()
-    if not meal_by_filename:
-        meals = db.query(Meal).all()
-        photo_found = False
-        for meal in meals:
-            if meal.photos and isinstance(meal.photos, list):
-                for photo in meal.photos:
-                    if isinstance(photo, dict) and photo.get("filename") == filename:
-                        photo_found = True
-                        break
-            if photo_found:
-                break
-        if not photo_found:
-            raise HTTPException(status_code=403, detail="Access denied: Photo not found")
+    # The client already has these exact bytes: answer before any DB or storage access
+    if signed:
+        cache_control = signed_photo_cache_control(exp)
+    elif DISABLE_AUTH:
+        cache_control = PHOTO_CACHE_CONTROL
+    else:
+        cache_control = PRIVATE_PHOTO_CACHE_CONTROL
+    cache_headers = {
+        "Cache-Control": cache_control,
+        "ETag": photo_etag(filename),
+    }
+    if if_none_match_satisfied(request, cache_headers["ETag"]):
+        metrics.PHOTO_RESPONSES.inc(delivery="not_modified")
+        return Response(status_code=304, headers=cache_headers)
+
+    # Verify that the photo belongs to a meal (the signature already proves it).
+    # The session is opened here rather than as a dependency so signed requests
+    # never touch the database or the threadpool that runs get_db.
+    if not signed:
+        await asyncio.to_thread(_check_photo_belongs_to_meal, filename)
+    
+    content_type = photo_content_type(filename)
+    
+    # Authorized: hand the byte transfer off to nginx or to storage when configured
+    if PHOTO_DELIVERY_MODE == "accel":
+        metrics.PHOTO_RESPONSES.inc(delivery="accel")
+        return Response(
+            media_type=content_type,
+            headers={**cache_headers, "X-Accel-Redirect": f"{PHOTO_ACCEL_PREFIX}{filename}"}
+        )
+    if PHOTO_DELIVERY_MODE == "redirect" and not DISABLE_AUTH:
+        try:
+            signed_url = await asyncio.to_thread(
+                create_signed_photo_url, filename, PHOTO_SIGNED_URL_TTL_SECONDS
+            )
+        except Exception as e:
+            print(f"Error serving photo: {e}")
+            raise HTTPException(status_code=404, detail="Photo not found")
+        # The redirect may be reused only while the signed URL is valid
+        metrics.PHOTO_RESPONSES.inc(delivery="redirect")
+        return RedirectResponse(
+            signed_url,
+            status_code=302,
+            headers={"Cache-Control": f"private, max-age={PHOTO_SIGNED_URL_TTL_SECONDS // 2}"}
+        )
     
     try:
-        # Get photo from Supabase Storage
-        photo_data = get_photo_object(filename)
-        
-        # Determine content type from filename
-        content_type = "image/jpeg"
-        if filename.lower().endswith('.png'):
-            content_type = "image/png"
-        elif filename.lower().endswith('.gif'):
-            content_type = "image/gif"
-        elif filename.lower().endswith('.webp'):
-            content_type = "image/webp"
+        # Local disk: stream from the file (Content-Length, Last-Modified, Range support)
+        # instead of reading the whole photo into memory
+        local_path = get_local_photo_path(filename)
+        if local_path is not None:
+            metrics.PHOTO_RESPONSES.inc(delivery="file")
+            return await build_file_response(request, str(local_path), content_type, cache_headers)
         
-        # Reset stream position
-        photo_data.seek(0)
+        # Get photo from Supabase Storage (through the memory/disk photo cache),
+        # in a worker thread so a cache miss does not block the event loop
+        photo_data = await asyncio.to_thread(get_photo_bytes, filename)
+        metrics.PHOTO_RESPONSES.inc(delivery="storage")
         
-        return StreamingResponse(
-            photo_data,
+        return Response(
+            content=photo_data,
             media_type=content_type,
-            headers={
-                "Cache-Control": "public, max-age=3600"
-            }
+            headers=cache_headers
         )
     except Exception as e:
         print(f"Error serving photo: {e}")
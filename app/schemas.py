@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_validator, model_validator
 from typing import Optional, List
 from datetime import datetime
 
@@ -7,15 +7,22 @@ from app.validators import (
     validate_description,
     validate_url,
     sanitize_filename,
+    validate_photos,
 )
+from app.photo_urls import signed_photo_url
 
 
 # Meal schemas
-class MealBase(BaseModel):
+class MealFields(BaseModel):
+    """Fields shared by meal input and output schemas, without validation"""
     name: str
     description: Optional[str] = None
     url: Optional[str] = None
     photo_filename: Optional[str] = None
+
+
+class MealBase(MealFields):
+    """Meal fields sent by clients: validated and sanitized before they are stored"""
     
     @field_validator('name')
     @classmethod
@@ -46,6 +53,11 @@ class MealBase(BaseModel):
 
 class MealCreate(MealBase):
     photos: Optional[List[dict]] = None  # Array of photo objects: [{"filename": "...", "is_primary": true}, ...]
+    
+    @field_validator('photos')
+    @classmethod
+    def validate_photos_field(cls, v: Optional[List[dict]]) -> Optional[List[dict]]:
+        return validate_photos(v)
 
 
 class MealUpdate(BaseModel):
@@ -82,12 +94,82 @@ class MealUpdate(BaseModel):
         if v is None:
             return None
         return sanitize_filename(v)
+    
+    @field_validator('photos')
+    @classmethod
+    def validate_photos_field(cls, v: Optional[List[dict]]) -> Optional[List[dict]]:
+        return validate_photos(v)
 
 
-class MealResponse(MealBase):
+class MealResponse(MealFields):
+    """
+    Meal as returned by the API.
+    Values come from the database, where they were validated and sanitized on input
+    (MealCreate/MealUpdate), so they are not validated again here. Descriptions saved
+    under an earlier sanitizer are cleaned by migration d2a6c8e4f130.
+    """
     id: Optional[int] = None
-    photos: Optional[list] = None  # Array of photo objects: [{"filename": "...", "is_primary": true}, ...]
+    photos: Optional[list] = None  # Array of photo objects: [{"filename": "...", "is_primary": true, "url": "..."}, ...]
+    photo_url: Optional[str] = None  # Signed URL of the primary photo
+    photo_placeholder: Optional[str] = None  # Tiny inline JPEG painted while the primary photo loads
     created_at: Optional[datetime] = None
+    description_excerpt: Optional[str] = None  # Start of the description as plain text
+    
+    @model_validator(mode='after')
+    def add_signed_photo_urls(self) -> 'MealResponse':
+        self.photos, photo_url, photo_placeholder = signed_photo_fields(self.photo_filename, self.photos)
+        if photo_url:
+            self.photo_url = photo_url
+            self.photo_placeholder = photo_placeholder
+        return self
 
     class Config:
         from_attributes = True
+
+
+def signed_photo_fields(photo_filename: Optional[str], photos: Optional[list]):
+    """
+    Photos with their signed URLs, plus the signed URL and placeholder of the primary photo.
+    
+    Returns:
+        (photos, photo_url, photo_placeholder)
+    """
+    # Photo dicts are copied so the ORM's JSON value is never mutated
+    if photos:
+        photos = [
+            {**photo, "url": signed_photo_url(photo["filename"])}
+            if isinstance(photo, dict) and photo.get("filename") else photo
+            for photo in photos
+        ]
+    photo_dicts = [p for p in photos or [] if isinstance(p, dict) and p.get("filename")]
+    primary = photo_filename
+    if not primary and photo_dicts:
+        primary = next((p for p in photo_dicts if p.get("is_primary")), photo_dicts[0])["filename"]
+    if not primary:
+        return photos, None, None
+    placeholder = next((p.get("placeholder") for p in photo_dicts if p["filename"] == primary), None)
+    return photos, signed_photo_url(primary), placeholder
+
+
+def meal_response_data(row) -> dict:
+    """
+    The JSON-ready content of MealResponse for a meal row (ORM object or column tuple),
+    built without model validation for list endpoints, in the same key order.
+    A photos value that is not a list goes through MealResponse itself.
+    """
+    photos = row.photos
+    if photos is not None and not isinstance(photos, list):
+        return MealResponse.model_validate(row).model_dump(mode="json")
+    photos, photo_url, photo_placeholder = signed_photo_fields(row.photo_filename, photos)
+    return {
+        "name": row.name,
+        "description": row.description,
+        "url": row.url,
+        "photo_filename": row.photo_filename,
+        "id": row.id,
+        "photos": photos,
+        "photo_url": photo_url,
+        "photo_placeholder": photo_placeholder,
+        "created_at": row.created_at,
+        "description_excerpt": row.description_excerpt,
+    }
@@ -2,14 +2,10 @@
 Security headers middleware for FastAPI.
 Adds security headers to all responses to prevent common web vulnerabilities.
 """
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from typing import Callable
-import os
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """
     Middleware to add security headers to all HTTP responses.
     
@@ -21,15 +17,23 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     - Strict-Transport-Security: Forces HTTPS (only in production)
     - Referrer-Policy: Controls referrer information
     - Permissions-Policy: Restricts browser features
+    
+    Pure ASGI: headers are added to the http.response.start message in send,
+    so the response body (e.g. a streamed photo) passes through untouched.
     """
     
-    def __init__(self, app, environment: str = "development"):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, environment: str = "development"):
+        self.app = app
         self.environment = environment
         self.is_production = environment == "production"
         
-        # Build security headers
+        # Build security headers (and their raw ASGI form once, not per request)
         self.security_headers = self._build_security_headers()
+        self._raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in self.security_headers.items()
+        ]
+        self._raw_names = {name for name, _ in self._raw_headers}
     
     def _build_security_headers(self) -> dict:
         """Build security headers based on environment"""
@@ -88,12 +92,18 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         
         return headers
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Add security headers to response"""
-        response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Add all security headers
-        for header_name, header_value in self.security_headers.items():
-            response.headers[header_name] = header_value
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Security headers replace any the app set with the same name
+                message["headers"] = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in self._raw_names
+                ] + self._raw_headers
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
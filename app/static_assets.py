@@ -0,0 +1,297 @@
+"""
+Static asset manifest.
+Built once (at startup or on first use): every file under static/ is indexed by
+its path with its content hash, MIME type, size and precompressed variants, so
+serving an asset is a dict lookup. Assets are also reachable under fingerprinted
+names (app.js -> app.<hash>.js) that are cached as immutable. index.html,
+manifest.json and sw.js are rewritten in memory to reference those names, and
+sw.js gets a cache version derived from the manifest.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+
+from app.compression import PRECOMPRESSED_ENCODINGS, accepted_encodings, brotli, is_compressible
+
+STATIC_DIR = "static"
+
+# Public URL prefix of static files (the app is served under /easymeal)
+STATIC_URL_PREFIX = "/easymeal/static/"
+
+# Fingerprinted names never change content: cache for a year without revalidation.
+# Plain names may change on deploy: the browser revalidates them with the ETag.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Files whose references to other assets are rewritten to fingerprinted URLs, in
+# dependency order (index.html links manifest.json)
+REWRITTEN_ASSETS = ("manifest.json", "index.html", "sw.js")
+
+# Assets that keep a stable URL: the page itself and the service worker script
+# (a service worker is identified by its script URL)
+UNFINGERPRINTED_ASSETS = ("index.html", "sw.js")
+
+# Hex digits of the content hash used in fingerprinted names
+HASH_LENGTH = 10
+
+MEDIA_TYPES = {
+    ".css": "text/css",
+    # Service workers must be served with application/javascript or text/javascript
+    ".js": "application/javascript",
+    ".html": "text/html",
+    ".json": "application/json",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+    ".ico": "image/x-icon",
+    ".woff": "font/woff",
+    ".woff2": "font/woff2",
+}
+
+# In development, static files are checked for changes at most this often
+DEV_RELOAD_INTERVAL_SECONDS = 1.0
+
+_SW_VERSION_RE = re.compile(r"const ASSET_VERSION = '[^']*';")
+
+
+class StaticAsset(NamedTuple):
+    """One static file: where its bytes are and how to serve them"""
+    name: str  # path relative to static/, e.g. "i18n/index.js"
+    hashed_name: Optional[str]  # e.g. "i18n/index.3f2a9c1b0d.js"; None for stable-URL assets
+    media_type: str
+    size: int
+    etag: str
+    path: str  # file on disk
+    content: Optional[bytes]  # rewritten content served from memory (else the file)
+    # Compressed representations: encoding -> file path (precompressed) or bytes (rewritten)
+    encodings: Dict[str, object]
+
+
+def media_type_for(name: str) -> str:
+    suffix = os.path.splitext(name)[1].lower()
+    return MEDIA_TYPES.get(suffix) or mimetypes.guess_type(name)[0] or "application/octet-stream"
+
+
+def fingerprinted_name(name: str, digest: str) -> str:
+    """app.js -> app.<hash>.js"""
+    base, suffix = os.path.splitext(name)
+    return f"{base}.{digest}{suffix}"
+
+
+def _is_source_file(name: str) -> bool:
+    # Precompressed variants and temporary files are not assets of their own
+    return not name.endswith((".gz", ".br", ".tmp")) and not os.path.basename(name).startswith(".")
+
+
+class AssetManifest:
+    """Index of static assets by plain and fingerprinted name"""
+
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self.assets: Dict[str, StaticAsset] = {}
+        self.lookup: Dict[str, StaticAsset] = {}
+        self.version = ""
+        self._mtimes: Dict[str, int] = {}
+        self.build()
+
+    def _scan(self) -> Dict[str, int]:
+        mtimes = {}
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, "/")
+                if _is_source_file(name):
+                    mtimes[name] = os.stat(path).st_mtime_ns
+        return mtimes
+
+    def build(self):
+        mtimes = self._scan()
+        assets: Dict[str, StaticAsset] = {}
+        contents: Dict[str, bytes] = {}
+        for name in sorted(mtimes):
+            path = os.path.join(self.static_dir, name)
+            with open(path, "rb") as f:
+                contents[name] = f.read()
+
+        # Plain assets first: their hashes are needed to rewrite the others
+        for name, data in contents.items():
+            if name not in REWRITTEN_ASSETS:
+                assets[name] = self._file_asset(name, data)
+
+        for name in REWRITTEN_ASSETS:
+            if name in contents:
+                content = self._rewrite(name, contents[name], assets)
+                assets[name] = self._memory_asset(name, content)
+
+        self.version = hashlib.sha256(
+            "\n".join(f"{name}:{asset.etag}" for name, asset in sorted(assets.items())).encode()
+        ).hexdigest()[:HASH_LENGTH]
+        # sw.js embeds the version, so its own entry is rebuilt once the version is known
+        if "sw.js" in contents:
+            assets["sw.js"] = self._memory_asset("sw.js", self._rewrite("sw.js", contents["sw.js"], assets))
+
+        lookup = {}
+        for asset in assets.values():
+            lookup[asset.name] = asset
+            if asset.hashed_name:
+                lookup[asset.hashed_name] = asset
+        self.assets, self.lookup, self._mtimes = assets, lookup, mtimes
+
+    def _file_asset(self, name: str, data: bytes) -> StaticAsset:
+        path = os.path.join(self.static_dir, name)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        source_mtime = os.stat(path).st_mtime_ns
+        encodings = {}
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            try:
+                # Only variants written from this exact file (same mtime) are current
+                if os.stat(path + suffix).st_mtime_ns == source_mtime:
+                    encodings[encoding] = path + suffix
+            except OSError:
+                pass
+        return StaticAsset(
+            name=name,
+            hashed_name=None if name in UNFINGERPRINTED_ASSETS else fingerprinted_name(name, digest),
+            media_type=media_type_for(name),
+            size=len(data),
+            etag=f'"{digest}"',
+            path=path,
+            content=None,
+            encodings=encodings,
+        )
+
+    def _memory_asset(self, name: str, content: bytes) -> StaticAsset:
+        digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        media_type = media_type_for(name)
+        encodings = {}
+        if is_compressible(media_type):
+            encodings["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+            if brotli is not None:
+                encodings["br"] = brotli.compress(content, quality=11)
+        return StaticAsset(
+            name=name,
+            hashed_name=None if name in UNFINGERPRINTED_ASSETS else fingerprinted_name(name, digest),
+            media_type=media_type,
+            size=len(content),
+            etag=f'"{digest}"',
+            path=os.path.join(self.static_dir, name),
+            content=content,
+            encodings=encodings,
+        )
+
+    def _rewrite(self, name: str, data: bytes, assets: Dict[str, StaticAsset]) -> bytes:
+        """Point STATIC_URL_PREFIX references at fingerprinted names"""
+        text = data.decode("utf-8")
+        targets = {
+            asset.name: asset.hashed_name for asset in assets.values() if asset.hashed_name
+        }
+        if targets:
+            # Longest names first so "i18n/index.js" is not matched as a shorter name
+            pattern = re.compile(
+                re.escape(STATIC_URL_PREFIX)
+                + "(" + "|".join(re.escape(n) for n in sorted(targets, key=len, reverse=True)) + ")"
+                + r"(?![\w./-])"
+            )
+            text = pattern.sub(lambda m: STATIC_URL_PREFIX + targets[m.group(1)], text)
+        if name == "sw.js" and self.version:
+            text = _SW_VERSION_RE.sub(f"const ASSET_VERSION = '{self.version}';", text)
+        return text.encode("utf-8")
+
+    def refresh_if_changed(self) -> bool:
+        """Rebuild if a static file was added, removed or modified (development)"""
+        if self._scan() == self._mtimes:
+            return False
+        self.build()
+        return True
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self.lookup.get(name)
+
+
+_manifest: Optional[AssetManifest] = None
+_manifest_lock = threading.Lock()
+_last_dev_check = 0.0
+
+
+def get_asset_manifest(reload: bool = False) -> AssetManifest:
+    """
+    The static asset manifest, built on first use.
+    With reload (development), files are re-checked at most once per second.
+    """
+    global _manifest, _last_dev_check
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = AssetManifest()
+                _last_dev_check = time.monotonic()
+    elif reload and time.monotonic() - _last_dev_check >= DEV_RELOAD_INTERVAL_SECONDS:
+        with _manifest_lock:
+            _last_dev_check = time.monotonic()
+            if _manifest.refresh_if_changed():
+                print(f"Static asset manifest rebuilt (version {_manifest.version})")
+    return _manifest
+
+
+def build_asset_manifest() -> AssetManifest:
+    """(Re)build the manifest, e.g. at startup after precompression"""
+    global _manifest, _last_dev_check
+    manifest = AssetManifest()
+    with _manifest_lock:
+        _manifest = manifest
+        _last_dev_check = time.monotonic()
+    return manifest
+
+
+def negotiate_encoding(asset: StaticAsset, accept_encoding: str) -> Optional[str]:
+    """Best precompressed encoding of the asset the client accepts (br, then gzip)"""
+    if not asset.encodings:
+        return None
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, _ in PRECOMPRESSED_ENCODINGS:
+        if encoding in asset.encodings and encoding in accepted:
+            return encoding
+    return None
+
+
+def asset_response(request: Request, asset: StaticAsset, fingerprinted: bool) -> Response:
+    """
+    Response for a static asset: 304 when the client's copy is current, else the
+    best precompressed representation it accepts, or the identity bytes.
+    """
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL,
+    }
+    if asset.encodings:
+        headers["Vary"] = "Accept-Encoding"
+    if asset.name == "sw.js":
+        # Allow the service worker at /easymeal/static/sw.js to control /easymeal/
+        headers["Service-Worker-Allowed"] = "/easymeal/"
+
+    encoding = negotiate_encoding(asset, request.headers.get("accept-encoding", ""))
+    # Each representation has its own validator
+    etag = f'"{asset.etag[1:-1]}-{encoding}"' if encoding else asset.etag
+    headers["ETag"] = etag
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = asset.encodings[encoding]
+        if isinstance(body, bytes):
+            return Response(content=body, media_type=asset.media_type, headers=headers)
+        return FileResponse(body, media_type=asset.media_type, headers=headers)
+    if asset.content is not None:
+        return Response(content=asset.content, media_type=asset.media_type, headers=headers)
+    return FileResponse(asset.path, media_type=asset.media_type, headers=headers)
@@ -1,6 +1,15 @@
 from pathlib import Path
+import asyncio
+import base64
+import os
+import threading
+import time
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from io import BytesIO
+from typing import BinaryIO, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 import requests
 
 from app.config import (
@@ -10,11 +19,19 @@ from app.config import (
     SUPABASE_BUCKET,
     DISABLE_AUTH,
     LOCAL_PHOTOS_PATH,
+    IMAGE_PROCESSING_WORKERS,
+    PHOTO_CACHE_MEMORY_BYTES,
+    PHOTO_CACHE_DISK_BYTES,
+    PHOTO_CACHE_DIR,
 )
+from app import metrics
 
 # Use service role key, fallback to anon key if service role not available
 SUPABASE_KEY = (SUPABASE_SERVICE_ROLE_KEY or SUPABASE_ANON_KEY) if not DISABLE_AUTH else None
 
+# Backend label of storage call metrics
+STORAGE_BACKEND = "local" if DISABLE_AUTH else "supabase"
+
 # Local photos directory for DISABLE_AUTH mode
 _local_photos_dir: Path = None
 
@@ -27,6 +44,72 @@ def _get_local_photos_dir() -> Path:
     return _local_photos_dir
 
 
+# Bounded pool for CPU-heavy image work (decode, resize, encode, OCR).
+# Pillow releases the GIL while decoding/resampling, so threads run in parallel,
+# and the pool size caps how many decoded images are held in memory at once.
+_image_executor: ThreadPoolExecutor = None
+_image_executor_lock = threading.Lock()
+
+
+def _get_image_executor() -> ThreadPoolExecutor:
+    global _image_executor
+    if _image_executor is None:
+        with _image_executor_lock:
+            if _image_executor is None:
+                _image_executor = ThreadPoolExecutor(
+                    max_workers=IMAGE_PROCESSING_WORKERS,
+                    thread_name_prefix="image-worker",
+                )
+    return _image_executor
+
+
+# Image sources are either raw bytes or a binary file (e.g. a spooled upload)
+ImageSource = Union[bytes, BinaryIO]
+
+
+def _read_source(image_data: ImageSource) -> bytes:
+    if isinstance(image_data, (bytes, bytearray)):
+        return bytes(image_data)
+    image_data.seek(0)
+    return image_data.read()
+
+
+def _source_size(image_data: ImageSource) -> int:
+    if isinstance(image_data, (bytes, bytearray)):
+        return len(image_data)
+    image_data.seek(0, 2)
+    return image_data.tell()
+
+
+_image_task_state_lock = threading.Lock()
+
+
+async def run_image_task(func, *args, **kwargs):
+    """Run a blocking image processing function in the bounded image pool (off the event loop)."""
+    loop = asyncio.get_running_loop()
+    # Queued/running gauges per task (function name); the lock settles the race
+    # between a worker starting the task and the caller giving up on it
+    task = getattr(func, "__name__", "task")
+    state = {"queued": True}
+    
+    def run():
+        with _image_task_state_lock:
+            if state["queued"]:
+                state["queued"] = False
+                metrics.IMAGE_POOL_TASKS.dec(task=task, state="queued")
+        with metrics.IMAGE_POOL_TASKS.track_inprogress(task=task, state="running"):
+            return func(*args, **kwargs)
+    
+    metrics.IMAGE_POOL_TASKS.inc(task=task, state="queued")
+    try:
+        return await loop.run_in_executor(_get_image_executor(), run)
+    finally:
+        with _image_task_state_lock:
+            if state["queued"]:
+                state["queued"] = False
+                metrics.IMAGE_POOL_TASKS.dec(task=task, state="queued")
+
+
 def get_headers():
     """Get common headers for Supabase API requests"""
     return {
@@ -70,124 +153,603 @@ def ensure_bucket_exists():
         # Don't raise - bucket might already exist
 
 
-def optimize_image(image_data: bytes, max_width: int = 1920, max_height: int = 1920, quality: int = 85) -> bytes:
-    """Optimize image by resizing and compressing"""
+def optimize_image(image_data: ImageSource, max_width: int = 1920, max_height: int = 1920, quality: int = 85) -> bytes:
+    """Optimize image (bytes or binary file) by resizing and compressing"""
     try:
         from PIL import Image
-        from io import BytesIO
         
-        # Open image
-        img = Image.open(BytesIO(image_data))
-        
-        # Convert RGBA to RGB if necessary (for JPEG)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            # Create white background
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
+        # Open image (only the header is parsed here, pixels are decoded lazily)
+        if isinstance(image_data, (bytes, bytearray)):
+            img = Image.open(BytesIO(image_data))
+        else:
+            image_data.seek(0)
+            img = Image.open(image_data)
         
         # Calculate new dimensions while maintaining aspect ratio
         original_width, original_height = img.size
         ratio = min(max_width / original_width, max_height / original_height, 1.0)
+        new_size = (max(1, int(original_width * ratio)), max(1, int(original_height * ratio)))
+        
+        # For JPEG, let the decoder downscale by 1/2, 1/4 or 1/8 while decoding,
+        # so a 12MP photo is decoded close to the target size instead of at full resolution
+        if ratio < 1.0 and img.format == 'JPEG':
+            img.draft('RGB', new_size)
         
-        if ratio < 1.0:
-            new_width = int(original_width * ratio)
-            new_height = int(original_height * ratio)
-            img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Palette images must be expanded before resampling (LANCZOS is not applied to 'P')
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        elif img.mode not in ('RGB', 'RGBA', 'LA'):
+            img = img.convert('RGB')
+        
+        if img.size != new_size:
+            # reducing_gap lets Pillow use a cheap integer reduce() before the final LANCZOS pass
+            img = img.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+        
+        # Flatten transparency onto a white background (for JPEG), after resizing
+        if img.mode in ('RGBA', 'LA'):
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
         
         # Compress and save as JPEG
         output = BytesIO()
         img.save(output, format='JPEG', quality=quality, optimize=True)
-        output.seek(0)
         
-        return output.read()
+        return output.getvalue()
     except Exception as e:
         print(f"Error optimizing image: {e}")
         # Return original if optimization fails
-        return image_data
+        return _read_source(image_data)
+
 
+# Low-quality image placeholder: a tiny JPEG inlined as a data URI, painted
+# (scaled up, so naturally blurred) while the real photo loads
+PLACEHOLDER_MAX_SIZE = 20
+PLACEHOLDER_QUALITY = 50
 
-def upload_photo(file_content: bytes, file_extension: str = ".jpg") -> str:
-    """Upload photo to Supabase Storage or local disk and return filename (with optimization)."""
-    # Optimize image before uploading
+
+def make_placeholder(image_data: ImageSource) -> Optional[str]:
+    """Build a ~20px JPEG data URI placeholder for an image; None if it cannot be decoded."""
     try:
-        optimized_content = optimize_image(file_content)
-        original_size = len(file_content)
+        from PIL import Image
+        
+        if isinstance(image_data, (bytes, bytearray)):
+            img = Image.open(BytesIO(image_data))
+        else:
+            image_data.seek(0)
+            img = Image.open(image_data)
+        
+        ratio = min(PLACEHOLDER_MAX_SIZE / img.width, PLACEHOLDER_MAX_SIZE / img.height, 1.0)
+        size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+        if img.format == 'JPEG':
+            # Decode at 1/8 scale: the placeholder costs a fraction of a full decode
+            img.draft('RGB', size)
+        if img.mode in ('RGBA', 'LA', 'P'):
+            img = img.convert('RGBA')
+            background = Image.new('RGB', img.size, (255, 255, 255))
+            background.paste(img, mask=img.split()[-1])
+            img = background
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        img = img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        
+        output = BytesIO()
+        img.save(output, format='JPEG', quality=PLACEHOLDER_QUALITY, optimize=True)
+        return "data:image/jpeg;base64," + base64.b64encode(output.getvalue()).decode("ascii")
+    except Exception as e:
+        print(f"Warning: Could not build image placeholder: {e}")
+        return None
+
+
+class StoredPhoto(NamedTuple):
+    """A stored photo: its filename and its placeholder data URI (if one could be built)"""
+    filename: str
+    placeholder: Optional[str]
+
+
+def _optimize_for_upload(file_content: ImageSource, file_extension: str):
+    """
+    Optimize an uploaded image (bytes or binary file).
+    Returns (content bytes, extension, placeholder) to store.
+    """
+    try:
+        with metrics.IMAGE_PROCESSING_DURATION.time(step="optimize"):
+            optimized_content = optimize_image(file_content)
+        original_size = _source_size(file_content)
         optimized_size = len(optimized_content)
         reduction = ((original_size - optimized_size) / original_size * 100) if original_size > 0 else 0
         print(f"Image optimized: {original_size / 1024:.1f}KB -> {optimized_size / 1024:.1f}KB ({reduction:.1f}% reduction)")
-        file_content = optimized_content
-        file_extension = ".jpg"  # Always save as JPEG after optimization
+        # The placeholder is built from the (small) optimized JPEG, not the original
+        with metrics.IMAGE_PROCESSING_DURATION.time(step="placeholder"):
+            placeholder = make_placeholder(optimized_content)
+        return optimized_content, ".jpg", placeholder  # Always save as JPEG after optimization
     except Exception as e:
         print(f"Warning: Image optimization failed, using original: {e}")
+        content = _read_source(file_content)
+        return content, file_extension, make_placeholder(content)
+
+
+# Content types of stored photos, by extension
+PHOTO_CONTENT_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+def photo_content_type(filename: str) -> str:
+    """Content type of a stored photo, from its extension (JPEG by default)"""
+    return PHOTO_CONTENT_TYPES.get(Path(filename).suffix.lower(), "image/jpeg")
+
+
+def put_photo_object(filename: str, file_content: bytes, upsert: bool = False, session=None) -> bool:
+    """
+    Store photo bytes under an exact filename in Supabase Storage or on local disk.
+    
+    Args:
+        filename: Object name to store under
+        file_content: Photo bytes
+        upsert: Overwrite an existing object with the same name
+        session: Optional requests.Session to reuse connections (Supabase only)
+    
+    Returns:
+        True if stored, False if the object already existed and upsert is False
     
+    Raises:
+        Exception: If the storage write fails
+    """
+    with metrics.time_storage("put", STORAGE_BACKEND):
+        if DISABLE_AUTH:
+            path = _get_local_photos_dir() / filename
+            if not upsert and path.exists():
+                return False
+            tmp_path = path.with_name(f".{filename}.tmp")
+            tmp_path.write_bytes(file_content)
+            os.replace(tmp_path, path)
+            return True
+        
+        headers = get_headers()
+        headers["Content-Type"] = photo_content_type(filename)
+        headers["x-upsert"] = "true" if upsert else "false"
+        response = (session or requests).post(
+            f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{filename}",
+            headers=headers,
+            data=file_content
+        )
+        if response.status_code in [200, 201]:
+            return True
+        # Storage reports an existing object as 409, or as 400 with a "Duplicate" error body
+        if not upsert and (response.status_code == 409 or "Duplicate" in response.text):
+            return False
+        raise Exception(f"Upload error: {response.status_code} - {response.text}")
+
+
+def _store_photo(file_content: bytes, file_extension: str) -> str:
+    """Store photo bytes under a new uuid filename in Supabase Storage or on local disk."""
     filename = f"{uuid.uuid4()}{file_extension}"
     
     if DISABLE_AUTH:
         photos_dir = _get_local_photos_dir()
         path = photos_dir / filename
-        path.write_bytes(file_content)
+        with metrics.time_storage("put", STORAGE_BACKEND):
+            path.write_bytes(file_content)
         return filename
     
-    ensure_bucket_exists()
+    # The bucket is created by `python -m app.migrate` (or at startup), not per upload
     try:
-        content_type = "image/jpeg"
-        headers = get_headers()
-        headers["Content-Type"] = content_type
-        headers["x-upsert"] = "false"
-        response = requests.post(
-            f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{filename}",
-            headers=headers,
-            data=file_content
-        )
-        if response.status_code not in [200, 201]:
-            raise Exception(f"Upload error: {response.status_code} - {response.text}")
+        put_photo_object(filename, file_content)
         return filename
     except Exception as e:
         print(f"Error uploading photo: {e}")
         raise
 
 
-def get_photo_object(filename: str):
-    """Get photo object from Supabase Storage or local disk."""
+# Placeholders of the photos this process uploaded, so saving the meal that references
+# them does not rebuild them: filename -> placeholder
+_uploaded_placeholders: dict = {}
+_UPLOADED_PLACEHOLDERS_MAX_ENTRIES = 10000
+
+
+def _remember_placeholder(stored: StoredPhoto) -> StoredPhoto:
+    if len(_uploaded_placeholders) >= _UPLOADED_PLACEHOLDERS_MAX_ENTRIES:
+        _uploaded_placeholders.clear()
+    _uploaded_placeholders[stored.filename] = stored.placeholder
+    return stored
+
+
+def upload_photo(file_content: ImageSource, file_extension: str = ".jpg") -> StoredPhoto:
+    """Upload photo to Supabase Storage or local disk (with optimization); returns filename and placeholder."""
+    file_content, file_extension, placeholder = _optimize_for_upload(file_content, file_extension)
+    return _remember_placeholder(StoredPhoto(_store_photo(file_content, file_extension), placeholder))
+
+
+async def upload_photo_async(file_content: ImageSource, file_extension: str = ".jpg") -> StoredPhoto:
+    """
+    Async variant of upload_photo for request handlers.
+    Optimization runs in the bounded image pool and the storage write in a worker thread,
+    so neither blocks the event loop.
+    """
+    file_content, file_extension, placeholder = await run_image_task(_optimize_for_upload, file_content, file_extension)
+    filename = await asyncio.to_thread(_store_photo, file_content, file_extension)
+    return _remember_placeholder(StoredPhoto(filename, placeholder))
+
+
+def build_photo_placeholder(filename: str) -> Optional[str]:
+    """Placeholder of a stored photo, built from its bytes; None if it cannot be read or decoded."""
+    try:
+        return make_placeholder(get_photo_bytes(filename))
+    except Exception as e:
+        print(f"Warning: Could not build placeholder for {filename}: {e}")
+        return None
+
+
+async def attach_photo_placeholders(photos: Optional[list], known: Optional[dict] = None) -> Optional[list]:
+    """
+    Add the server's placeholder to each entry of a (validated) photos array.
+    Placeholders come from known (filename -> placeholder, e.g. the meal's stored photos),
+    then from this process's uploads; the others are built from the stored photo in the
+    image pool. Photos whose placeholder cannot be built are left without one.
+    """
+    if not photos:
+        return photos
+    placeholders = {}
+    missing = []
+    for photo in photos:
+        filename = photo["filename"]
+        placeholder = (known or {}).get(filename) or _uploaded_placeholders.get(filename)
+        if placeholder:
+            placeholders[filename] = placeholder
+        elif filename not in missing:
+            missing.append(filename)
+    built = await asyncio.gather(*(run_image_task(build_photo_placeholder, f) for f in missing))
+    placeholders.update(zip(missing, built))
+    result = []
+    for photo in photos:
+        placeholder = placeholders.get(photo["filename"])
+        result.append(dict(photo, placeholder=placeholder) if placeholder else dict(photo))
+    return result
+
+
+class PhotoCache:
+    """
+    Read-through cache for photos fetched from remote storage.
+    Tier 1 is an in-memory LRU bounded by total bytes; tier 2 is a local directory
+    bounded by total bytes (LRU by last access). Photo filenames are random uuids and
+    their bytes never change, so entries never go stale; delete_photos invalidates them.
+    Each worker process tracks the disk tier it has seen, so with several workers the
+    directory can grow to at most workers x disk_bytes.
+    """
+    
+    def __init__(self, memory_bytes: int, disk_dir: Optional[str], disk_bytes: int):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes if disk_dir else 0
+        self._disk_dir = Path(disk_dir) if disk_dir else None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[str, int]" = None  # filename -> size, loaded lazily
+        self._disk_size = 0
+        # Disk entries reserved by put() whose file is not written yet
+        self._pending: set = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+    
+    @staticmethod
+    def _is_cacheable_name(filename: str) -> bool:
+        return bool(filename) and Path(filename).name == filename and not filename.startswith(".")
+    
+    def _load_disk_index(self):
+        """Index existing cache files, least recently used first (called with the lock held)."""
+        self._disk = OrderedDict()
+        self._disk_size = 0
+        if not self.disk_bytes:
+            return
+        try:
+            self._disk_dir.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for entry in os.scandir(self._disk_dir):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat_result = entry.stat()
+                    entries.append((stat_result.st_atime, entry.name, stat_result.st_size))
+            for _, name, size in sorted(entries):
+                self._disk[name] = size
+                self._disk_size += size
+        except OSError as e:
+            print(f"Warning: photo disk cache disabled: {e}")
+            self.disk_bytes = 0
+    
+    def _put_memory(self, filename: str, data: bytes):
+        # Skip entries that would take more than a quarter of the memory budget
+        if not self.memory_bytes or len(data) > self.memory_bytes // 4:
+            return
+        if filename in self._memory:
+            return
+        self._memory[filename] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self.stats["memory_evictions"] += 1
+    
+    def get(self, filename: str) -> Optional[bytes]:
+        """Return cached bytes for a photo, or None on a miss."""
+        if not self._is_cacheable_name(filename):
+            return None
+        with self._lock:
+            data = self._memory.get(filename)
+            if data is not None:
+                self._memory.move_to_end(filename)
+                self.stats["memory_hits"] += 1
+                return data
+            if self._disk is None:
+                self._load_disk_index()
+            on_disk = filename in self._disk and filename not in self._pending
+        if on_disk:
+            try:
+                data = (self._disk_dir / filename).read_bytes()
+            except OSError:
+                data = None
+            with self._lock:
+                if data is None:
+                    if filename not in self._pending:
+                        self._disk_size -= self._disk.pop(filename, 0)
+                else:
+                    if filename in self._disk:
+                        self._disk.move_to_end(filename)
+                    self.stats["disk_hits"] += 1
+                    self._put_memory(filename, data)
+                    return data
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+    
+    def put(self, filename: str, data: bytes):
+        """Store photo bytes in both tiers, evicting least recently used entries."""
+        if not self._is_cacheable_name(filename):
+            return
+        with self._lock:
+            self._put_memory(filename, data)
+            if self._disk is None:
+                self._load_disk_index()
+            if not self.disk_bytes or len(data) > self.disk_bytes or filename in self._disk:
+                return
+            evicted = []
+            while self._disk and self._disk_size + len(data) > self.disk_bytes:
+                name, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evicted.append(name)
+                self.stats["disk_evictions"] += 1
+            # Reserve the space now; the file is written outside the lock, and get()
+            # skips the entry until it is
+            self._disk[filename] = len(data)
+            self._disk_size += len(data)
+            self._pending.add(filename)
+        for name in evicted:
+            (self._disk_dir / name).unlink(missing_ok=True)
+        try:
+            # Write to a temp name and rename, so readers never see a partial file
+            tmp_path = self._disk_dir / f".{filename}.{uuid.uuid4().hex}.tmp"
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, self._disk_dir / filename)
+        except OSError as e:
+            print(f"Warning: could not write photo cache file {filename}: {e}")
+            with self._lock:
+                self._pending.discard(filename)
+                self._disk_size -= self._disk.pop(filename, 0)
+            return
+        with self._lock:
+            self._pending.discard(filename)
+            # Evicted or invalidated while it was being written: the file is not indexed
+            orphaned = filename not in self._disk
+        if orphaned:
+            (self._disk_dir / filename).unlink(missing_ok=True)
+    
+    def invalidate(self, filename: str):
+        """Drop a photo from both tiers."""
+        if not self._is_cacheable_name(filename):
+            return
+        with self._lock:
+            data = self._memory.pop(filename, None)
+            if data is not None:
+                self._memory_size -= len(data)
+            on_disk = self._disk is not None and filename in self._disk
+            if on_disk:
+                self._disk_size -= self._disk.pop(filename)
+        if on_disk or (self._disk is None and self.disk_bytes):
+            (self._disk_dir / filename).unlink(missing_ok=True)
+    
+    def get_stats(self) -> dict:
+        """Hit/miss counters and current tier sizes."""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats.update({
+                "hit_ratio": (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "memory_limit_bytes": self.memory_bytes,
+                "disk_entries": len(self._disk) if self._disk is not None else 0,
+                "disk_bytes": self._disk_size,
+                "disk_limit_bytes": self.disk_bytes,
+            })
+        return stats
+
+
+# Only remote (Supabase) photos are cached; local photos are already on disk
+photo_cache = PhotoCache(PHOTO_CACHE_MEMORY_BYTES, PHOTO_CACHE_DIR, PHOTO_CACHE_DISK_BYTES)
+
+
+def _collect_photo_cache_metrics():
+    stats = photo_cache.get_stats()
+    metrics.PHOTO_CACHE_LOOKUPS.set_total(stats["memory_hits"], result="memory_hit")
+    metrics.PHOTO_CACHE_LOOKUPS.set_total(stats["disk_hits"], result="disk_hit")
+    metrics.PHOTO_CACHE_LOOKUPS.set_total(stats["misses"], result="miss")
+    metrics.PHOTO_CACHE_HIT_RATIO.set(stats["hit_ratio"])
+    metrics.PHOTO_CACHE_BYTES.set(stats["memory_bytes"], tier="memory")
+    metrics.PHOTO_CACHE_BYTES.set(stats["disk_bytes"], tier="disk")
+
+
+metrics.register_collector(_collect_photo_cache_metrics)
+
+
+def get_local_photo_path(filename: str):
+    """
+    Return the on-disk path of a photo when it can be served straight from a file
+    (local storage mode), or None when it must be fetched with get_photo_bytes.
+    Raises FileNotFoundError if the photo does not exist locally.
+    """
+    if not DISABLE_AUTH:
+        return None
+    path = _get_local_photos_dir() / filename
+    if not path.is_file():
+        raise FileNotFoundError(f"Photo not found: {filename}")
+    return path
+
+
+def get_photo_bytes(filename: str) -> bytes:
+    """Get photo content from local disk, or from Supabase Storage through the photo cache."""
     if DISABLE_AUTH:
         photos_dir = _get_local_photos_dir()
         path = photos_dir / filename
         if not path.is_file():
             raise FileNotFoundError(f"Photo not found: {filename}")
-        return BytesIO(path.read_bytes())
+        with metrics.time_storage("get", STORAGE_BACKEND):
+            return path.read_bytes()
+    cached = photo_cache.get(filename)
+    if cached is not None:
+        return cached
     try:
-        response = requests.get(
-            f"{SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{filename}",
-            headers=get_headers()
-        )
-        if response.status_code == 200:
-            return BytesIO(response.content)
-        raise Exception(f"Download error: {response.status_code} - {response.text}")
+        with metrics.time_storage("get", STORAGE_BACKEND):
+            response = requests.get(
+                f"{SUPABASE_URL}/storage/v1/object/public/{SUPABASE_BUCKET}/{filename}",
+                headers=get_headers()
+            )
+            if response.status_code != 200:
+                raise Exception(f"Download error: {response.status_code} - {response.text}")
+        photo_cache.put(filename, response.content)
+        return response.content
     except Exception as e:
         print(f"Error getting photo: {e}")
         raise
 
 
-def delete_photo(filename: str):
-    """Delete photo from Supabase Storage or local disk."""
+def _parse_storage_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def list_photos(page_size: int = 1000) -> Iterator[Tuple[str, Optional[float]]]:
+    """
+    List stored photos page by page (Supabase Storage) or by scanning the local directory.
+    
+    Yields:
+        (filename, created_at) with created_at as a unix timestamp, or None if unknown
+    """
     if DISABLE_AUTH:
-        photos_dir = _get_local_photos_dir()
-        path = photos_dir / filename
-        if path.is_file():
-            path.unlink(missing_ok=True)
+        with os.scandir(_get_local_photos_dir()) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                yield entry.name, entry.stat().st_mtime
         return
+    offset = 0
+    while True:
+        with metrics.time_storage("list", STORAGE_BACKEND):
+            response = requests.post(
+                f"{SUPABASE_URL}/storage/v1/object/list/{SUPABASE_BUCKET}",
+                headers=get_headers(),
+                json={
+                    "prefix": "",
+                    "limit": page_size,
+                    "offset": offset,
+                    "sortBy": {"column": "name", "order": "asc"},
+                }
+            )
+            if response.status_code != 200:
+                raise Exception(f"List error: {response.status_code} - {response.text}")
+        page = response.json()
+        for obj in page:
+            # Folders have no id; photos are stored at the bucket root
+            if obj.get("id") is None:
+                continue
+            yield obj["name"], _parse_storage_timestamp(obj.get("created_at") or obj.get("updated_at"))
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+# Supabase accepts up to 1000 paths per bulk remove request
+DELETE_BATCH_SIZE = 1000
+
+# Local unlinks run concurrently with at most this many threads
+_LOCAL_DELETE_WORKERS = 8
+
+
+def _unlink_local_photo(path: Path):
     try:
-        requests.delete(
-            f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{filename}",
-            headers=get_headers()
-        )
+        path.unlink(missing_ok=True)
     except Exception as e:
-        print(f"Error deleting photo: {e}")
+        print(f"Error deleting photo {path.name}: {e}")
+
+
+def delete_photos(filenames: Iterable[str]) -> List[str]:
+    """
+    Delete photos from Supabase Storage (bulk remove, one request per batch) or
+    local disk (concurrent unlinks). Errors are logged, not raised.
+    
+    Returns:
+        Filenames whose deletion was requested (duplicates and empty names removed)
+    """
+    filenames = list(dict.fromkeys(name for name in filenames if name))
+    if not filenames:
+        return []
+    for filename in filenames:
+        photo_cache.invalidate(filename)
+    with _storage_signed_url_lock:
+        for filename in filenames:
+            _storage_signed_url_cache.pop(filename, None)
+    
+    if DISABLE_AUTH:
+        photos_dir = _get_local_photos_dir()
+        paths = [photos_dir / filename for filename in filenames]
+        with metrics.time_storage("delete", STORAGE_BACKEND):
+            if len(paths) == 1:
+                _unlink_local_photo(paths[0])
+            else:
+                with ThreadPoolExecutor(max_workers=min(_LOCAL_DELETE_WORKERS, len(paths))) as pool:
+                    list(pool.map(_unlink_local_photo, paths))
+        return filenames
+    
+    for i in range(0, len(filenames), DELETE_BATCH_SIZE):
+        batch = filenames[i:i + DELETE_BATCH_SIZE]
+        try:
+            with metrics.time_storage("delete", STORAGE_BACKEND):
+                response = requests.delete(
+                    f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}",
+                    headers=get_headers(),
+                    json={"prefixes": batch}
+                )
+                if response.status_code != 200:
+                    raise Exception(f"Delete error: {response.status_code} - {response.text}")
+        except Exception as e:
+            print(f"Error deleting photos: {e}")
+    return filenames
+
+
+def delete_photo(filename: str):
+    """Delete photo from Supabase Storage or local disk."""
+    delete_photos([filename])
 
 
 def get_photo_url(filename: str, expires_in_seconds: int = 3600) -> str:
@@ -203,27 +765,49 @@ def get_photo_url(filename: str, expires_in_seconds: int = 3600) -> str:
         raise
 
 
-def migrate_photos_from_filesystem(photos_dir: Path):
-    """Migrate photos from filesystem to Supabase Storage"""
-    ensure_bucket_exists()
-    
-    if not photos_dir.exists():
-        print(f"Photos directory {photos_dir} does not exist")
-        return
-    
-    migrated_count = 0
-    for photo_file in photos_dir.iterdir():
-        if photo_file.is_file() and photo_file.suffix.lower() in [".jpg", ".jpeg", ".png", ".gif", ".webp"]:
-            try:
-                with open(photo_file, "rb") as f:
-                    file_content = f.read()
-                
-                # Upload to Supabase Storage with same filename
-                upload_photo(file_content, photo_file.suffix)
-                
-                migrated_count += 1
-                print(f"Migrated photo: {photo_file.name}")
-            except Exception as e:
-                print(f"Error migrating photo {photo_file.name}: {e}")
-    
-    print(f"Migrated {migrated_count} photos to Supabase Storage")
+# Signed URLs are reused while at least half of their lifetime remains,
+# so a popular photo costs one signing call per half-TTL instead of one per request
+_storage_signed_url_cache: dict = {}
+_storage_signed_url_lock = threading.Lock()
+_STORAGE_SIGNED_URL_CACHE_MAX_ENTRIES = 10000
+
+
+def create_signed_photo_url(filename: str, expires_in_seconds: int = 300) -> str:
+    """Create a short-lived signed Supabase Storage URL for a photo (remote storage only)."""
+    if DISABLE_AUTH:
+        raise RuntimeError("Signed photo URLs require Supabase Storage")
+    now = time.monotonic()
+    with _storage_signed_url_lock:
+        cached = _storage_signed_url_cache.get(filename)
+        if cached and cached[1] - now > expires_in_seconds / 2:
+            return cached[0]
+    try:
+        with metrics.time_storage("sign", STORAGE_BACKEND):
+            response = requests.post(
+                f"{SUPABASE_URL}/storage/v1/object/sign/{SUPABASE_BUCKET}/{filename}",
+                headers=get_headers(),
+                json={"expiresIn": expires_in_seconds}
+            )
+            if response.status_code != 200:
+                raise Exception(f"Sign error: {response.status_code} - {response.text}")
+        signed_path = response.json().get("signedURL") or response.json().get("signedUrl")
+        if not signed_path:
+            raise Exception("Sign error: no signedURL in response")
+        url = f"{SUPABASE_URL.rstrip('/')}/storage/v1/{signed_path.lstrip('/')}"
+    except Exception as e:
+        print(f"Error signing photo URL: {e}")
+        raise
+    with _storage_signed_url_lock:
+        if len(_storage_signed_url_cache) >= _STORAGE_SIGNED_URL_CACHE_MAX_ENTRIES:
+            _storage_signed_url_cache.clear()
+        _storage_signed_url_cache[filename] = (url, now + expires_in_seconds)
+    return url
+
+
+def migrate_photos_from_filesystem(photos_dir: Path, **options) -> dict:
+    """
+    Migrate photos from filesystem to Supabase Storage, keeping their filenames.
+    See app.photo_migration.migrate_photos for options (workers, manifest, resume).
+    """
+    from app.photo_migration import migrate_photos
+    return migrate_photos(photos_dir, **options)
@@ -0,0 +1,206 @@
+"""
+Streaming image upload handling.
+Parses multipart request bodies as they arrive so invalid or oversized uploads
+are rejected early: the image signature is checked on the first chunk and the
+request is aborted as soon as the running size passes the limit. Accepted bytes
+are spooled to a temporary file instead of being buffered in RAM.
+"""
+from tempfile import SpooledTemporaryFile
+from typing import Optional
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+
+from app.config import UPLOAD_SPOOL_MEMORY_BYTES
+from app.file_validation import validate_image_file
+
+
+# Bytes needed to recognize every supported image signature (imghdr inspects 32 bytes)
+SIGNATURE_PROBE_SIZE = 32
+
+# Allowance for boundaries, part headers and small form fields on top of the file size
+MULTIPART_OVERHEAD = 64 * 1024
+
+# OpenAPI description of the multipart body (the endpoints read the stream themselves)
+IMAGE_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {max_size // (1024 * 1024)}MB"
+    )
+
+
+class ImageUpload:
+    """A validated image upload, spooled to a temporary file (rewound to the start)."""
+
+    def __init__(self, file: SpooledTemporaryFile, size: int, filename: Optional[str],
+                 mime_type: str, extension: str):
+        self.file = file
+        self.size = size
+        self.filename = filename
+        self.mime_type = mime_type
+        self.extension = extension
+
+    def close(self):
+        self.file.close()
+
+
+class _ImageUploadReceiver:
+    """Multipart parser callbacks that validate the image part while it streams in."""
+
+    def __init__(self, field_name: str, max_size: int):
+        self.field_name = field_name
+        self.max_size = max_size
+        self.spool = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MEMORY_BYTES)
+        self.size = 0
+        self.filename: Optional[str] = None
+        self.mime_type: Optional[str] = None
+        self.extension: Optional[str] = None
+        self.found = False
+        self.finished = False
+        self._in_target = False
+        self._probe = b""
+        self._header_name = b""
+        self._header_value = b""
+        self._part_headers = {}
+
+    def _validate_probe(self):
+        try:
+            is_valid, self.mime_type, self.extension = validate_image_file(
+                self._probe,
+                content_type=self._part_headers.get(b"content-type", b"").decode("latin-1") or None,
+                filename=self.filename
+            )
+            if not is_valid:
+                raise ValueError("File is not a valid image")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        self.spool.write(self._probe)
+        self._probe = b""
+
+    def on_part_begin(self):
+        self._part_headers = {}
+        self._in_target = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._part_headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._part_headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        if name == self.field_name and b"filename" in options and not self.found:
+            self.found = True
+            self._in_target = True
+            self.filename = options[b"filename"].decode("utf-8", errors="replace")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_target:
+            return
+        self.size += end - start
+        if self.size > self.max_size:
+            raise _too_large(self.max_size)
+        if self.mime_type is None:
+            # Hold back the first bytes until the signature can be checked
+            self._probe += data[start:end]
+            if len(self._probe) >= SIGNATURE_PROBE_SIZE:
+                self._validate_probe()
+        else:
+            self.spool.write(data[start:end])
+
+    def on_part_end(self):
+        if self._in_target:
+            if self.mime_type is None:
+                self._validate_probe()
+            self._in_target = False
+
+    def on_end(self):
+        self.finished = True
+
+
+async def receive_image_upload(request: Request, max_size: int, field_name: str = "file") -> ImageUpload:
+    """
+    Stream a multipart/form-data request body and return the validated image part.
+
+    Args:
+        request: Incoming request (body must not have been read yet)
+        max_size: Maximum accepted image size in bytes
+        field_name: Form field carrying the image
+
+    Returns:
+        ImageUpload spooled to a temporary file; the caller must close() it
+
+    Raises:
+        HTTPException: 413 once the body passes the size limit, 400 for a missing,
+            malformed or non-image upload
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise _too_large(max_size)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    receiver = _ImageUploadReceiver(field_name, max_size)
+    parser = MultipartParser(boundary, {
+        "on_part_begin": receiver.on_part_begin,
+        "on_part_data": receiver.on_part_data,
+        "on_part_end": receiver.on_part_end,
+        "on_header_field": receiver.on_header_field,
+        "on_header_value": receiver.on_header_value,
+        "on_header_end": receiver.on_header_end,
+        "on_headers_finished": receiver.on_headers_finished,
+        "on_end": receiver.on_end,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_size + MULTIPART_OVERHEAD:
+                raise _too_large(max_size)
+            parser.write(chunk)
+        parser.finalize()
+    except HTTPException:
+        receiver.spool.close()
+        raise
+    except Exception as e:
+        receiver.spool.close()
+        print(f"Error parsing upload: {e}")
+        raise HTTPException(status_code=400, detail="Malformed multipart upload")
+
+    if not receiver.finished or not receiver.found or receiver.mime_type is None:
+        receiver.spool.close()
+        raise HTTPException(status_code=400, detail="No image file provided")
+
+    receiver.spool.seek(0)
+    return ImageUpload(
+        file=receiver.spool,
+        size=receiver.size,
+        filename=receiver.filename,
+        mime_type=receiver.mime_type,
+        extension=receiver.extension,
+    )
@@ -25,63 +25,139 @@ def sanitize_html(text: str) -> str:
     return html.escape(text)
 
 
+# Tags whose content is dropped along with them (not shown as text)
+DROPPED_CONTENT_TAGS = {'script', 'style'}
+
+# Allowed attributes per tag (Quill only puts attributes on links)
+ALLOWED_TAG_ATTRIBUTES = {'a': ALLOWED_HTML_ATTRIBUTES}
+
+# URL schemes allowed in href (relative URLs have none)
+ALLOWED_HREF_SCHEMES = {'http', 'https', 'mailto'}
+
+# One token of markup: a comment, a start or end tag, or other markup (<!doctype>, <?xml>)
+_MARKUP_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(?P<close>/)?(?P<name>[a-zA-Z][^\s/>]*)(?P<attrs>[^>]*)>'
+    r'|<[!?/][^>]*>',
+    re.DOTALL
+)
+# name, name=value, name="value" or name='value'
+_ATTRIBUTE_RE = re.compile(
+    r'(?P<name>[^\s"\'<>/=]+)(?:\s*=\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\'|(?P<bare>[^\s"\'>]+)))?'
+)
+_DROPPED_CONTENT_END_RES = {
+    tag: re.compile(rf'</{tag}\s*>', re.IGNORECASE) for tag in DROPPED_CONTENT_TAGS
+}
+# Characters of text that could start markup; '&' unless it starts a character reference
+_TEXT_SPECIAL_RE = re.compile(r'[<>]|&(?![a-zA-Z][a-zA-Z0-9]*;|#[0-9]+;|#[xX][0-9a-fA-F]+;)')
+_TEXT_ESCAPES = {'<': '&lt;', '>': '&gt;', '&': '&amp;'}
+# Browsers ignore control characters and whitespace when reading a URL scheme
+_URL_IGNORED_CHARS_RE = re.compile(r'[\x00-\x20\x7f]+')
+_URL_SCHEME_RE = re.compile(r'([a-zA-Z][a-zA-Z0-9+.\-]*):')
+
+
+# Sanitized form of recently seen tags: descriptions repeat the same few tags
+_cleaned_tags = {}
+CLEANED_TAG_CACHE_SIZE = 4096
+CLEANED_TAG_MAX_LENGTH = 256
+
+
+def _escape_text(text: str) -> str:
+    if '<' in text or '>' in text or '&' in text:
+        return _TEXT_SPECIAL_RE.sub(lambda m: _TEXT_ESCAPES[m.group()], text)
+    return text
+
+
+def _is_safe_href(url: str) -> bool:
+    scheme = _URL_SCHEME_RE.match(_URL_IGNORED_CHARS_RE.sub('', url))
+    return scheme is None or scheme.group(1).lower() in ALLOWED_HREF_SCHEMES
+
+
+def _clean_attributes(tag: str, attrs: str) -> str:
+    """Allowed attributes of a tag, in source order, with re-escaped values"""
+    allowed = ALLOWED_TAG_ATTRIBUTES.get(tag)
+    if not allowed or not attrs:
+        return ''
+    cleaned = []
+    seen = set()
+    for match in _ATTRIBUTE_RE.finditer(attrs):
+        name = match.group('name').lower()
+        if name not in allowed or name in seen:
+            continue
+        seen.add(name)
+        value = match.group('dq')
+        if value is None:
+            value = match.group('sq')
+        if value is None:
+            value = match.group('bare') or ''
+        value = html.unescape(value)
+        if name == 'href' and not _is_safe_href(value):
+            continue
+        cleaned.append(f' {name}="{html.escape(value)}"')
+    return ''.join(cleaned)
+
+
+def _clean_tag(match: re.Match) -> Optional[str]:
+    """
+    Sanitized form of a markup token: the allowed tag with its allowed attributes,
+    or '' when it is removed. None for a script or style start tag, whose content
+    is removed too.
+    """
+    name = match.group('name')
+    if name is None:
+        # Comment, doctype or processing instruction
+        return ''
+    name = name.lower()
+    if name in DROPPED_CONTENT_TAGS:
+        return '' if match.group('close') else None
+    if name not in ALLOWED_HTML_TAGS:
+        return ''
+    if match.group('close'):
+        return f'</{name}>'
+    return f'<{name}{_clean_attributes(name, match.group("attrs"))}>'
+
+
 def sanitize_rich_html(html_content: str) -> str:
     """
     Sanitize rich HTML content to allow safe tags while removing dangerous ones.
     Used for descriptions that come from Quill editor.
+    Single pass over the markup: allowed tags are re-emitted with their allowed
+    attributes, other tags are removed (script and style with their content),
+    comments are dropped and stray '<', '>' and '&' in text are escaped.
     """
     if not html_content:
         return html_content
     
-    # Remove script tags and their content
-    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.IGNORECASE | re.DOTALL)
-    
-    # Remove event handlers (onclick, onerror, etc.)
-    html_content = re.sub(r'\s*on\w+\s*=\s*["\'][^"\']*["\']', '', html_content, flags=re.IGNORECASE)
-    
-    # Remove javascript: and data: URLs
-    html_content = re.sub(r'javascript:', '', html_content, flags=re.IGNORECASE)
-    html_content = re.sub(r'data:text/html', '', html_content, flags=re.IGNORECASE)
-    
-    # Remove style tags and inline styles
-    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.IGNORECASE | re.DOTALL)
-    html_content = re.sub(r'\s*style\s*=\s*["\'][^"\']*["\']', '', html_content, flags=re.IGNORECASE)
-    
-    # Remove dangerous tags but keep allowed ones
-    # First, escape all tags
-    # Then unescape allowed tags
-    # This is a simple approach - for production, consider using a library like bleach
-    
-    # Remove tags that are not in the allowed list
-    allowed_tags_pattern = '|'.join(ALLOWED_HTML_TAGS)
-    # Keep allowed tags, remove others
-    html_content = re.sub(
-        r'</?(?!' + allowed_tags_pattern + r'\b)[^>]+>',
-        '',
-        html_content,
-        flags=re.IGNORECASE
-    )
-    
-    # Clean up attributes on allowed tags - only keep href, target, rel
-    for tag in ALLOWED_HTML_TAGS:
-        # Remove all attributes except allowed ones
-        pattern = rf'<{tag}\s+([^>]*)>'
-        def clean_attrs(match):
-            attrs = match.group(1)
-            # Extract only allowed attributes
-            allowed_attrs = []
-            for attr in ALLOWED_HTML_ATTRIBUTES:
-                attr_pattern = rf'\b{attr}\s*=\s*["\']([^"\']*)["\']'
-                attr_match = re.search(attr_pattern, attrs, re.IGNORECASE)
-                if attr_match:
-                    allowed_attrs.append(f'{attr}="{html.escape(attr_match.group(1))}"')
-            if allowed_attrs:
-                return f'<{tag} {" ".join(allowed_attrs)}>'
-            return f'<{tag}>'
+    output = []
+    position = 0
+    for match in _MARKUP_RE.finditer(html_content):
+        start = match.start()
+        if start < position:
+            # Inside the content of a removed script or style
+            continue
+        if start > position:
+            output.append(_escape_text(html_content[position:start]))
+        position = match.end()
         
-        html_content = re.sub(pattern, clean_attrs, html_content, flags=re.IGNORECASE)
+        token = match.group()
+        cleaned = _cleaned_tags.get(token)
+        if cleaned is None:
+            cleaned = _clean_tag(match)
+            if cleaned is None:
+                end = _DROPPED_CONTENT_END_RES[match.group('name').lower()].search(html_content, position)
+                # An unclosed script or style removes the rest of the document
+                position = end.end() if end else len(html_content)
+                continue
+            if len(token) <= CLEANED_TAG_MAX_LENGTH:
+                if len(_cleaned_tags) >= CLEANED_TAG_CACHE_SIZE:
+                    _cleaned_tags.clear()
+                _cleaned_tags[token] = cleaned
+        if cleaned:
+            output.append(cleaned)
     
-    return html_content
+    if position < len(html_content):
+        output.append(_escape_text(html_content[position:]))
+    return ''.join(output)
 
 
 def validate_meal_name(name: str) -> str:
@@ -166,3 +242,27 @@ def sanitize_filename(filename: Optional[str]) -> Optional[str]:
         filename = filename[:255]
     
     return filename
+
+
+def validate_photos(photos: Optional[list]) -> Optional[list]:
+    """
+    Validate the photos array of a meal.
+    Entries without a usable filename are skipped. Only the filename and is_primary are
+    kept: placeholders are built by the server (storage.attach_photo_placeholders), so
+    any placeholder or other key sent by the client is dropped.
+    """
+    if photos is None:
+        return None
+    
+    validated = []
+    for photo in photos:
+        if not isinstance(photo, dict) or not isinstance(photo.get("filename"), str):
+            continue
+        filename = sanitize_filename(photo["filename"])
+        if not filename:
+            continue
+        entry = {"filename": filename}
+        if "is_primary" in photo:
+            entry["is_primary"] = photo["is_primary"] is True
+        validated.append(entry)
+    return validated
@@ -0,0 +1,69 @@
+"""
+Gunicorn configuration: several uvicorn worker processes, so Python work uses more
+than one core.
+Run with: gunicorn -c gunicorn.conf.py app.main:app
+The master imports the app (FastAPI, SQLAlchemy, EasyOCR/torch, OpenCV) before forking
+the workers, which then share those pages copy-on-write instead of each importing its
+own copy; with PRELOAD_OCR_MODELS the EasyOCR models are loaded in the master too.
+Run `python -m app.migrate` first: workers only check the database revision.
+See docs/deployment/README.md for the memory and throughput tradeoffs.
+"""
+import gc
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Before anything else is imported: workers check the revision, app.migrate upgrades
+os.environ.setdefault("STARTUP_MIGRATIONS", "check")
+
+from app.config import PRELOAD_APP, PRELOAD_OCR_MODELS, WEB_CONCURRENCY
+from app.photo_urls import SHARED_SIGNING_KEY
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = WEB_CONCURRENCY
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = PRELOAD_APP
+
+# A photo URL signed by one worker must verify on the others
+if workers > 1 and not SHARED_SIGNING_KEY:
+    raise RuntimeError(
+        "PHOTO_URL_SECRET (or SUPABASE_JWT_SECRET) must be set to run more than one worker: "
+        "otherwise each worker signs photo URLs with its own random key."
+    )
+
+# No collections in the master until the workers are forked: freed objects would leave
+# holes in pages that are otherwise shared (see when_ready)
+if preload_app:
+    gc.disable()
+
+
+def _load_ocr_models():
+    from app.routes.meals import get_ocr_reader
+    get_ocr_reader()
+
+
+def when_ready(server):
+    """Master, app imported, before the first fork"""
+    if not preload_app:
+        return
+    if PRELOAD_OCR_MODELS:
+        _load_ocr_models()
+    # Move everything imported so far out of the collector's reach: a collection in a
+    # worker would otherwise write to every object's GC header and copy its page
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    gc.enable()
+    # Connections opened by the master must not be shared with the workers
+    from app.database import engine
+    engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    if PRELOAD_OCR_MODELS and not preload_app:
+        _load_ocr_models()
@@ -7,6 +7,7 @@ from fastapi import FastAPI
 from app.main import app as easymeal_app
 from app.config import DISABLE_AUTH
 from app.database import init_db
+from app.migrate import upgrade_database
 
 app = FastAPI(title="EasyMeal Local")
 app.mount("/easymeal", easymeal_app)
@@ -14,7 +15,11 @@ app.mount("/easymeal", easymeal_app)
 
 @app.on_event("startup")
 async def ensure_tables():
-    """Mounted app's startup does not run; create tables when DISABLE_AUTH (e.g. SQLite)."""
+    """Mounted app's startup does not run; migrate, and create tables when DISABLE_AUTH (e.g. SQLite)."""
+    try:
+        upgrade_database()
+    except Exception as e:
+        print(f"Warning: Could not run migrations: {e}")
     if DISABLE_AUTH:
         try:
             init_db()
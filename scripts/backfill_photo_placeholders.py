@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compute low-quality placeholders for photos stored before placeholders existed.
+Each meal's photos array gets a "placeholder" (tiny inline JPEG) per photo; meals that
+only have the legacy photo_filename get a one-entry photos array for it.
+Run with: python scripts/backfill_photo_placeholders.py [--dry-run] [--workers 4] [--batch-size 100]
+Uses the same environment as the app (DATABASE_URL, Supabase or LOCAL_PHOTOS_PATH).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def photos_missing_placeholders(meal):
+    """The meal's photos array (legacy photo_filename included) and the filenames lacking a placeholder"""
+    photos = [dict(p) for p in meal.photos or [] if isinstance(p, dict) and p.get("filename")]
+    if not photos and meal.photo_filename:
+        photos = [{"filename": meal.photo_filename, "is_primary": True}]
+    return photos, [p["filename"] for p in photos if not p.get("placeholder")]
+
+
+def build_placeholder(filename):
+    from app.storage import get_photo_bytes, make_placeholder
+    try:
+        return filename, make_placeholder(get_photo_bytes(filename))
+    except Exception as e:
+        print(f"Warning: {filename}: {e}")
+        return filename, None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="Count photos without placeholders, change nothing")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent downloads/decodes (default: IMAGE_PROCESSING_WORKERS)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Meals per commit")
+    args = parser.parse_args()
+
+    from app.config import IMAGE_PROCESSING_WORKERS
+    from app.database import SessionLocal, Meal
+
+    db = SessionLocal()
+    try:
+        meal_ids = [meal_id for (meal_id,) in db.query(Meal.id).order_by(Meal.id)]
+        updated_meals = 0
+        built = 0
+        failed = 0
+        missing_total = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers or IMAGE_PROCESSING_WORKERS) as pool:
+            for i in range(0, len(meal_ids), args.batch_size):
+                meals = db.query(Meal).filter(Meal.id.in_(meal_ids[i:i + args.batch_size])).all()
+                pending = {}
+                for meal in meals:
+                    photos, missing = photos_missing_placeholders(meal)
+                    if missing:
+                        pending[meal.id] = (meal, photos)
+                        missing_total += len(missing)
+                if args.dry_run or not pending:
+                    continue
+                filenames = {f for _, photos in pending.values() for f in (p["filename"] for p in photos if not p.get("placeholder"))}
+                placeholders = dict(pool.map(build_placeholder, sorted(filenames)))
+                for meal, photos in pending.values():
+                    changed = False
+                    for photo in photos:
+                        placeholder = placeholders.get(photo["filename"])
+                        if not photo.get("placeholder") and placeholder:
+                            photo["placeholder"] = placeholder
+                            changed = True
+                    if changed:
+                        # Assign a new list so SQLAlchemy sees the JSON change
+                        meal.photos = photos
+                        updated_meals += 1
+                built += sum(1 for p in placeholders.values() if p)
+                failed += sum(1 for p in placeholders.values() if not p)
+                db.commit()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    if args.dry_run:
+        print(f"{missing_total} photos in {len(meal_ids)} meals have no placeholder (dry run, nothing changed)")
+    else:
+        print(f"Built {built} placeholders ({failed} failed), updated {updated_meals} meals in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark image optimization on 12MP inputs: throughput and peak memory.
+Compares the previous pipeline (full-resolution decode, flatten, LANCZOS, encode)
+with app.storage.optimize_image (JPEG draft decoding + reducing_gap resize),
+sequentially and through the bounded image pool.
+Run with: python scripts/bench_image_optimize.py [--images 12] [--workers 4]
+Each variant runs in a fresh subprocess so peak RSS is measured independently.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+VARIANTS = ("baseline", "optimized", "optimized-pool")
+
+
+def make_jpeg(width: int = 4000, height: int = 3000) -> bytes:
+    """Build a 12MP JPEG with photo-like entropy (noise over gradients)."""
+    from PIL import Image
+    noise = Image.effect_noise((width, height), 40)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (noise, gradient, gradient.transpose(Image.Transpose.ROTATE_180)))
+    output = BytesIO()
+    img.save(output, format="JPEG", quality=92)
+    return output.getvalue()
+
+
+def baseline_optimize(image_data: bytes, max_width: int = 1920, max_height: int = 1920, quality: int = 85) -> bytes:
+    """The previous optimize_image implementation, kept here for comparison."""
+    from PIL import Image
+    img = Image.open(BytesIO(image_data))
+    if img.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    original_width, original_height = img.size
+    ratio = min(max_width / original_width, max_height / original_height, 1.0)
+    if ratio < 1.0:
+        img = img.resize((int(original_width * ratio), int(original_height * ratio)), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    output.seek(0)
+    return output.read()
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_variant(variant: str, images: int, input_path: str) -> dict:
+    from app import storage
+    with open(input_path, "rb") as f:
+        data = f.read()
+    rss_before = max_rss_mb()
+    start = time.perf_counter()
+    if variant == "baseline":
+        for _ in range(images):
+            baseline_optimize(data)
+    elif variant == "optimized":
+        for _ in range(images):
+            storage.optimize_image(data)
+    else:
+        async def run_all():
+            await asyncio.gather(*(storage.run_image_task(storage.optimize_image, data) for _ in range(images)))
+        asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    return {
+        "variant": variant,
+        "images": images,
+        "seconds": elapsed,
+        "images_per_sec": images / elapsed,
+        "peak_rss_mb": max_rss_mb(),
+        "peak_rss_delta_mb": max_rss_mb() - rss_before,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=None, help="IMAGE_PROCESSING_WORKERS for the pool variant")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.images, args.input)))
+        return 0
+
+    env = dict(os.environ)
+    if args.workers:
+        env["IMAGE_PROCESSING_WORKERS"] = str(args.workers)
+    # Generate the input once, in this process, so children only measure optimization
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
+        f.write(make_jpeg())
+        input_path = f.name
+    print(f"12MP input: {os.path.getsize(input_path) / 1024:.0f}KB, {os.cpu_count()} CPUs")
+    print(f"{'variant':<16}{'img/s':>8}{'seconds':>10}{'peak RSS MB':>13}{'Δ RSS MB':>10}")
+    try:
+        for variant in VARIANTS:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--variant", variant,
+                 "--images", str(args.images), "--input", input_path],
+                check=True, capture_output=True, text=True, env=env,
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"{r['variant']:<16}{r['images_per_sec']:>8.2f}{r['seconds']:>10.2f}"
+                  f"{r['peak_rss_mb']:>13.1f}{r['peak_rss_delta_mb']:>10.1f}")
+    finally:
+        os.unlink(input_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/meals on a large collection of meals with long descriptions.
+Compares output schemas that re-run the input validators (MealBase) on every meal,
+the trusted MealResponse through response_model, and app.routes.meals.get_meals
+(row tuples, schemas.meal_response_data, orjson).
+Run with: python scripts/bench_meal_list.py [--meals 10000] [--description-kb 4] [--repeat 5]
+All variants serve the same temporary SQLite DB in-process. Meals are stored the way
+the API stores them (validated input); the script checks that the trusted variants
+return byte-identical bodies before timing them.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_db_dir = tempfile.mkdtemp(prefix="bench_meal_list_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/meals.db")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+VARIANTS = ("revalidating", "response-model", "orjson-rows")
+
+DESCRIPTION_PARAGRAPH = (
+    "<p><strong>Ingredients</strong></p><ul><li>200 g flour</li><li>2 eggs</li>"
+    "<li>250 ml milk &amp; a pinch of salt</li></ul><p>Whisk, rest 30 minutes, then cook "
+    "in a hot pan. <a href=\"https://example.com/crepes\" target=\"_blank\">Source</a></p>"
+)
+PLACEHOLDER = "data:image/jpeg;base64," + "A" * 600
+
+
+def seed(meals: int, description_kb: int):
+    from app import schemas
+    from app.database import Base, SessionLocal, engine, Meal
+    from app.descriptions import description_fields
+    Base.metadata.create_all(bind=engine)
+    repeats = max(1, description_kb * 1024 // len(DESCRIPTION_PARAGRAPH))
+    description = DESCRIPTION_PARAGRAPH * repeats
+    db = SessionLocal()
+    rng = random.Random(42)
+    for i in range(meals):
+        photos = [
+            {"filename": f"{i:08d}-{j}.jpg", "is_primary": j == 0, "placeholder": PLACEHOLDER}
+            for j in range(rng.randint(0, 3))
+        ]
+        meal = schemas.MealCreate(
+            name=f"Crêpes & co #{i}",
+            description=description if i % 4 else None,
+            url=f"https://example.com/recipes/{i}" if i % 3 else None,
+            photos=photos or None,
+        )
+        db.add(Meal(**meal.model_dump(), **description_fields(meal.description)))
+    db.commit()
+    db.close()
+
+
+def build_app():
+    """The real meals router plus ORM + response_model list endpoints under /bench"""
+    from typing import List
+    from fastapi import Depends, FastAPI
+    from sqlalchemy.orm import Session
+    from app import schemas
+    from app.database import Meal, get_db
+    from app.routes import meals
+
+    class RevalidatingMealResponse(schemas.MealResponse, schemas.MealBase):
+        """The output schema before input and output were split"""
+
+    app = FastAPI()
+    app.include_router(meals.router)
+
+    @app.get("/bench/revalidating", response_model=List[RevalidatingMealResponse])
+    async def revalidating_meals(db: Session = Depends(get_db)):
+        return db.query(Meal).order_by(Meal.created_at.desc()).all()
+
+    @app.get("/bench/response-model", response_model=List[schemas.MealResponse])
+    async def response_model_meals(db: Session = Depends(get_db)):
+        return db.query(Meal).order_by(Meal.created_at.desc()).all()
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--meals", type=int, default=10000)
+    parser.add_argument("--description-kb", type=int, default=4, help="Approximate length of each description")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed requests per variant")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+
+    seed(args.meals, args.description_kb)
+    client = TestClient(build_app())
+    paths = {
+        "revalidating": "/bench/revalidating",
+        "response-model": "/bench/response-model",
+        "orjson-rows": "/api/meals",
+    }
+
+    bodies = {variant: client.get(path).content for variant, path in paths.items()}
+    identical = bodies["response-model"] == bodies["orjson-rows"]
+    print(f"{args.meals} meals, ~{args.description_kb}KB descriptions, "
+          f"{len(bodies['orjson-rows']) / 1024:.0f}KB response, "
+          f"response-model and orjson-rows byte-identical: {'yes' if identical else 'NO'}")
+    print(f"{'variant':<16}{'median ms':>12}{'min ms':>10}")
+    for variant, path in paths.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+        print(f"{variant:<16}{statistics.median(timings):>12.1f}{min(timings):>10.1f}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
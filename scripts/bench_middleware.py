@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-request middleware overhead.
+Compares the app's four middlewares (access logging, security headers, secure
+cookies, CSRF) as pure ASGI against the same logic on BaseHTTPMiddleware, and
+against no middleware, for a small JSON response and a 1MB streamed response.
+Run with: python scripts/bench_middleware.py [--requests 3000] [--with-logging]
+Requests are driven straight through the ASGI interface (no server, no sockets).
+By default access logging is disabled so only the middleware mechanics are measured;
+--with-logging writes the access logs to a temporary file, the previous way
+(logger + print with flush on the event loop) vs the queued JSON logger.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+VARIANTS = ("no-middleware", "base-http", "pure-asgi")
+STREAM_CHUNK = b"x" * 64 * 1024
+STREAM_CHUNKS = 16
+
+
+def base_http_middlewares():
+    """The previous BaseHTTPMiddleware implementations (same header logic), for comparison."""
+    import logging
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from app.cookie_security import secure_cookie
+    from app.csrf import CSRF_PROTECTED_METHODS, get_csrf_token_from_request, validate_csrf_token
+    from app.security_headers import SecurityHeadersMiddleware
+    from app.security_logging import get_client_info
+    from fastapi.responses import JSONResponse
+
+    security_headers = SecurityHeadersMiddleware(None).security_headers
+    
+    # Previous access logger: synchronous StreamHandler on the event loop
+    access_logger = logging.getLogger("bench.access.sync")
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+    if not access_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+        access_logger.addHandler(handler)
+    access_logger.disabled = logging.getLogger("access").disabled
+
+    class AccessLogging(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start_time = time.time()
+            info = get_client_info(request)
+            response = await call_next(request)
+            message = (f'{info["ip"]} - - "{info["method"]} {info["path"]} HTTP/1.1" {response.status_code} - '
+                       f'"{info.get("referer")}" "{info.get("user_agent")}" {time.time() - start_time:.4f}s')
+            if not access_logger.disabled:
+                access_logger.info(message)
+                print(message, flush=True)
+            return response
+
+    class SecurityHeaders(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            for name, value in security_headers.items():
+                response.headers[name] = value
+            return response
+
+    class SecureCookies(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            if "Set-Cookie" in response.headers:
+                cookies = response.headers.get_list("Set-Cookie")
+                response.headers.pop("Set-Cookie", None)
+                for cookie in cookies:
+                    response.headers.append("Set-Cookie", secure_cookie(cookie, False))
+            return response
+
+    class CSRF(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            if request.method in CSRF_PROTECTED_METHODS:
+                auth = request.headers.get("Authorization")
+                if auth and auth.lower().startswith("bearer ") and \
+                        not validate_csrf_token(request, get_csrf_token_from_request(request)):
+                    return JSONResponse(status_code=403, content={"detail": "CSRF token missing or invalid"})
+            return await call_next(request)
+
+    return AccessLogging, SecurityHeaders, SecureCookies, CSRF
+
+
+def build_app(variant: str):
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+
+    @app.get("/json")
+    async def json_endpoint():
+        return {"id": 1, "name": "Pancakes"}
+
+    @app.get("/stream")
+    async def stream_endpoint():
+        async def chunks():
+            for _ in range(STREAM_CHUNKS):
+                yield STREAM_CHUNK
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    # Same order as app/main.py: the first added ends up innermost
+    if variant == "pure-asgi":
+        from app.access_logging import AccessLoggingMiddleware
+        from app.cookie_security import SecureCookieMiddleware
+        from app.csrf import CSRFProtectionMiddleware
+        from app.security_headers import SecurityHeadersMiddleware
+        app.add_middleware(AccessLoggingMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(SecureCookieMiddleware)
+        app.add_middleware(CSRFProtectionMiddleware)
+    elif variant == "base-http":
+        for middleware in base_http_middlewares():
+            app.add_middleware(middleware)
+    return app
+
+
+async def call(app, path: str) -> int:
+    """Send one GET through the ASGI app; returns the number of body bytes received."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+    }
+    received = False
+    never = asyncio.Event()
+    body = 0
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Client stays connected: block until the app stops listening
+        await never.wait()
+
+    async def send(message):
+        nonlocal body
+        if message["type"] == "http.response.body":
+            body += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return body
+
+
+async def measure(app, path: str, requests: int) -> float:
+    for _ in range(min(200, requests)):
+        await call(app, path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app, path)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--with-logging", action="store_true", help="Write access logs (to a temporary file)")
+    args = parser.parse_args()
+
+    from app.access_logging import access_logger, stop_access_log_listener
+    access_logger.disabled = not args.with_logging
+
+    results = {}
+    with tempfile.TemporaryFile("w") as log_file, \
+            contextlib.redirect_stdout(log_file if args.with_logging else io.StringIO()), \
+            contextlib.redirect_stderr(log_file if args.with_logging else sys.stderr):
+        for variant in VARIANTS:
+            app = build_app(variant)
+            results[variant] = (
+                asyncio.run(measure(app, "/json", args.requests)),
+                asyncio.run(measure(app, "/stream", max(1, args.requests // 10))),
+            )
+        stop_access_log_listener()
+
+    base_json, base_stream = results["no-middleware"]
+    print(f"{args.requests} requests (streamed: {args.requests // 10} x {len(STREAM_CHUNK) * STREAM_CHUNKS // 1024}KB)")
+    print(f"{'variant':<15}{'json us/req':>13}{'overhead':>10}{'stream us/req':>15}{'overhead':>10}")
+    for variant, (json_us, stream_us) in results.items():
+        print(f"{variant:<15}{json_us:>13.0f}{json_us - base_json:>10.0f}{stream_us:>15.0f}{stream_us - base_stream:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
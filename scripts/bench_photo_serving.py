@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark local photo serving under concurrent requests: throughput and server RSS.
+Compares the previous path (read the whole file into BytesIO, wrap it in a
+StreamingResponse) with app.file_responses.build_file_response.
+Run with: python scripts/bench_photo_serving.py [--requests 200] [--concurrency 20]
+Each variant runs in its own uvicorn process; peak RSS is read from /proc (Linux).
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+VARIANTS = ("streaming-bytesio", "file-response")
+
+
+def build_app(variant: str, photos_dir: str):
+    """ASGI app exposing /photos/{filename} with the given serving strategy."""
+    from io import BytesIO
+    from pathlib import Path
+    from fastapi import FastAPI, Request
+    from fastapi.responses import StreamingResponse
+    from app.file_responses import build_file_response
+
+    app = FastAPI()
+
+    if variant == "streaming-bytesio":
+        @app.get("/photos/{filename}")
+        async def serve(filename: str):
+            data = BytesIO((Path(photos_dir) / filename).read_bytes())
+            return StreamingResponse(data, media_type="image/jpeg")
+    else:
+        @app.get("/photos/{filename}")
+        async def serve(filename: str, request: Request):
+            return await build_file_response(request, os.path.join(photos_dir, filename), "image/jpeg")
+
+    return app
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def read_rss_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+async def load(port: int, filenames, total: int, concurrency: int) -> float:
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        counter = iter(range(total))
+
+        async def worker():
+            for i in counter:
+                response = await client.get(f"/photos/{filenames[i % len(filenames)]}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def run_variant(variant: str, photos_dir: str, filenames, args) -> None:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", variant, "--photos-dir", photos_dir, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        idle_rss = read_rss_kb(server.pid, "VmRSS")
+        elapsed = asyncio.run(load(port, filenames, args.requests, args.concurrency))
+        peak_rss = read_rss_kb(server.pid, "VmHWM")
+        print(f"{variant:<20}{args.requests / elapsed:>10.0f}{idle_rss / 1024:>12.1f}{peak_rss / 1024:>12.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--photos", type=int, default=20, help="Number of distinct photo files")
+    parser.add_argument("--photo-kb", type=int, default=400, help="Size of each photo file")
+    parser.add_argument("--serve", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--photos-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        uvicorn.run(build_app(args.serve, args.photos_dir), host="127.0.0.1", port=args.port,
+                    log_level="warning", access_log=False)
+        return 0
+
+    with tempfile.TemporaryDirectory() as photos_dir:
+        filenames = []
+        for i in range(args.photos):
+            name = f"photo-{i}.jpg"
+            with open(os.path.join(photos_dir, name), "wb") as f:
+                f.write(b"\xff\xd8\xff" + os.urandom(args.photo_kb * 1024 - 3))
+            filenames.append(name)
+        print(f"{args.requests} requests, concurrency {args.concurrency}, {args.photo_kb}KB photos")
+        print(f"{'variant':<20}{'req/s':>10}{'idle RSS MB':>12}{'peak RSS MB':>12}")
+        for variant in VARIANTS:
+            run_variant(variant, photos_dir, filenames, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark photo requests per second with signed URLs vs unsigned legacy URLs.
+Unsigned requests prove ownership with a DB lookup (photo_filename, then a scan
+of the photos arrays); signed requests only verify the HMAC in the query string.
+Run with: python scripts/bench_photo_urls.py [--requests 2000] [--concurrency 20] [--meals 1000]
+Serves app.routes.static from a uvicorn subprocess against a temporary SQLite DB.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+VARIANTS = ("unsigned", "signed")
+
+
+def build_app():
+    """ASGI app exposing only the photo route, mounted like the real app."""
+    from fastapi import FastAPI
+    from app.routes import static
+    app = FastAPI()
+    app.include_router(static.router)
+    return app
+
+
+def seed(meals: int, photo_kb: int):
+    """Create the meals table with one photo per meal, half in photo_filename, half in photos."""
+    from app.database import Base, SessionLocal, engine, Meal
+    from app.config import LOCAL_PHOTOS_PATH
+    Base.metadata.create_all(bind=engine)
+    os.makedirs(LOCAL_PHOTOS_PATH, exist_ok=True)
+    db = SessionLocal()
+    filenames = []
+    for i in range(meals):
+        name = f"photo-{i}.jpg"
+        with open(os.path.join(LOCAL_PHOTOS_PATH, name), "wb") as f:
+            f.write(b"\xff\xd8\xff" + os.urandom(photo_kb * 1024 - 3))
+        if i % 2:
+            db.add(Meal(name=f"Meal {i}", photo_filename=name))
+        else:
+            db.add(Meal(name=f"Meal {i}", photos=[{"filename": name, "is_primary": True}]))
+        filenames.append(name)
+    db.commit()
+    db.close()
+    return filenames
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def load(port: int, urls, total: int, concurrency: int) -> float:
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}/", limits=limits, timeout=60) as client:
+        counter = iter(range(total))
+
+        async def worker():
+            for i in counter:
+                response = await client.get(urls[i % len(urls)])
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--meals", type=int, default=1000, help="Meals (one photo each) in the database")
+    parser.add_argument("--photo-kb", type=int, default=4, help="Size of each photo file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        import uvicorn
+        uvicorn.run(build_app(), host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+        return 0
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update(
+            DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}",
+            LOCAL_PHOTOS_PATH=os.path.join(workdir, "photos"),
+            PHOTO_URL_SECRET="bench-secret",
+        )
+        os.environ.update(env)
+        from app.photo_urls import signed_photo_url
+        filenames = seed(args.meals, args.photo_kb)
+        random.seed(0)
+        random.shuffle(filenames)
+        urls = {
+            "unsigned": [f"static/photos/{name}" for name in filenames],
+            "signed": [signed_photo_url(name) for name in filenames],
+        }
+
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            print(f"{args.requests} requests, concurrency {args.concurrency}, {args.meals} meals")
+            print(f"{'variant':<12}{'req/s':>10}")
+            for variant in VARIANTS:
+                # Warm up connections and caches before timing
+                asyncio.run(load(port, urls[variant], min(200, args.requests), args.concurrency))
+                elapsed = asyncio.run(load(port, urls[variant], args.requests, args.concurrency))
+                print(f"{variant:<12}{args.requests / elapsed:>10.0f}")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
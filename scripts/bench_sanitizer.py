@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Differential check and benchmark of app.validators.sanitize_rich_html.
+Compares the single-pass sanitizer with the previous regex cascade (kept below as
+legacy_sanitize_rich_html) on a corpus of Quill-shaped documents, known XSS vectors
+and random fragment soup, then times both on Quill descriptions of 1KB and 10KB.
+Run with: python scripts/bench_sanitizer.py [--fuzz 5000] [--repeat 200]
+Checks, for every output of the new sanitizer: only allowed tags and attributes, no
+script-capable href, no comments, and sanitizing again changes nothing. Quill
+documents must come out exactly as expected, and equivalent to the legacy output
+once the legacy bugs (dropped closing tags, double-escaped attribute values) are
+normalized away. Exits with 1 if a check fails.
+"""
+import argparse
+import html
+import os
+import random
+import re
+import sys
+import time
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.validators import ALLOWED_HTML_ATTRIBUTES, ALLOWED_HTML_TAGS, sanitize_rich_html
+
+
+def legacy_sanitize_rich_html(html_content: str) -> str:
+    """sanitize_rich_html before the single-pass rewrite (regex cascade)"""
+    if not html_content:
+        return html_content
+    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.IGNORECASE | re.DOTALL)
+    html_content = re.sub(r'\s*on\w+\s*=\s*["\'][^"\']*["\']', '', html_content, flags=re.IGNORECASE)
+    html_content = re.sub(r'javascript:', '', html_content, flags=re.IGNORECASE)
+    html_content = re.sub(r'data:text/html', '', html_content, flags=re.IGNORECASE)
+    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.IGNORECASE | re.DOTALL)
+    html_content = re.sub(r'\s*style\s*=\s*["\'][^"\']*["\']', '', html_content, flags=re.IGNORECASE)
+    allowed_tags_pattern = '|'.join(ALLOWED_HTML_TAGS)
+    html_content = re.sub(
+        r'</?(?!' + allowed_tags_pattern + r'\b)[^>]+>',
+        '',
+        html_content,
+        flags=re.IGNORECASE
+    )
+    for tag in ALLOWED_HTML_TAGS:
+        pattern = rf'<{tag}\s+([^>]*)>'
+        def clean_attrs(match):
+            attrs = match.group(1)
+            allowed_attrs = []
+            for attr in ALLOWED_HTML_ATTRIBUTES:
+                attr_pattern = rf'\b{attr}\s*=\s*["\']([^"\']*)["\']'
+                attr_match = re.search(attr_pattern, attrs, re.IGNORECASE)
+                if attr_match:
+                    allowed_attrs.append(f'{attr}="{html.escape(attr_match.group(1))}"')
+            if allowed_attrs:
+                return f'<{tag} {" ".join(allowed_attrs)}>'
+            return f'<{tag}>'
+        html_content = re.sub(pattern, clean_attrs, html_content, flags=re.IGNORECASE)
+    return html_content
+
+
+# Corpus
+
+WORDS = ["flour", "eggs", "milk", "salt", "butter", "Crêpes", "café", "20 min", "5 < 6", "a & b", "x > y", "«bio»"]
+LINKS = ["https://example.com/crepes", "http://example.com/?a=1&b=2", "https://example.com/r?q=\"x\"", "/recipes/12"]
+
+
+def quill_document(rng: random.Random):
+    """A description as Quill 1.3.7 serializes it, and its expected sanitized form"""
+    source, expected = [], []
+
+    def text():
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+        escaped = html.escape(words, quote=False)
+        return escaped, escaped
+
+    def inline():
+        fragment, clean = text()
+        roll = rng.random()
+        if roll < 0.15:
+            tag = rng.choice(["strong", "em", "u"])
+            return f"<{tag}>{fragment}</{tag}>", f"<{tag}>{clean}</{tag}>"
+        if roll < 0.25:
+            href = html.escape(rng.choice(LINKS))
+            return (
+                f'<a href="{href}" rel="noopener noreferrer" target="_blank">{fragment}</a>',
+                f'<a href="{href}" rel="noopener noreferrer" target="_blank">{clean}</a>',
+            )
+        return fragment, clean
+
+    def line():
+        parts = [inline() for _ in range(rng.randint(1, 4))]
+        return "".join(p[0] for p in parts), "".join(p[1] for p in parts)
+
+    for _ in range(rng.randint(1, 12)):
+        roll = rng.random()
+        if roll < 0.1:
+            source.append("<p><br></p>")
+            expected.append("<p><br></p>")
+        elif roll < 0.25:
+            tag = rng.choice(["h1", "h2", "h3"])
+            content, clean = line()
+            source.append(f"<{tag}>{content}</{tag}>")
+            expected.append(f"<{tag}>{clean}</{tag}>")
+        elif roll < 0.45:
+            tag = rng.choice(["ol", "ul"])
+            items = [line() for _ in range(rng.randint(1, 5))]
+            source.append(f"<{tag}>" + "".join(
+                f'<li class="ql-indent-1">{c}</li>' if rng.random() < 0.2 else f"<li>{c}</li>" for c, _ in items
+            ) + f"</{tag}>")
+            expected.append(f"<{tag}>" + "".join(f"<li>{c}</li>" for _, c in items) + f"</{tag}>")
+        else:
+            content, clean = line()
+            if rng.random() < 0.15:
+                source.append(f'<p class="ql-align-center">{content}</p>')
+            else:
+                source.append(f"<p>{content}</p>")
+            expected.append(f"<p>{clean}</p>")
+    return "".join(source), "".join(expected)
+
+
+ATTACKS = [
+    '<script>alert(1)</script>',
+    '<SCRIPT SRC=//evil.example/x.js></SCRIPT>',
+    '<script>alert(1)',
+    '<scr<script>ipt>alert(1)</script>',
+    '<img src=x onerror=alert(1)>',
+    '<img src="x" onerror="alert(1)">',
+    '<image src=x onerror=alert(1)>',
+    '<iframe src="javascript:alert(1)"></iframe>',
+    '<body onload=alert(1)>',
+    '<base href="https://evil.example/">',
+    '<button formaction=javascript:alert(1)>x</button>',
+    '<audio src=x onerror=alert(1)>',
+    '<picture><source srcset=x onerror=alert(1)></picture>',
+    '<svg onload=alert(1)>',
+    '<svg><script>alert(1)</script></svg>',
+    '<math><mtext><table><mglyph><style><img src=x onerror=alert(1)>',
+    '<p onclick=alert(1)>x</p>',
+    '<p onclick="alert(1)" style="color:red">x</p>',
+    '<a href="javascript:alert(1)">x</a>',
+    '<a href="JaVaScRiPt:alert(1)">x</a>',
+    '<a href="java&#115;cript:alert(1)">x</a>',
+    '<a href="java&#x09;script:alert(1)">x</a>',
+    '<a href=" javascript:alert(1)">x</a>',
+    '<a href="jav\tascript:alert(1)">x</a>',
+    '<a href="javajavascript:script:alert(1)">x</a>',
+    '<a href="vbscript:msgbox(1)">x</a>',
+    '<a href="data:text/html;base64,PHNjcmlwdD5hbGVydCgxKTwvc2NyaXB0Pg==">x</a>',
+    '<a href=javascript:alert(1)>x</a>',
+    "<a href='javascript:alert(1)'>x</a>",
+    '<a href="https://ok.example" onmouseover=alert(1)>x</a>',
+    '<a title="x" href="https://ok.example/" >x</a>',
+    '<a href="https://ok.example/">x</a >',
+    '<a href="x" href="javascript:alert(1)">x</a>',
+    '<p title="a>b">x</p>',
+    '<!--<img src=x onerror=alert(1)>-->',
+    '<!-- unterminated <img src=x onerror=alert(1)>',
+    '<!doctype html><?xml version="1.0"?>x',
+    '<style>body{background:url(javascript:alert(1))}</style>',
+    '<div style="background:url(javascript:alert(1))">x</div>',
+    '<object data="javascript:alert(1)"></object>',
+    '<embed src="javascript:alert(1)">',
+    '<form><input type=submit formaction=javascript:alert(1)></form>',
+    '<meta http-equiv="refresh" content="0;url=javascript:alert(1)">',
+    '<link rel=stylesheet href=javascript:alert(1)>',
+    '<table background="javascript:alert(1)">',
+    '<textarea></textarea><img src=x onerror=alert(1)>',
+    '<noscript><p title="</noscript><img src=x onerror=alert(1)>">',
+    '<p <img src=x onerror=alert(1)>>x</p>',
+    '<<script>script>alert(1)<</script>/script>',
+    '<a/href="javascript:alert(1)">x</a>',
+    '<a href="&#106;&#97;&#118;&#97;&#115;&#99;&#114;&#105;&#112;&#116;&#58;alert(1)">x</a>',
+    '<pre><code>if (a < b && c > d) {}</code></pre>',
+    '<blockquote cite="javascript:alert(1)">q</blockquote>',
+]
+
+SOUP = [
+    "<", ">", "&", "&amp;", "&lt;", "&#60;", "\"", "'", "=", " ", "/", "\t", "\n", "-->", "<!--",
+    "<p>", "</p>", "<a href=\"https://x.example/?a=1&amp;b=2\">", "</a>", "<br>", "<br/>",
+    "<img", " src=x", " onerror=alert(1)", " onclick=\"alert(1)\"", " style='x'", "<script>", "</script>",
+    "<style>", "</style>", "javascript:", "data:text/html", "<svg", "<i>", "<iframe", "<strong>", "<h1>",
+    "<li class=\"ql-indent-1\">", "text", "Crêpes", "<a href=javascript:alert(1)>", "<a href='ok'>",
+]
+
+
+def soup_document(rng: random.Random) -> str:
+    return "".join(rng.choice(SOUP) for _ in range(rng.randint(1, 40)))
+
+
+# Checks
+
+def is_safe_href(value: str) -> bool:
+    compact = re.sub(r"[\x00-\x20\x7f]", "", value).lower()
+    return not compact.startswith(("javascript:", "vbscript:", "data:"))
+
+
+class SafetyChecker(HTMLParser):
+    """Collects violations of the sanitizer's output contract"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.violations = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ALLOWED_HTML_TAGS:
+            self.violations.append(f"tag <{tag}>")
+        for name, value in attrs:
+            if tag != "a" or name not in ALLOWED_HTML_ATTRIBUTES:
+                self.violations.append(f"attribute {name} on <{tag}>")
+            elif name == "href" and not is_safe_href(value or ""):
+                self.violations.append(f"href {value!r}")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag not in ALLOWED_HTML_TAGS:
+            self.violations.append(f"end tag </{tag}>")
+
+    def handle_comment(self, data):
+        self.violations.append("comment")
+
+    def handle_decl(self, decl):
+        self.violations.append("declaration")
+
+    def handle_pi(self, data):
+        self.violations.append("processing instruction")
+
+
+def violations(output: str):
+    checker = SafetyChecker()
+    checker.feed(output)
+    checker.close()
+    return checker.violations
+
+
+class Events(HTMLParser):
+    """Start tags (attributes fully unescaped) and text, ignoring end tags"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events = []
+
+    def handle_starttag(self, tag, attrs):
+        normalized = []
+        for name, value in sorted(attrs):
+            value = value or ""
+            while html.unescape(value) != value:
+                value = html.unescape(value)
+            normalized.append((name, value))
+        self.events.append(("tag", tag, tuple(normalized)))
+
+    def handle_data(self, data):
+        if self.events and self.events[-1][0] == "text":
+            self.events[-1] = ("text", self.events[-1][1] + data)
+        else:
+            self.events.append(("text", data))
+
+
+def normalized_events(output: str):
+    parser = Events()
+    parser.feed(output)
+    parser.close()
+    return parser.events
+
+
+def run_checks(args) -> bool:
+    rng = random.Random(args.seed)
+    quill = [quill_document(rng) for _ in range(args.quill)]
+    fuzz = [soup_document(rng) for _ in range(args.fuzz)]
+    ok = True
+
+    mismatched = [(src, exp) for src, exp in quill if sanitize_rich_html(src) != exp]
+    differs = [src for src, _ in quill
+               if normalized_events(sanitize_rich_html(src)) != normalized_events(legacy_sanitize_rich_html(src))]
+    print(f"quill documents:  {len(quill) - len(mismatched)}/{len(quill)} as expected, "
+          f"{len(quill) - len(differs)}/{len(quill)} equivalent to legacy (normalized)")
+    for src, exp in mismatched[:3]:
+        print(f"  unexpected: {src!r}\n    -> {sanitize_rich_html(src)!r}\n    expected {exp!r}")
+    for src in differs[:3]:
+        print(f"  differs from legacy: {src!r}\n    new    {sanitize_rich_html(src)!r}"
+              f"\n    legacy {legacy_sanitize_rich_html(src)!r}")
+    ok = ok and not mismatched and not differs
+
+    cases = [src for src, _ in quill] + ATTACKS + fuzz
+    unsafe, unstable = [], []
+    for src in cases:
+        output = sanitize_rich_html(src)
+        if violations(output):
+            unsafe.append((src, output))
+        if sanitize_rich_html(output) != output:
+            unstable.append((src, output))
+    print(f"all {len(cases)} cases: {len(unsafe)} unsafe outputs, {len(unstable)} not idempotent")
+    for src, output in (unsafe + unstable)[:5]:
+        print(f"  {src!r}\n    -> {output!r} {violations(output)}")
+    ok = ok and not unsafe and not unstable
+
+    legacy_unsafe = [src for src in ATTACKS + fuzz if violations(legacy_sanitize_rich_html(src))]
+    print(f"legacy sanitizer: unsafe output on {sum(src in ATTACKS for src in legacy_unsafe)}/{len(ATTACKS)} "
+          f"attack vectors, {sum(src not in ATTACKS for src in legacy_unsafe)}/{len(fuzz)} fuzz cases")
+    return ok
+
+
+def description_of_size(size: int, rng: random.Random) -> str:
+    parts = []
+    while sum(map(len, parts)) < size:
+        parts.append(quill_document(rng)[0])
+    return "".join(parts)[:size]
+
+
+def run_benchmark(args) -> None:
+    rng = random.Random(args.seed)
+    print(f"{'size':<8}{'legacy us':>12}{'single-pass us':>16}{'speedup':>10}")
+    for size in (1024, 10 * 1024):
+        documents = [description_of_size(size, rng) for _ in range(20)]
+        timings = {}
+        for label, sanitize in (("legacy", legacy_sanitize_rich_html), ("new", sanitize_rich_html)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for document in documents:
+                    sanitize(document)
+            timings[label] = (time.perf_counter() - start) / (args.repeat * len(documents)) * 1e6
+        print(f"{size // 1024:>3}KB   {timings['legacy']:>12.1f}{timings['new']:>16.1f}"
+              f"{timings['legacy'] / timings['new']:>9.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quill", type=int, default=1000, help="Quill-shaped documents in the corpus")
+    parser.add_argument("--fuzz", type=int, default=5000, help="Random fragment-soup documents")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed passes over each benchmark document set")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ok = run_checks(args)
+    run_benchmark(args)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Benchmark gunicorn.conf.py: memory and throughput of the workers with and without preload.
+Starts `gunicorn -c gunicorn.conf.py app.main:app` once per mode and reports startup
+time, memory (PSS of the whole server, private memory per worker, before and after
+load) and GET /api/meals throughput; with --ocr-requests, OCR requests too.
+Run with: python scripts/bench_workers.py [--workers 4] [--preload-ocr] [--duration 10]
+PSS counts shared pages once, split between the processes sharing them, so the total
+PSS is the memory the server really uses. Linux only (/proc/<pid>/smaps_rollup).
+"""
+import argparse
+import http.client
+import io
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+_work_dir = tempfile.mkdtemp(prefix="bench_workers_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_work_dir}/meals.db")
+os.environ.setdefault("DISABLE_AUTH", "true")
+os.environ.setdefault("PHOTO_URL_SECRET", "bench-workers")
+
+MODES = {
+    "preload": "true",
+    "no-preload": "false",
+}
+READY_LINE = "Application startup complete"
+
+
+def seed(meals: int):
+    from app import schemas
+    from app.database import Base, SessionLocal, engine, Meal
+    from app.descriptions import description_fields
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    for i in range(meals):
+        meal = schemas.MealCreate(
+            name=f"Meal #{i}",
+            description="<p>Whisk, rest 30 minutes, then cook in a hot pan.</p>" * 4,
+            url=f"https://example.com/recipes/{i}",
+        )
+        db.add(Meal(**meal.model_dump(), **description_fields(meal.description)))
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def memory(pid: int) -> dict:
+    """Rss, Pss and private (Private_Clean + Private_Dirty) of a process, in MB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def worker_pids(master: int) -> list:
+    with open(f"/proc/{master}/task/{master}/children") as f:
+        return [int(pid) for pid in f.read().split()]
+
+
+def server_memory(master: int) -> dict:
+    workers = [memory(pid) for pid in worker_pids(master)]
+    master_memory = memory(master)
+    return {
+        "total_pss": master_memory["pss"] + sum(w["pss"] for w in workers),
+        "master_rss": master_memory["rss"],
+        "worker_rss": statistics.mean(w["rss"] for w in workers),
+        "worker_private": statistics.mean(w["private"] for w in workers),
+    }
+
+
+def start_server(mode: str, workers: int, port: int, preload_ocr: bool, log_path: str):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        PRELOAD_APP=MODES[mode],
+        PRELOAD_OCR_MODELS="true" if preload_ocr else "false",
+        BIND=f"127.0.0.1:{port}",
+        STARTUP_MIGRATIONS="skip",
+        STATIC_PRECOMPRESS="false",
+        ACCESS_LOG_SAMPLE_RATE="0",
+        LOCAL_PHOTOS_PATH=os.path.join(_work_dir, "photos"),
+        PHOTO_CACHE_DIR=os.path.join(_work_dir, "photo_cache"),
+    )
+    log = open(log_path, "w")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}, see {log_path}")
+        with open(log_path) as f:
+            if f.read().count(READY_LINE) >= workers:
+                break
+        time.sleep(0.1)
+    return process, time.perf_counter() - start
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=60)
+
+
+def run_load(port: int, duration: float, clients: int, request) -> float:
+    """Requests per second over duration with `clients` keep-alive connections"""
+    counts = [0] * clients
+    deadline = time.perf_counter() + duration
+
+    def client(index: int):
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while time.perf_counter() < deadline:
+            request(connection)
+            counts[index] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def get_meals(connection):
+    connection.request("GET", "/api/meals")
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise RuntimeError(f"GET /api/meals: {response.status}")
+
+
+def ocr_image() -> bytes:
+    from PIL import Image, ImageDraw
+    image = Image.new("RGB", (640, 240), "white")
+    ImageDraw.Draw(image).text((20, 100), "Crepes: 200 g flour, 2 eggs, 250 ml milk", fill="black")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def extract_text(body: bytes):
+    boundary = "benchboundary"
+    payload = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"recipe.jpg\"\r\n"
+        f"Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + body + f"\r\n--{boundary}--\r\n".encode()
+
+    def request(connection):
+        connection.request("POST", "/api/meals/extract-text-from-photo", body=payload,
+                           headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        response = connection.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"POST /api/meals/extract-text-from-photo: {response.status}")
+    return request
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--meals", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of GET /api/meals load per mode")
+    parser.add_argument("--preload-ocr", action="store_true", help="Load the EasyOCR models at startup")
+    parser.add_argument("--ocr-requests", type=int, default=0, help="OCR requests per mode after the GET load")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated: " + ", ".join(MODES))
+    args = parser.parse_args()
+
+    seed(args.meals)
+    image = ocr_image() if args.ocr_requests else None
+    print(f"{args.workers} workers, {os.cpu_count()} CPUs, OCR models at startup: "
+          f"{'yes' if args.preload_ocr else 'no'}; memory in MB")
+    print(f"{'mode':<12}{'startup s':>10}{'total PSS':>11}{'master RSS':>12}{'worker RSS':>12}"
+          f"{'worker private':>16}{'req/s':>8}{'PSS after':>11}{'private after':>15}{'OCR s':>8}")
+    for mode in args.modes.split(","):
+        port = free_port()
+        log_path = os.path.join(_work_dir, f"gunicorn-{mode}.log")
+        process, startup = start_server(mode, args.workers, port, args.preload_ocr, log_path)
+        try:
+            time.sleep(1)
+            before = server_memory(process.pid)
+            throughput = run_load(port, args.duration, args.clients, get_meals)
+            ocr_seconds = float("nan")
+            if args.ocr_requests:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+                request = extract_text(image)
+                timings = []
+                for _ in range(args.ocr_requests):
+                    start = time.perf_counter()
+                    request(connection)
+                    timings.append(time.perf_counter() - start)
+                connection.close()
+                ocr_seconds = statistics.median(timings)
+            after = server_memory(process.pid)
+        finally:
+            stop_server(process)
+        print(f"{mode:<12}{startup:>10.1f}{before['total_pss']:>11.0f}{before['master_rss']:>12.0f}"
+              f"{before['worker_rss']:>12.0f}{before['worker_private']:>16.0f}{throughput:>8.0f}"
+              f"{after['total_pss']:>11.0f}{after['worker_private']:>15.0f}{ocr_seconds:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Delete stored photos that no meal references (abandoned uploads, replaced photos).
+Photos younger than the grace period are kept, since a form may still reference them.
+Run with: python scripts/gc_photos.py [--dry-run] [--grace-hours 24] [--batch-size 1000]
+Uses the same environment as the app (DATABASE_URL, Supabase or LOCAL_PHOTOS_PATH).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true", help="Report orphans without deleting them")
+    parser.add_argument("--grace-hours", type=float, default=None,
+                        help="Keep orphans younger than this (default: PHOTO_GC_GRACE_SECONDS)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Photos per delete request")
+    parser.add_argument("--page-size", type=int, default=1000, help="Objects per storage listing page")
+    parser.add_argument("--list", action="store_true", help="Print every orphan filename")
+    args = parser.parse_args()
+
+    from app.config import PHOTO_GC_GRACE_SECONDS
+    from app.photo_gc import collect_orphaned_photos
+    from app.storage import DELETE_BATCH_SIZE
+
+    grace_seconds = int(args.grace_hours * 3600) if args.grace_hours is not None else PHOTO_GC_GRACE_SECONDS
+    report = collect_orphaned_photos(
+        grace_seconds=grace_seconds,
+        dry_run=args.dry_run,
+        batch_size=args.batch_size or DELETE_BATCH_SIZE,
+        page_size=args.page_size,
+    )
+
+    print(f"Stored photos scanned:  {report['scanned']}")
+    print(f"Referenced by meals:    {report['referenced']}")
+    print(f"Unreferenced, < {grace_seconds / 3600:g}h old (kept): {report['kept_recent']}")
+    if args.dry_run:
+        print(f"Orphans to delete:      {report['orphans']} (dry run, nothing deleted)")
+    else:
+        print(f"Orphans deleted:        {report['deleted']}")
+    if args.list or args.dry_run:
+        for filename in report["orphan_filenames"]:
+            print(f"  {filename}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Migrate photos from a local directory to Supabase Storage, keeping their filenames.
+Progress is appended to a manifest; re-running after an interruption skips every
+file already migrated (failed files are retried).
+Run with: python scripts/migrate_photos.py PHOTOS_DIR [--workers 8] [--manifest PATH] [--optimize] [--upsert]
+Uses the same environment as the app (SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, SUPABASE_BUCKET).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("photos_dir", help="Directory holding the photos to migrate")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent uploads")
+    parser.add_argument("--manifest", default=None, help="Progress manifest (JSON lines) used to resume")
+    parser.add_argument("--optimize", action="store_true", help="Re-optimize JPEGs before upload")
+    parser.add_argument("--upsert", action="store_true", help="Overwrite photos already in storage")
+    parser.add_argument("--progress-every", type=int, default=500, help="Print progress every N files")
+    args = parser.parse_args()
+
+    from app.photo_migration import DEFAULT_MANIFEST_PATH, migrate_photos
+
+    report = migrate_photos(
+        args.photos_dir,
+        workers=args.workers,
+        manifest_path=args.manifest or DEFAULT_MANIFEST_PATH,
+        optimize=args.optimize,
+        upsert=args.upsert,
+        progress_every=args.progress_every,
+    )
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Precompress static assets (JS, CSS, HTML, JSON) to .br and .gz files next to them.
+The static asset manifest serves these instead of compressing the same file on every request.
+Run with: python scripts/precompress_static.py [static] [--min-size 1024]
+The app also does this at startup (STATIC_PRECOMPRESS); running it at build time
+makes that a no-op. Brotli variants need the brotli package.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("static_dir", nargs="?", default="static", help="Directory of static assets")
+    parser.add_argument("--min-size", type=int, default=None,
+                        help="Skip smaller files (default: COMPRESSION_MIN_SIZE, or 1024 if unset)")
+    args = parser.parse_args()
+
+    # app.config is not imported: it requires the app's secrets, which a build step does not have
+    from app.compression import DEFAULT_MIN_SIZE, brotli, precompress_static_files
+
+    min_size = args.min_size
+    if min_size is None:
+        min_size = int(os.getenv("COMPRESSION_MIN_SIZE") or DEFAULT_MIN_SIZE)
+    report = precompress_static_files(args.static_dir, minimum_size=min_size)
+    print(f"Static files: {report['files']}, variants written: {report['written']}, up to date: {report['skipped']}")
+    if brotli is None:
+        print("brotli is not installed: only .gz variants were written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
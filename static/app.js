@@ -13,7 +13,7 @@ let originalMealPhoto = null; // Track original photo when editing starts
 let photoRemoved = false; // Track if photo was explicitly removed
 let quillEditor = null; // Quill editor instance
 let currentTab = 'manual'; // Current active tab
-let recipePhotos = []; // Array to store photos: [{filename: "...", is_primary: true, url: "..."}, ...]
+let recipePhotos = []; // Array to store photos: [{filename: "...", is_primary: true, url: "...", placeholder: "data:..."}, ...]
 
 // Helper function to build headers with authentication and CSRF token
 function buildAuthHeaders(includeCsrf = true) {
@@ -27,6 +27,18 @@ function buildAuthHeaders(includeCsrf = true) {
     return headers;
 }
 
+// Inline style that paints a photo's tiny placeholder (data: URI) until the photo loads
+function placeholderStyle(placeholder) {
+    return placeholder ? ` style="background-image: url('${escapeHtml(placeholder)}'); background-size: cover; background-position: center;"` : '';
+}
+
+// Build the URL of a stored photo. The token is only appended when auth is enabled,
+// so in no-login mode the URL is stable and the (immutable) photo stays cached.
+function buildPhotoUrl(filename) {
+    const url = `static/photos/${encodeURIComponent(filename)}`;
+    return currentToken ? `${url}?token=${encodeURIComponent(currentToken)}` : url;
+}
+
 // Tab switching function
 function switchTab(tabName) {
     currentTab = tabName;
@@ -62,10 +74,10 @@ function renderPhotosContainer() {
     recipePhotos.forEach((photo, index) => {
         const photoItem = document.createElement('div');
         photoItem.className = `photo-item ${photo.is_primary ? 'primary' : ''}`;
-        // Include token in URL for image authentication (images can't send Authorization headers)
-        const photoUrl = photo.url || (photo.filename ? `static/photos/${photo.filename}?token=${encodeURIComponent(currentToken || '')}` : '');
+        // Token is added to the URL only when auth is enabled (images can't send Authorization headers)
+        const photoUrl = photo.url || (photo.filename ? buildPhotoUrl(photo.filename) : '');
         photoItem.innerHTML = `
-            ${photoUrl ? `<img src="${photoUrl}" alt="Recipe photo">` : '<div class="photo-placeholder">Photo loading...</div>'}
+            ${photoUrl ? `<img src="${photoUrl}" alt="Recipe photo"${placeholderStyle(photo.placeholder)}>` : '<div class="photo-placeholder">Photo loading...</div>'}
             <div class="photo-item-actions">
                 ${photo.is_primary ? `<span class="photo-item-label">${window.t ? window.t('modals.primaryPhoto') : 'Primary Photo'}</span>` : `<button type="button" class="btn-secondary" onclick="setPrimaryPhoto(${index})" data-i18n="modals.setAsPrimary">Set as Primary</button>`}
                 <button type="button" class="btn-secondary" onclick="removePhotoFromList(${index})" data-i18n="modals.removePhotoBtn">Remove</button>
@@ -141,7 +153,8 @@ async function addPhoto() {
                     recipePhotos.push({
                         filename: data.filename,
                         is_primary: recipePhotos.length === 0, // First photo is primary by default
-                        url: URL.createObjectURL(file)
+                        url: URL.createObjectURL(file),
+                        placeholder: data.placeholder || null
                     });
                 } catch (error) {
                     console.error('Error uploading photo:', error);
@@ -211,13 +224,15 @@ async function handleImportPhoto(e) {
             recipePhotos.push({
                 filename: data.filename,
                 is_primary: true,
-                url: photoUrl
+                url: photoUrl,
+                placeholder: data.placeholder || null
             });
         } else {
             recipePhotos[0] = {
                 filename: data.filename,
                 is_primary: true,
-                url: photoUrl
+                url: photoUrl,
+                placeholder: data.placeholder || null
             };
         }
         
@@ -258,14 +273,6 @@ async function handleImportPhoto(e) {
     }
 }
 
-// Helper function to strip HTML tags for preview
-function stripHtml(html) {
-    if (!html) return '';
-    const tmp = document.createElement('DIV');
-    tmp.innerHTML = html;
-    return tmp.textContent || tmp.innerText || '';
-}
-
 // Initialize Quill editor
 function initQuillEditor() {
     if (quillEditor) {
@@ -1062,15 +1069,17 @@ function displayMeals(meals) {
             photoFilename = primaryPhoto?.filename;
         }
         const hasPhoto = !!photoFilename;
-        // Include token in URL for image authentication (images can't send Authorization headers)
-        const photoUrl = hasPhoto ? `static/photos/${escapeHtml(photoFilename)}?token=${encodeURIComponent(currentToken || '')}` : '';
+        // Prefer the signed URL from the API (served without auth or a DB lookup)
+        const photoUrl = hasPhoto ? escapeHtml(meal.photo_url || buildPhotoUrl(photoFilename)) : '';
+        // Tiny inline placeholder painted behind the image until it arrives
+        const cardPlaceholder = hasPhoto ? placeholderStyle(meal.photo_placeholder) : '';
         // Strip HTML tags for card preview
-        const plainDescription = meal.description ? stripHtml(meal.description) : '';
-        const description = plainDescription ? (plainDescription.substring(0, 100) + (plainDescription.length > 100 ? '...' : '')) : '';
+        // Plain-text excerpt computed by the server when the description was saved
+        const description = meal.description_excerpt ? escapeHtml(meal.description_excerpt) : '';
         
         return `
         <div class="meal-card" onclick="showMealDetails(${meal.id})">
-            ${hasPhoto ? `<div class="meal-card-image"><img src="${photoUrl}" alt="${escapeHtml(meal.name)}"></div>` : '<div class="meal-card-image-placeholder"><span class="placeholder-icon">🍽️</span></div>'}
+            ${hasPhoto ? `<div class="meal-card-image"${cardPlaceholder}><img src="${photoUrl}" alt="${escapeHtml(meal.name)}"></div>` : '<div class="meal-card-image-placeholder"><span class="placeholder-icon">🍽️</span></div>'}
             <div class="meal-menu-overlay" onclick="event.stopPropagation()">
                 <button class="meal-menu-btn" onclick="toggleMealMenu(${meal.id})">⋯</button>
                 <div id="menu-${meal.id}" class="meal-menu-dropdown hidden" onclick="event.stopPropagation()">
@@ -1160,14 +1169,16 @@ function editMeal(mealId) {
             recipePhotos = meal.photos.map(photo => ({
                 filename: photo.filename,
                 is_primary: photo.is_primary || false,
-                url: null // Will be loaded from server
+                url: photo.url || null, // Signed URL from the API, or built from the filename
+                placeholder: photo.placeholder || null
             }));
         } else if (meal.photo_filename) {
             // Backward compatibility: convert old photo_filename to photos array
             recipePhotos = [{
                 filename: meal.photo_filename,
                 is_primary: true,
-                url: null
+                url: meal.photo_url || null,
+                placeholder: meal.photo_placeholder || null
             }];
         }
         renderPhotosContainer();
@@ -1279,9 +1290,9 @@ function showMealDetails(mealId) {
             photoFilename = primaryPhoto?.filename;
         }
         if (photoFilename) {
-            // Include token in URL for image authentication (images can't send Authorization headers)
-            const photoUrl = `static/photos/${escapeHtml(photoFilename)}?token=${encodeURIComponent(currentToken || '')}`;
-            photoDiv.innerHTML = `<a href="${photoUrl}" target="_blank" rel="noopener noreferrer" class="detail-photo-link"><img src="${photoUrl}" alt="${escapeHtml(meal.name)}" class="detail-photo-image"></a>`;
+            // Prefer the signed URL from the API; otherwise the token authenticates the image request
+            const photoUrl = escapeHtml(meal.photo_url || buildPhotoUrl(photoFilename));
+            photoDiv.innerHTML = `<a href="${photoUrl}" target="_blank" rel="noopener noreferrer" class="detail-photo-link"><img src="${photoUrl}" alt="${escapeHtml(meal.name)}" class="detail-photo-image"${placeholderStyle(meal.photo_placeholder)}></a>`;
             photoSection.classList.remove('hidden');
         } else {
             photoSection.classList.add('hidden');
@@ -1328,7 +1339,8 @@ async function saveMeal(event) {
         if (recipePhotos && recipePhotos.length > 0) {
             body.photos = recipePhotos.map(photo => ({
                 filename: photo.filename,
-                is_primary: photo.is_primary || false
+                is_primary: photo.is_primary || false,
+                ...(photo.placeholder ? { placeholder: photo.placeholder } : {})
             }));
             // Set photo_filename for backward compatibility (use primary photo)
             const primaryPhoto = recipePhotos.find(p => p.is_primary) || recipePhotos[0];
@@ -1,9 +1,12 @@
 // Service Worker for EasyMeal PWA
-const CACHE_NAME = 'easymeal-v9';
-const STATIC_CACHE = 'easymeal-static-v9';
-const API_CACHE = 'easymeal-api-v9';
+// Replaced by the server with the static asset manifest version, so every deploy
+// that changes an asset gets fresh caches (no manual version bump)
+const ASSET_VERSION = 'dev';
+const CACHE_NAME = `easymeal-${ASSET_VERSION}`;
+const STATIC_CACHE = `easymeal-static-${ASSET_VERSION}`;
+const API_CACHE = `easymeal-api-${ASSET_VERSION}`;
 
-// Files to cache on install
+// Files to cache on install (the server rewrites them to fingerprinted URLs)
 const STATIC_FILES = [
   '/easymeal/',
   '/easymeal/static/index.html',
@@ -0,0 +1,137 @@
+"""
+Access token verification: the per-worker cache of verified tokens, and the 401s of
+get_current_user when DISABLE_AUTH is off.
+Run with: python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import jwt
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+from app import auth  # noqa: E402
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Verify tokens with SECRET, starting from an empty cache; counts the jwt.decode calls"""
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.setattr(auth, "JWT_CACHE_SIZE", 1024)
+    monkeypatch.setattr(auth, "_verified_tokens", OrderedDict())
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth.jwt, "decode", counting_decode)
+    return calls
+
+
+def access_token(sub: str = "user-1", expires_in: int = 600, secret: str = SECRET, **claims) -> str:
+    claims = {"sub": sub, "aud": "authenticated", **claims}
+    if expires_in is not None:
+        claims["exp"] = int(time.time()) + expires_in
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def request_with(headers: dict = None, cookies: dict = None) -> Request:
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    if cookies:
+        raw_headers.append((b"cookie", "; ".join(f"{k}={v}" for k, v in cookies.items()).encode()))
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+def current_user(request: Request):
+    return asyncio.run(auth.get_current_user(request, None))
+
+
+def test_verified_token_is_served_from_the_cache(decodes):
+    token = access_token()
+    assert auth.verify_access_token(token)["sub"] == "user-1"
+    assert auth.verify_access_token(token)["sub"] == "user-1"
+    assert len(decodes) == 1
+
+
+def test_cached_token_is_evicted_at_exp(decodes, monkeypatch):
+    token = access_token(expires_in=600)
+    auth.verify_access_token(token)
+    now = time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: now + 601)
+    auth.verify_access_token(token)
+    assert len(decodes) == 2
+
+
+def test_token_without_exp_is_never_cached(decodes):
+    token = access_token(expires_in=None)
+    assert auth.verify_access_token(token)["sub"] == "user-1"
+    assert auth.verify_access_token(token)["sub"] == "user-1"
+    assert len(decodes) == 2
+    assert len(auth._verified_tokens) == 0
+
+
+def test_cache_is_bounded_by_jwt_cache_size(decodes, monkeypatch):
+    monkeypatch.setattr(auth, "JWT_CACHE_SIZE", 2)
+    tokens = [access_token(sub=f"user-{i}") for i in range(3)]
+    for token in tokens:
+        auth.verify_access_token(token)
+    assert len(auth._verified_tokens) == 2
+    # The least recently used token was evicted and is verified again
+    auth.verify_access_token(tokens[0])
+    assert len(decodes) == 4
+
+
+def test_invalid_tokens_are_rejected(decodes):
+    assert auth.verify_access_token(access_token(secret="other-secret")) is None
+    assert auth.verify_access_token(access_token(expires_in=-60)) is None
+    assert auth.verify_access_token(access_token(aud="anon")) is None
+    assert len(auth._verified_tokens) == 0
+
+
+@pytest.fixture
+def auth_enabled(decodes, monkeypatch):
+    monkeypatch.setattr(auth, "DISABLE_AUTH", False)
+
+
+def test_get_current_user_without_token_is_401(auth_enabled):
+    with pytest.raises(HTTPException) as error:
+        current_user(request_with())
+    assert error.value.status_code == 401
+    assert error.value.detail == "Not authenticated"
+
+
+@pytest.mark.parametrize("token", [
+    "not-a-jwt",
+    access_token(secret="other-secret"),
+    access_token(expires_in=-60),
+    access_token(sub=""),
+])
+def test_get_current_user_with_invalid_token_is_401(auth_enabled, token):
+    with pytest.raises(HTTPException) as error:
+        current_user(request_with(headers={"Authorization": f"Bearer {token}"}))
+    assert error.value.status_code == 401
+    assert error.value.detail == "Invalid or expired token"
+
+
+def test_get_current_user_without_jwt_secret_is_401(auth_enabled, monkeypatch):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", None)
+    with pytest.raises(HTTPException) as error:
+        current_user(request_with(headers={"Authorization": f"Bearer {access_token()}"}))
+    assert error.value.status_code == 401
+
+
+def test_get_current_user_takes_the_user_from_the_token(auth_enabled):
+    token = access_token(sub="user-7", email="cook@example.com")
+    assert current_user(request_with(cookies={"sb-access-token": token})) == {"id": "user-7", "email": "cook@example.com"}
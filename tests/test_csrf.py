@@ -0,0 +1,62 @@
+"""
+CSRF protection: requests authenticated by the sb-access-token cookie need an
+X-CSRF-Token header like requests authenticated by the Authorization header.
+Run with: python -m pytest tests
+"""
+import os
+import sys
+import time
+
+import jwt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+from app import auth  # noqa: E402
+from app.csrf import CSRFProtectionMiddleware  # noqa: E402
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth, "SUPABASE_JWT_SECRET", SECRET)
+    app = FastAPI()
+    app.add_middleware(CSRFProtectionMiddleware)
+
+    @app.post("/api/meals")
+    async def create_meal():
+        return {"created": True}
+
+    return TestClient(app)
+
+
+def access_token() -> str:
+    claims = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 600}
+    return jwt.encode(claims, SECRET, algorithm="HS256")
+
+
+def test_cookie_only_post_without_csrf_token_is_rejected(client):
+    client.cookies.set("sb-access-token", access_token())
+    response = client.post("/api/meals")
+    assert response.status_code == 403
+
+
+def test_cookie_post_with_csrf_token_is_accepted(client):
+    client.cookies.set("sb-access-token", access_token())
+    response = client.post("/api/meals", headers={"X-CSRF-Token": "token"})
+    assert response.status_code == 200
+
+
+def test_bearer_post_without_csrf_token_is_rejected(client):
+    response = client.post("/api/meals", headers={"Authorization": f"Bearer {access_token()}"})
+    assert response.status_code == 403
+
+
+def test_unauthenticated_post_is_left_to_the_endpoint(client):
+    response = client.post("/api/meals")
+    assert response.status_code == 200
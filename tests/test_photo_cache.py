@@ -0,0 +1,53 @@
+"""
+PhotoCache disk tier: an entry reserved by put() stays indexed while its file is being
+written, and a file that lost its entry meanwhile is not left behind.
+Run with: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+from app import storage  # noqa: E402
+
+PHOTO = b"jpeg" * 100
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return storage.PhotoCache(memory_bytes=0, disk_dir=str(tmp_path), disk_bytes=10 * len(PHOTO))
+
+
+def during_write(monkeypatch, callback):
+    """Run callback just before put() renames the cache file into place"""
+    replace = os.replace
+
+    def replace_after_callback(src, dst):
+        callback()
+        replace(src, dst)
+
+    monkeypatch.setattr(storage.os, "replace", replace_after_callback)
+
+
+def test_get_during_write_keeps_the_reserved_entry(cache, tmp_path, monkeypatch):
+    seen = []
+    during_write(monkeypatch, lambda: seen.append(cache.get("a.jpg")))
+    cache.put("a.jpg", PHOTO)
+
+    assert seen == [None]
+    stats = cache.get_stats()
+    assert stats["disk_entries"] == 1
+    assert stats["disk_bytes"] == len(PHOTO)
+    assert cache.get("a.jpg") == PHOTO
+
+
+def test_invalidate_during_write_leaves_no_file(cache, tmp_path, monkeypatch):
+    during_write(monkeypatch, lambda: cache.invalidate("a.jpg"))
+    cache.put("a.jpg", PHOTO)
+
+    assert not (tmp_path / "a.jpg").exists()
+    assert cache.get_stats()["disk_bytes"] == 0
@@ -0,0 +1,51 @@
+"""
+Photos arrays sent by the client: only filenames and is_primary are kept, and the
+placeholders saved with a meal are the server's own.
+Run with: python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DISABLE_AUTH", "true")
+
+from app import schemas, storage  # noqa: E402
+
+FOREIGN_PLACEHOLDER = "data:image/jpeg;base64,AAAA"
+SERVER_PLACEHOLDER = "data:image/jpeg;base64,BBBB"
+
+
+def test_arbitrary_keys_and_client_placeholders_are_dropped():
+    meal = schemas.MealCreate(name="Crepes", photos=[
+        {"filename": "a.jpg", "is_primary": True, "placeholder": FOREIGN_PLACEHOLDER, "url": "https://evil", "x": 1},
+        {"filename": "b.jpg", "is_primary": "yes"},
+        {"placeholder": FOREIGN_PLACEHOLDER},
+    ])
+    assert meal.photos == [
+        {"filename": "a.jpg", "is_primary": True},
+        {"filename": "b.jpg", "is_primary": False},
+    ]
+
+
+def test_placeholders_come_from_the_server(monkeypatch):
+    built = []
+
+    def build_photo_placeholder(filename):
+        built.append(filename)
+        return SERVER_PLACEHOLDER if filename == "new.jpg" else None
+
+    monkeypatch.setattr(storage, "build_photo_placeholder", build_photo_placeholder)
+    monkeypatch.setattr(storage, "_uploaded_placeholders", {"uploaded.jpg": SERVER_PLACEHOLDER})
+    photos = [{"filename": "kept.jpg"}, {"filename": "uploaded.jpg"}, {"filename": "new.jpg"}, {"filename": "broken.jpg"}]
+
+    result = asyncio.run(storage.attach_photo_placeholders(photos, {"kept.jpg": SERVER_PLACEHOLDER}))
+
+    assert result == [
+        {"filename": "kept.jpg", "placeholder": SERVER_PLACEHOLDER},
+        {"filename": "uploaded.jpg", "placeholder": SERVER_PLACEHOLDER},
+        {"filename": "new.jpg", "placeholder": SERVER_PLACEHOLDER},
+        {"filename": "broken.jpg"},
+    ]
+    assert sorted(built) == ["broken.jpg", "new.jpg"]